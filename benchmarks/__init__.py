@@ -0,0 +1,5 @@
+"""
+Benchmarks for comparing inference configurations
+
+Run each module with ``python -m benchmarks.<name> --help``.
+"""
@@ -0,0 +1,83 @@
+"""
+Shared helpers for benchmark scripts
+"""
+import multiprocessing
+import sys
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence
+
+# Allow running benchmarks from the repository root with python -m
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def peak_rss_mb() -> float:
+    """
+    Peak resident set size of the current process
+
+    Returns:
+        Peak RSS in megabytes (0.0 if the platform can't report it)
+    """
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+        except Exception:
+            return 0.0
+
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    return usage / (1024 * 1024) if sys.platform == "darwin" else usage / 1024
+
+
+def percentile(values: Sequence[float], p: float) -> float:
+    """
+    Nearest-rank percentile
+
+    Args:
+        values: Sample values
+        p: Percentile in [0, 1]
+
+    Returns:
+        The percentile value (0.0 for no samples)
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+def run_isolated(target: Callable[..., Dict], *args: Any) -> Dict:
+    """
+    Run a measurement in a fresh process so load time and memory aren't shared
+
+    Args:
+        target: Module-level function returning a result dictionary
+        *args: Arguments passed to target
+
+    Returns:
+        The result dictionary, or {"error": ...} if the child failed
+    """
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(1) as pool:
+        try:
+            return pool.apply(target, args)
+        except Exception as e:
+            return {"error": str(e)}
+
+
+def print_table(rows: List[Dict], columns: List[str]):
+    """
+    Print result rows as an aligned text table
+
+    Args:
+        rows: Result dictionaries
+        columns: Keys to show, in order
+    """
+    cells = [[str(row.get(column, "")) for column in columns] for row in rows]
+    widths = [max([len(column)] + [len(cell[i]) for cell in cells]) for i, column in enumerate(columns)]
+    print("  ".join(column.ljust(width) for column, width in zip(columns, widths)))
+    print("  ".join("-" * width for width in widths))
+    for cell in cells:
+        print("  ".join(value.ljust(width) for value, width in zip(cell, widths)))
@@ -0,0 +1,126 @@
+"""
+Benchmark entity extraction on a synthetic transcript corpus
+
+Compares three approaches:
+  legacy     the previous extract_entities (re imported and \\d+ compiled per call, first number only)
+  per-type   one precompiled regex per entity type, i.e. one scan per type
+  engine     EntityExtractor: all types in one precompiled regex, one scan
+
+Usage:
+    python -m benchmarks.entity_extraction
+    python -m benchmarks.entity_extraction --transcripts 100000
+"""
+import argparse
+import random
+import re
+import time
+from typing import Dict, List
+
+from benchmarks.common import print_table
+from src.entity_extractor import ENTITY_TYPES, PATTERNS, entity_extractor
+
+TEMPLATES = [
+    "hi can you check the balance on account {account}",
+    "my account number is {spelled} and I want to know my balance",
+    "please transfer {amount} to my savings on {date}",
+    "I was charged {amount} {relative} and I don't recognise it",
+    "call me back at {phone} about the payment of {amount}",
+    "what were my transactions between {date} and {date}",
+    "hello I need help with my card it stopped working {relative}",
+    "how do I change the address on my account",
+    "send {amount} to account {account} {relative}",
+    "is the branch open on {date} or only on weekdays",
+]
+
+
+def _fill(template: str, rng: random.Random) -> str:
+    digit_words = ["zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine"]
+    values = {
+        "account": lambda: str(rng.randint(10 ** 5, 10 ** 12)),
+        "spelled": lambda: " ".join(rng.choice(digit_words) for _ in range(rng.randint(4, 8))),
+        "amount": lambda: rng.choice([
+            f"${rng.randint(1, 5000):,}.{rng.randint(0, 99):02d}",
+            f"{rng.randint(1, 900)} dollars",
+            f"{rng.randint(1, 99)} euros",
+            f"rs {rng.randint(100, 99999)}",
+        ]),
+        "date": lambda: rng.choice([
+            f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            f"march {rng.randint(1, 28)}th",
+            f"{rng.randint(1, 28)} of june 2023",
+            f"{rng.randint(1, 12)}/{rng.randint(1, 28)}/2024",
+        ]),
+        "relative": lambda: rng.choice(["yesterday", "today", "last week", "last friday"]),
+        "phone": lambda: f"({rng.randint(200, 999)}) {rng.randint(200, 999)}-{rng.randint(1000, 9999)}",
+    }
+    return re.sub(r"\{(\w+)\}", lambda m: values[m.group(1)](), template)
+
+
+def build_corpus(size: int, seed: int = 0) -> List[str]:
+    """Generate synthetic transcripts"""
+    rng = random.Random(seed)
+    return [_fill(rng.choice(TEMPLATES), rng) for _ in range(size)]
+
+
+def legacy_extract(text: str) -> List[Dict[str, str]]:
+    """The previous implementation"""
+    entities = []
+    import re
+    numbers = re.findall(r'\d+', text)
+    if numbers:
+        entities.append({"type": "number", "value": numbers[0]})
+    return entities
+
+
+PER_TYPE = [
+    (ENTITY_TYPES[name], re.compile(rf"(?<!\w)(?:{pattern})(?!\w)", re.IGNORECASE))
+    for name, pattern in PATTERNS
+]
+
+
+def per_type_extract(text: str) -> List[Dict]:
+    """One scan per entity type (overlaps are not resolved, so it finds more spans)"""
+    return [
+        {"type": kind, "text": match.group(0), "start": match.start(), "end": match.end()}
+        for kind, pattern in PER_TYPE
+        for match in pattern.finditer(text)
+    ]
+
+
+def measure(name: str, extract, corpus: List[str]) -> Dict:
+    """Time one extractor over the corpus"""
+    start = time.perf_counter()
+    found = sum(len(extract(text)) for text in corpus)
+    elapsed = time.perf_counter() - start
+    return {
+        "extractor": name,
+        "us_per_transcript": round(elapsed * 1e6 / len(corpus), 2),
+        "transcripts_per_s": int(len(corpus) / elapsed),
+        "entities": found,
+    }
+
+
+def main():
+    """Run the benchmark and print a table"""
+    parser = argparse.ArgumentParser(description="Benchmark entity extraction on synthetic transcripts")
+    parser.add_argument("--transcripts", type=int, default=20000, help="Corpus size (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.transcripts, args.seed)
+    rows = [
+        measure("legacy", legacy_extract, corpus),
+        measure("per-type", per_type_extract, corpus),
+        measure("engine", entity_extractor.extract, corpus),
+    ]
+    print_table(rows, ["extractor", "us_per_transcript", "transcripts_per_s", "entities"])
+
+    counts: Dict[str, int] = {}
+    for text in corpus:
+        for entity in entity_extractor.extract(text):
+            counts[entity["type"]] = counts.get(entity["type"], 0) + 1
+    print("\nengine entities by type: " + ", ".join(f"{kind}={count}" for kind, count in sorted(counts.items())))
+
+
+if __name__ == "__main__":
+    main()
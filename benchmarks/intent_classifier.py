@@ -0,0 +1,157 @@
+"""
+Compare intent detection paths by latency, accuracy and calibration
+
+"distilbert" reproduces the previous path: a full distilbert-base-uncased
+text-classification pipeline per query whose label was discarded in favour of
+substring keyword matching. The other configurations are the compiled keyword
+matcher alone and the embedding classifier with each encoder. Accuracy and
+expected calibration error (ECE) are measured on held-out utterances that are
+not in src/data/intents.json.
+
+Usage:
+    python -m benchmarks.intent_classifier
+    python -m benchmarks.intent_classifier --configs hashing transformer --repeats 20
+"""
+import argparse
+import time
+from typing import Dict, List, Tuple
+
+from benchmarks.common import peak_rss_mb, percentile, print_table, run_isolated
+
+DEFAULT_CONFIGS = ["distilbert", "keywords", "hashing", "transformer"]
+
+EVAL_SET: List[Tuple[str, str]] = [
+    ("hi, good to talk to you", "greeting"),
+    ("hello there, anybody home", "greeting"),
+    ("hey, good evening to you", "greeting"),
+    ("hi assistant, quick question coming", "greeting"),
+    ("ok thank you so much, bye now", "farewell"),
+    ("that's it for today, see ya", "farewell"),
+    ("great, have a good one", "farewell"),
+    ("thanks, nothing else", "farewell"),
+    ("how much do I have in account 77812", "account_inquiry"),
+    ("what's my current balance", "account_inquiry"),
+    ("tell me the status of my savings account", "account_inquiry"),
+    ("what's left in my account", "account_inquiry"),
+    ("what time do you close on friday", "faq"),
+    ("how do I order a new checkbook", "faq"),
+    ("where is your head office", "faq"),
+    ("what is the interest rate on savings", "faq"),
+    ("my debit card isn't working", "support"),
+    ("I'm locked out of online banking", "support"),
+    ("can someone help me, the app shows an error", "support"),
+    ("I think my card was stolen", "support"),
+    ("send 200 dollars to my mom", "transaction"),
+    ("I'd like to withdraw some cash", "transaction"),
+    ("please pay my electricity bill", "transaction"),
+    ("list my last five payments", "transaction"),
+]
+
+
+def _keyword_intent(intents: Dict[str, List[str]], text: str) -> str:
+    """Keyword scoring used by the previous implementation"""
+    text_lower = text.lower()
+    scores = {intent: sum(1 for keyword in keywords if keyword in text_lower) for intent, keywords in intents.items()}
+    best = max(scores, key=scores.get)
+    return best if scores[best] > 0 else "general"
+
+
+def _expected_calibration_error(confidences: List[float], correct: List[bool], bins: int = 5) -> float:
+    """Average gap between confidence and accuracy, weighted by bin size"""
+    total, error = len(confidences), 0.0
+    for b in range(bins):
+        low, high = b / bins, (b + 1) / bins
+        members = [i for i, c in enumerate(confidences) if low < c <= high or (b == 0 and c == 0)]
+        if members:
+            accuracy = sum(correct[i] for i in members) / len(members)
+            confidence = sum(confidences[i] for i in members) / len(members)
+            error += len(members) / total * abs(accuracy - confidence)
+    return error
+
+
+def measure(config: str, repeats: int) -> Dict:
+    """Load one intent detection path and time it (runs in a child process)"""
+    from src.intent_classifier import IntentClassifier, create_encoder, load_intent_catalog
+
+    catalog = load_intent_catalog()
+    intents = {
+        intent: [k["phrase"] if isinstance(k, dict) else k for k in entry["keywords"]]
+        for intent, entry in catalog.items()
+    }
+    texts = [text for text, _ in EVAL_SET]
+
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    if config == "distilbert":
+        from transformers import pipeline
+        model = pipeline("text-classification", model="distilbert-base-uncased", device=-1)
+
+        def predict(batch):
+            return [(_keyword_intent(intents, text), model(text)[0]["score"]) for text in batch]
+    elif config == "keywords":
+        from src.keyword_matcher import KeywordMatcher
+        matcher = KeywordMatcher()
+
+        def predict(batch):
+            return [(matcher.match(text), 0.7) for text in batch]
+    else:
+        examples = {intent: entry["examples"] for intent, entry in catalog.items()}
+        classifier = IntentClassifier(create_encoder(config)).fit(examples)
+
+        def predict(batch):
+            return [(result["intent"], result["confidence"]) for result in classifier.predict(batch)]
+    load_seconds = time.perf_counter() - start
+
+    predictions = predict(texts)
+    correct = [intent == label for (intent, _), (_, label) in zip(predictions, EVAL_SET)]
+
+    single = []
+    for _ in range(repeats):
+        for text in texts:
+            start = time.perf_counter()
+            predict([text])
+            single.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        predict(texts)
+    batched = (time.perf_counter() - start) * 1000 / (repeats * len(texts))
+
+    return {
+        "config": config,
+        "load_s": round(load_seconds, 2),
+        "accuracy": round(sum(correct) / len(correct), 3),
+        "ece": round(_expected_calibration_error([c for _, c in predictions], correct), 3),
+        "p50_ms": round(percentile(single, 0.5), 3),
+        "p95_ms": round(percentile(single, 0.95), 3),
+        "batched_ms": round(batched, 3),
+        "model_rss_mb": round(peak_rss_mb() - rss_before, 1),
+    }
+
+
+def main():
+    """Run the comparison and print a table"""
+    parser = argparse.ArgumentParser(description="Compare intent detection paths by latency and accuracy")
+    parser.add_argument(
+        "--configs",
+        nargs="+",
+        default=DEFAULT_CONFIGS,
+        help="Paths to compare: distilbert, keywords, hashing, transformer (default: %(default)s)"
+    )
+    parser.add_argument("--repeats", type=int, default=5, help="Passes over the evaluation set")
+    args = parser.parse_args()
+
+    rows = []
+    for config in args.configs:
+        print(f"Benchmarking {config}...")
+        result = run_isolated(measure, config, args.repeats)
+        result.setdefault("config", config)
+        rows.append(result)
+
+    print()
+    print_table(rows, ["config", "load_s", "accuracy", "ece", "p50_ms", "p95_ms", "batched_ms", "model_rss_mb", "error"])
+    print("\nbatched_ms is the per-query cost when the whole evaluation set is classified in one call")
+
+
+if __name__ == "__main__":
+    main()
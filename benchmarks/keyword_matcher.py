@@ -0,0 +1,111 @@
+"""
+Micro-benchmark of keyword intent matching: substring loop vs compiled matcher
+
+The previous NLPProcessor._match_intent tested every keyword of every intent with
+a substring search, so its cost grew with intents x keywords. KeywordMatcher
+compiles all phrases into one trie-shaped regex and scans each text once.
+Catalogs are synthesized at several sizes; "disagree" counts queries where the
+loop's answer differs, usually because of a match inside another word.
+
+Usage:
+    python -m benchmarks.keyword_matcher
+    python -m benchmarks.keyword_matcher --sizes 10x5 500x20 --queries 2000
+"""
+import argparse
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from benchmarks.common import print_table
+from src.keyword_matcher import KeywordMatcher
+
+SYLLABLES = ["ka", "lo", "mi", "ren", "sa", "to", "vu", "der", "pol", "qua", "zen", "tri", "bo", "fel", "ga"]
+
+
+def _word(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 3)))
+
+
+def build_catalog(n_intents: int, n_phrases: int, rng: random.Random) -> Dict:
+    """Synthesize a catalog of one- to three-word phrases"""
+    return {
+        f"intent_{i}": {
+            "keywords": [" ".join(_word(rng) for _ in range(rng.randint(1, 3))) for _ in range(n_phrases)],
+            "examples": [],
+        }
+        for i in range(n_intents)
+    }
+
+
+def legacy_match(intents: Dict[str, List[str]], text: str) -> str:
+    """The previous substring loop"""
+    text_lower = text.lower()
+    intent_scores = {}
+    for intent, keywords in intents.items():
+        score = sum(1 for keyword in keywords if keyword in text_lower)
+        if score > 0:
+            intent_scores[intent] = score
+    if intent_scores:
+        return max(intent_scores, key=intent_scores.get)
+    return "general"
+
+
+def measure(n_intents: int, n_phrases: int, n_queries: int, seed: int) -> Dict:
+    """Time both matchers on one synthesized catalog"""
+    rng = random.Random(seed)
+    catalog = build_catalog(n_intents, n_phrases, rng)
+    intents = {intent: entry["keywords"] for intent, entry in catalog.items()}
+    queries = [" ".join(_word(rng) for _ in range(rng.randint(5, 15))) for _ in range(n_queries)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "intents.json"
+        path.write_text(json.dumps(catalog), encoding="utf-8")
+
+        start = time.perf_counter()
+        matcher = KeywordMatcher(path, check_interval=3600)
+        compile_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        legacy = [legacy_match(intents, query) for query in queries]
+        legacy_us = (time.perf_counter() - start) * 1e6 / n_queries
+
+        start = time.perf_counter()
+        compiled = [matcher.match(query) for query in queries]
+        compiled_us = (time.perf_counter() - start) * 1e6 / n_queries
+
+    return {
+        "catalog": f"{n_intents}x{n_phrases}",
+        "compile_ms": round(compile_ms, 1),
+        "legacy_us": round(legacy_us, 1),
+        "compiled_us": round(compiled_us, 1),
+        "speedup": round(legacy_us / compiled_us, 1) if compiled_us else "",
+        "disagree": sum(a != b for a, b in zip(legacy, compiled)),
+    }
+
+
+def main():
+    """Run the benchmark and print a table"""
+    parser = argparse.ArgumentParser(description="Compare substring keyword matching with the compiled matcher")
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        default=["6x5", "100x20", "500x20", "1000x50"],
+        help="Catalog sizes as intents x phrases per intent (default: %(default)s)"
+    )
+    parser.add_argument("--queries", type=int, default=1000, help="Queries per catalog")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rows = []
+    for size in args.sizes:
+        n_intents, n_phrases = (int(value) for value in size.split("x"))
+        rows.append(measure(n_intents, n_phrases, args.queries, args.seed))
+
+    print_table(rows, ["catalog", "compile_ms", "legacy_us", "compiled_us", "speedup", "disagree"])
+
+
+if __name__ == "__main__":
+    main()
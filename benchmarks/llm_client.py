@@ -0,0 +1,125 @@
+"""
+Tail latency and fallback rate of LLMClient against a local fake LLM
+
+FakeLLM answers after a log-normal delay; a fraction of calls hits a slow tail
+(a stalled upstream) and a fraction fails with a 503. The same request stream is
+sent through three client policies:
+  single    one attempt bounded only by the deadline (the previous blocking call)
+  retries   attempt timeout plus jittered retries
+  hedged    retries plus a hedge request after the observed p95
+Runs offline, without Gemini credentials.
+
+Usage:
+    python -m benchmarks.llm_client
+    python -m benchmarks.llm_client --requests 1000 --tail-rate 0.1 --error-rate 0.05
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import AsyncIterator, Dict, List
+
+from benchmarks.common import percentile, print_table
+from src.llm_client import LLMClient, LLMDeadlineExceeded
+
+
+class FakeServerError(Exception):
+    """Stands in for a 503 from the API"""
+    code = 503
+
+
+class FakeLLM:
+    """Async transport with a configurable latency distribution and failure rate"""
+
+    def __init__(self, median_ms: float, tail_rate: float, tail_ms: float, error_rate: float, seed: int = 0):
+        self.median_ms = median_ms
+        self.tail_rate = tail_rate
+        self.tail_ms = tail_ms
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.calls = 0
+
+    async def generate(self, prompt: str) -> str:
+        self.calls += 1
+        roll = self.rng.random()
+        if roll < self.error_rate:
+            await asyncio.sleep(self.median_ms / 4000)
+            raise FakeServerError("503 Service Unavailable")
+        delay_ms = self.median_ms * self.rng.lognormvariate(0, 0.3)
+        if roll < self.error_rate + self.tail_rate:
+            delay_ms += self.tail_ms
+        await asyncio.sleep(delay_ms / 1000)
+        return f"Answer to: {prompt}"
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        yield await self.generate(prompt)
+
+
+async def run_policy(name: str, client: LLMClient, llm: FakeLLM, requests: int, concurrency: int) -> Dict:
+    """Send the request stream through one client and summarize end-to-end latency"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    fallbacks = 0
+
+    async def one(i: int):
+        nonlocal fallbacks
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await client.generate_async(f"query {i}")
+            except (LLMDeadlineExceeded, FakeServerError):
+                fallbacks += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    llm.calls = 0
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    stats = client.get_stats()
+    return {
+        "policy": name,
+        "p50_ms": round(percentile(latencies, 0.50)),
+        "p95_ms": round(percentile(latencies, 0.95)),
+        "p99_ms": round(percentile(latencies, 0.99)),
+        "max_ms": round(max(latencies)),
+        "fallback_pct": round(100 * fallbacks / requests, 2),
+        "calls_per_request": round(llm.calls / requests, 2),
+        "hedge_wins": stats["hedge_wins"],
+    }
+
+
+async def run(args) -> List[Dict]:
+    def make_llm() -> FakeLLM:
+        return FakeLLM(args.median_ms, args.tail_rate, args.tail_ms, args.error_rate, args.seed)
+
+    policies = {
+        "single": dict(attempt_timeout_ms=args.deadline_ms, max_retries=0, hedge_enabled=False),
+        "retries": dict(attempt_timeout_ms=args.attempt_timeout_ms, max_retries=2, hedge_enabled=False),
+        "hedged": dict(attempt_timeout_ms=args.attempt_timeout_ms, max_retries=2, hedge_enabled=True),
+    }
+    rows = []
+    for name, options in policies.items():
+        llm = make_llm()
+        client = LLMClient(llm, deadline_ms=args.deadline_ms, backoff_ms=args.median_ms / 4, **options)
+        rows.append(await run_policy(name, client, llm, args.requests, args.concurrency))
+    return rows
+
+
+def main():
+    """Run every policy and print a table"""
+    parser = argparse.ArgumentParser(description="Compare LLM client policies against a fake LLM")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--median-ms", type=float, default=80)
+    parser.add_argument("--tail-rate", type=float, default=0.05, help="Fraction of calls that stall")
+    parser.add_argument("--tail-ms", type=float, default=3000, help="Extra delay of a stalled call")
+    parser.add_argument("--error-rate", type=float, default=0.02)
+    parser.add_argument("--deadline-ms", type=float, default=2000)
+    parser.add_argument("--attempt-timeout-ms", type=float, default=600)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rows = asyncio.run(run(args))
+    print_table(rows, ["policy", "p50_ms", "p95_ms", "p99_ms", "max_ms", "fallback_pct", "calls_per_request", "hedge_wins"])
+
+
+if __name__ == "__main__":
+    main()
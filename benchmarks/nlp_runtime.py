@@ -0,0 +1,86 @@
+"""
+Compare NLP runtimes: PyTorch encoder vs the exported ONNX graphs
+
+Each runtime starts in a fresh process so startup covers importing the
+libraries, loading the model and training the intent head. Export the ONNX
+graphs first with ``python export_intent_onnx.py``.
+
+Usage:
+    python -m benchmarks.nlp_runtime
+    python -m benchmarks.nlp_runtime --configs transformer onnx --onnx-dir models/intent_onnx
+"""
+import argparse
+import sys
+import time
+from typing import Dict
+
+from benchmarks.common import peak_rss_mb, percentile, print_table, run_isolated
+from benchmarks.intent_classifier import EVAL_SET
+
+DEFAULT_CONFIGS = ["transformer", "onnx-fp32", "onnx"]
+
+
+def measure(config: str, onnx_dir: str, repeats: int) -> Dict:
+    """Start one runtime and time queries (runs in a child process)"""
+    start = time.perf_counter()
+    from src.intent_classifier import IntentClassifier, create_encoder, load_intent_catalog
+
+    encoder = create_encoder(
+        "onnx" if config.startswith("onnx") else config,
+        onnx_dir=onnx_dir,
+        onnx_quantized=config != "onnx-fp32"
+    )
+    catalog = load_intent_catalog()
+    classifier = IntentClassifier(encoder).fit({intent: entry["examples"] for intent, entry in catalog.items()})
+    startup = time.perf_counter() - start
+
+    texts = [text for text, _ in EVAL_SET]
+    predictions = classifier.predict(texts)
+    accuracy = sum(p["intent"] == label for p, (_, label) in zip(predictions, EVAL_SET)) / len(EVAL_SET)
+
+    timings = []
+    for _ in range(repeats):
+        for text in texts:
+            start = time.perf_counter()
+            classifier.predict([text])
+            timings.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "config": config,
+        "startup_s": round(startup, 2),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "p50_ms": round(percentile(timings, 0.5), 2),
+        "p95_ms": round(percentile(timings, 0.95), 2),
+        "accuracy": round(accuracy, 3),
+        "torch_loaded": "torch" in sys.modules,
+    }
+
+
+def main():
+    """Run the comparison and print a table"""
+    from config import settings
+
+    parser = argparse.ArgumentParser(description="Compare PyTorch and ONNX Runtime intent encoders")
+    parser.add_argument(
+        "--configs",
+        nargs="+",
+        default=DEFAULT_CONFIGS,
+        help="transformer, onnx (int8), onnx-fp32 or hashing (default: %(default)s)"
+    )
+    parser.add_argument("--onnx-dir", default=str(settings.intent_onnx_dir), help="Output of export_intent_onnx.py")
+    parser.add_argument("--repeats", type=int, default=5, help="Passes over the evaluation set")
+    args = parser.parse_args()
+
+    rows = []
+    for config in args.configs:
+        print(f"Benchmarking {config}...")
+        result = run_isolated(measure, config, args.onnx_dir, args.repeats)
+        result.setdefault("config", config)
+        rows.append(result)
+
+    print()
+    print_table(rows, ["config", "startup_s", "peak_rss_mb", "p50_ms", "p95_ms", "accuracy", "torch_loaded", "error"])
+
+
+if __name__ == "__main__":
+    main()
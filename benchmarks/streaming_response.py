@@ -0,0 +1,99 @@
+"""
+Time-to-first-audio of the streaming response path, against local LLM/TTS stand-ins
+
+FakeLLM replays a canned answer word by word with a first-token delay and a
+per-token delay; FakeTTS sleeps for a fixed overhead plus a per-character cost.
+"full" waits for the whole answer and synthesizes it in one call (the
+generate_response + synthesize path); "streaming" runs the same stand-ins
+through SpeechStreamer. Runs offline, without Gemini or Polly credentials.
+
+Usage:
+    python -m benchmarks.streaming_response
+    python -m benchmarks.streaming_response --first-token-ms 600 --token-ms 30 --tts-char-ms 5
+"""
+import argparse
+import time
+from typing import Dict, Iterator
+
+from benchmarks.common import print_table
+from src.speech_streamer import SpeechStreamer
+
+ANSWER = (
+    "Sure, I can help with that. Your checking account balance is $2,431.18 as of this morning. "
+    "The last transaction was a card payment of $42.50 at the grocery store yesterday. "
+    "If you'd like, I can also read out your recent deposits or help you set up a transfer. "
+    "Is there anything else I can do for you today?"
+)
+
+
+class FakeLLM:
+    """Streams a canned answer like generate_content_stream"""
+
+    def __init__(self, first_token_ms: float, token_ms: float):
+        self.first_token_ms = first_token_ms
+        self.token_ms = token_ms
+
+    def stream(self, text: str = ANSWER) -> Iterator[str]:
+        time.sleep(self.first_token_ms / 1000)
+        for i, word in enumerate(text.split(" ")):
+            if i:
+                time.sleep(self.token_ms / 1000)
+            yield word if i == 0 else " " + word
+
+
+class FakeTTS:
+    """Synthesis with fixed request overhead plus time proportional to text length"""
+
+    def __init__(self, overhead_ms: float, char_ms: float):
+        self.overhead_ms = overhead_ms
+        self.char_ms = char_ms
+
+    def synthesize(self, text: str, index: int = 0) -> bytes:
+        time.sleep((self.overhead_ms + self.char_ms * len(text)) / 1000)
+        return f"<audio {index}: {len(text)} chars>".encode("utf-8")
+
+
+def run_full(llm: FakeLLM, tts: FakeTTS) -> Dict:
+    start = time.perf_counter()
+    text = "".join(llm.stream()).strip()
+    tts.synthesize(text)
+    elapsed = (time.perf_counter() - start) * 1000
+    return {"path": "full", "segments": 1, "first_audio_ms": round(elapsed), "total_ms": round(elapsed)}
+
+
+def run_streaming(llm: FakeLLM, tts: FakeTTS, max_parallel: int) -> Dict:
+    start = time.perf_counter()
+    first_audio_ms, indexes = None, []
+    for segment in SpeechStreamer(tts.synthesize, max_parallel=max_parallel).stream(llm.stream()):
+        if first_audio_ms is None:
+            first_audio_ms = (time.perf_counter() - start) * 1000
+        indexes.append(segment["index"])
+    total_ms = (time.perf_counter() - start) * 1000
+    if indexes != sorted(indexes):
+        raise AssertionError(f"Segments out of order: {indexes}")
+    return {
+        "path": f"streaming (x{max_parallel})",
+        "segments": len(indexes),
+        "first_audio_ms": round(first_audio_ms or total_ms),
+        "total_ms": round(total_ms),
+    }
+
+
+def main():
+    """Run both paths and print a table"""
+    parser = argparse.ArgumentParser(description="Compare time-to-first-audio of full and streaming responses")
+    parser.add_argument("--first-token-ms", type=float, default=400)
+    parser.add_argument("--token-ms", type=float, default=25)
+    parser.add_argument("--tts-overhead-ms", type=float, default=120)
+    parser.add_argument("--tts-char-ms", type=float, default=3)
+    args = parser.parse_args()
+
+    llm = FakeLLM(args.first_token_ms, args.token_ms)
+    tts = FakeTTS(args.tts_overhead_ms, args.tts_char_ms)
+
+    rows = [run_full(llm, tts), run_streaming(llm, tts, 1), run_streaming(llm, tts, 2)]
+    print_table(rows, ["path", "segments", "first_audio_ms", "total_ms"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Compare STT backend configurations by real-time factor and memory
+
+Each configuration is loaded in a fresh process and transcribes the same audio
+file several times. Real-time factor (RTF) is processing time divided by audio
+duration, so anything below 1.0 is faster than real time.
+
+Usage:
+    python -m benchmarks.stt_backends --audio sample.wav
+    python -m benchmarks.stt_backends --audio sample.wav --configs whisper:small:float32 faster-whisper:small:int8
+"""
+import argparse
+import time
+from typing import Dict
+
+from benchmarks.common import peak_rss_mb, print_table, run_isolated
+
+DEFAULT_CONFIGS = [
+    "whisper:small:float32",
+    "whisper:small:int8",
+    "faster-whisper:small:int8",
+]
+
+
+def measure(config: str, audio_path: str, repeats: int) -> Dict:
+    """Load one backend configuration and time transcriptions (runs in a child process)"""
+    from src.audio_decoder import SAMPLE_RATE, audio_decoder
+    from src.stt_backends import create_backend
+
+    backend_name, model_name, compute_type = config.split(":")
+    with open(audio_path, "rb") as f:
+        audio = audio_decoder.decode(f.read())
+    duration = len(audio) / SAMPLE_RATE
+
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    backend = create_backend(backend_name, model_name=model_name, device="cpu", compute_type=compute_type)
+    load_seconds = time.perf_counter() - start
+
+    # First call pays one-off allocation/JIT costs; report it separately
+    start = time.perf_counter()
+    text = backend.transcribe(audio)["text"].strip()
+    first_seconds = time.perf_counter() - start
+
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        backend.transcribe(audio)
+        timings.append(time.perf_counter() - start)
+    steady = sum(timings) / len(timings) if timings else first_seconds
+
+    return {
+        "config": config,
+        "load_s": round(load_seconds, 2),
+        "first_rtf": round(first_seconds / duration, 3),
+        "rtf": round(steady / duration, 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "model_rss_mb": round(peak_rss_mb() - rss_before, 1),
+        "text": text[:60],
+    }
+
+
+def main():
+    """Run the comparison and print a table"""
+    parser = argparse.ArgumentParser(description="Compare STT backends by real-time factor and memory")
+    parser.add_argument("--audio", required=True, help="Audio file to transcribe (any format ffmpeg reads)")
+    parser.add_argument(
+        "--configs",
+        nargs="+",
+        default=DEFAULT_CONFIGS,
+        help="backend:model:compute_type entries (default: %(default)s)"
+    )
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs after the warm-up run")
+    args = parser.parse_args()
+
+    rows = []
+    for config in args.configs:
+        print(f"Benchmarking {config}...")
+        result = run_isolated(measure, config, args.audio, args.repeats)
+        result.setdefault("config", config)
+        rows.append(result)
+
+    print()
+    print_table(rows, ["config", "load_s", "first_rtf", "rtf", "peak_rss_mb", "model_rss_mb", "text", "error"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Compare TTS backends by time to first byte and real-time factor
+
+Each configuration streams the same sentences as 16 kHz PCM. Time to first byte
+(TTFB) is how long playback has to wait; real-time factor (RTF) is synthesis time
+divided by the duration of the audio produced, so anything below 1.0 is faster
+than real time.
+
+Runs fully offline by default: "espeak" is the real local engine (needs espeak-ng
+and ffmpeg), "polly-sim" stands in for Polly with a network round trip and a
+synthesis speed (--rtt-ms, --speed), and the "router" rows put both behind
+BackendRouter with the simulated Polly failing a fraction of requests
+(--error-rate). --polly adds the real Polly backend (needs AWS credentials).
+
+Usage:
+    python -m benchmarks.tts_backends
+    python -m benchmarks.tts_backends --rtt-ms 180 --error-rate 0.2 --polly
+"""
+import argparse
+import random
+import time
+from typing import Callable, Dict, Iterator, List
+
+from benchmarks.common import percentile, print_table
+from config import settings
+from src.text_to_speech import TextToSpeech
+from src.tts_backends import PollyBackend, TTSBackend, create_backend
+
+SENTENCES = [
+    "Your current balance is two thousand four hundred and thirty one dollars.",
+    "I can help you with that.",
+    "Your last payment of forty two dollars was received yesterday and has been applied to your account.",
+    "Is there anything else I can help you with today?",
+    "To reset your PIN, open the mobile app, go to card settings and choose change PIN.",
+]
+
+SAMPLE_RATE = 16000
+# Spoken English runs at roughly 15 characters per second
+CHARS_PER_SECOND = 15
+
+
+class FakeServerError(Exception):
+    """Stands in for a 503 from Polly"""
+
+
+class FakeAudioStream:
+    """Stands in for botocore's StreamingBody: silent PCM produced at a fixed speed"""
+
+    def __init__(self, audio_bytes: int, speed: float):
+        self.remaining = audio_bytes
+        self.speed = speed
+
+    def iter_chunks(self, chunk_size: int = 4096) -> Iterator[bytes]:
+        while self.remaining > 0:
+            size = min(chunk_size, self.remaining)
+            time.sleep(size / 2 / SAMPLE_RATE / self.speed)
+            self.remaining -= size
+            yield bytes(size)
+
+    def read(self) -> bytes:
+        return b"".join(self.iter_chunks())
+
+    def close(self):
+        pass
+
+
+class FakePolly:
+    """Stands in for the boto3 Polly client"""
+
+    def __init__(self, rtt_ms: float, speed: float, error_rate: float, seed: int = 0):
+        self.rtt_ms = rtt_ms
+        self.speed = speed
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+
+    def synthesize_speech(self, Text: str, **options):
+        time.sleep(self.rtt_ms / 1000)
+        if self.rng.random() < self.error_rate:
+            raise FakeServerError("503 Service Unavailable")
+        seconds = len(Text) / CHARS_PER_SECOND
+        return {"AudioStream": FakeAudioStream(int(seconds * SAMPLE_RATE) * 2, self.speed)}
+
+
+def measure(name: str, stream: Callable[[str], Iterator[bytes]], texts: List[str]) -> Dict:
+    """Stream every text through one configuration and summarize"""
+    ttfbs, busy_seconds, audio_seconds, failures = [], 0.0, 0.0, 0
+    for text in texts:
+        start = time.perf_counter()
+        received = 0
+        try:
+            for piece in stream(text):
+                if not received:
+                    ttfbs.append((time.perf_counter() - start) * 1000)
+                received += len(piece)
+        except Exception:
+            failures += 1
+            continue
+        if not received:
+            failures += 1
+            continue
+        busy_seconds += time.perf_counter() - start
+        audio_seconds += received / 2 / SAMPLE_RATE
+
+    return {
+        "config": name,
+        "ok": len(texts) - failures,
+        "ttfb_p50_ms": round(percentile(ttfbs, 0.50)) if ttfbs else "-",
+        "ttfb_p95_ms": round(percentile(ttfbs, 0.95)) if ttfbs else "-",
+        "rtf": round(busy_seconds / audio_seconds, 3) if audio_seconds else "-",
+    }
+
+
+def backend_stream(backend: TTSBackend) -> Callable[[str], Iterator[bytes]]:
+    return lambda text: backend.stream(text, "pcm", SAMPLE_RATE)
+
+
+def router_stream(backends: List[TTSBackend], selection: str) -> Callable[[str], Iterator[bytes]]:
+    settings.tts_backend_selection = selection
+    tts = TextToSpeech(backends=backends)
+    return lambda text: tts.synthesize_stream(text, "pcm", SAMPLE_RATE)
+
+
+def main():
+    """Run each configuration and print a table"""
+    parser = argparse.ArgumentParser(description="Compare TTS backends by time to first byte and real-time factor")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--rtt-ms", type=float, default=150, help="Simulated round trip to Polly")
+    parser.add_argument("--speed", type=float, default=20, help="Simulated Polly synthesis speed (x real time)")
+    parser.add_argument("--error-rate", type=float, default=0.1, help="Fraction of simulated Polly requests that fail")
+    parser.add_argument("--polly", action="store_true", help="Also measure the real Polly backend")
+    args = parser.parse_args()
+
+    # Measure synthesis, not cache hits, and keep failed backends in rotation
+    settings.tts_cache_enabled = False
+    settings.tts_chunking_enabled = False
+    settings.tts_backend_cooldown_seconds = 0
+    texts = [SENTENCES[i % len(SENTENCES)] for i in range(args.requests)]
+
+    def polly_sim(error_rate: float) -> PollyBackend:
+        return PollyBackend(client=FakePolly(args.rtt_ms, args.speed, error_rate))
+
+    rows = [measure("polly-sim", backend_stream(polly_sim(0.0)), texts)]
+    try:
+        espeak = create_backend("espeak")
+    except RuntimeError as e:
+        print(f"Skipping espeak: {str(e)}")
+        espeak = None
+    if espeak:
+        rows.append(measure("espeak", backend_stream(espeak), texts))
+        for selection in ("priority", "latency"):
+            stream = router_stream([polly_sim(args.error_rate), espeak], selection)
+            rows.append(measure(f"router:{selection}", stream, texts))
+    if args.polly:
+        rows.append(measure("polly", backend_stream(create_backend("polly")), texts))
+
+    print_table(rows, ["config", "ok", "ttfb_p50_ms", "ttfb_p95_ms", "rtf"])
+
+
+if __name__ == "__main__":
+    main()
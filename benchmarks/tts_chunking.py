@@ -0,0 +1,111 @@
+"""
+Whole-text versus sentence-chunked parallel synthesis, against a local Polly stand-in
+
+FakePolly implements synthesize_speech with a fixed request overhead plus time
+proportional to the number of characters, and rejects texts over Polly's request
+limit. "single" sends each response in one request (chunking off); "chunked xN"
+splits it on sentence boundaries and synthesizes N chunks at a time. total_ms is
+the time until the whole MP3 is ready, first_audio_ms the time until the first
+chunk can be played (synthesize_chunks). Runs offline, without AWS credentials.
+
+Usage:
+    python -m benchmarks.tts_chunking
+    python -m benchmarks.tts_chunking --sentences 40 --char-ms 0.5 --chunk-chars 300
+"""
+import argparse
+import io
+import time
+from typing import Dict
+
+from benchmarks.common import print_table
+from config import settings
+from src.text_to_speech import TextToSpeech
+from src.tts_backends import PollyBackend
+
+SENTENCES = [
+    "Your checking account ending in 4821 has an available balance of $2,431.18.",
+    "The most recent transaction was a card payment of $42.50 at the grocery store yesterday.",
+    "A direct deposit of $1,850.00 from your employer is scheduled for Friday.",
+    "You can set up a recurring transfer to savings from the mobile app or at any branch.",
+    "Overdraft protection is currently enabled and linked to your savings account.",
+    "If you notice a charge you don't recognise, you can dispute it within sixty days.",
+]
+
+# Polly rejects requests with more than 3000 billed characters
+MAX_REQUEST_CHARS = 3000
+
+
+class FakePolly:
+    """Stands in for the boto3 Polly client"""
+
+    def __init__(self, overhead_ms: float, char_ms: float):
+        self.overhead_ms = overhead_ms
+        self.char_ms = char_ms
+        self.calls = 0
+
+    def synthesize_speech(
+        self,
+        Text: str,
+        OutputFormat: str,
+        VoiceId: str,
+        Engine: str,
+        TextType: str = "text",
+        SampleRate: str = None
+    ):
+        self.calls += 1
+        if len(Text) > MAX_REQUEST_CHARS:
+            raise ValueError(f"TextLengthExceededException: {len(Text)} characters")
+        time.sleep((self.overhead_ms + self.char_ms * len(Text)) / 1000)
+        return {"AudioStream": io.BytesIO(b"\xff\xfb" + Text.encode("utf-8"))}
+
+
+def measure(name: str, text: str, polly: FakePolly, chunking: bool, chunk_chars: int, parallel: int) -> Dict:
+    """Synthesize text with one configuration"""
+    settings.tts_chunking_enabled = chunking
+    settings.tts_chunk_max_chars = chunk_chars
+    settings.tts_max_parallel = parallel
+    tts = TextToSpeech(backends=[PollyBackend(client=polly)])
+    tts.cache = None
+
+    polly.calls = 0
+    start = time.perf_counter()
+    audio = tts.synthesize(text)
+    total_ms = (time.perf_counter() - start) * 1000
+    calls = polly.calls
+
+    start = time.perf_counter()
+    first_audio_ms = None
+    for _ in tts.synthesize_chunks(text):
+        if first_audio_ms is None:
+            first_audio_ms = (time.perf_counter() - start) * 1000
+
+    return {
+        "mode": name,
+        "requests": calls,
+        "ok": audio is not None,
+        "first_audio_ms": round(first_audio_ms) if first_audio_ms is not None else "-",
+        "total_ms": round(total_ms) if audio is not None else "-",
+    }
+
+
+def main():
+    """Run each configuration and print a table"""
+    parser = argparse.ArgumentParser(description="Compare whole-text and chunked parallel synthesis")
+    parser.add_argument("--sentences", type=int, default=24, help="Response length in sentences")
+    parser.add_argument("--overhead-ms", type=float, default=120)
+    parser.add_argument("--char-ms", type=float, default=0.8)
+    parser.add_argument("--chunk-chars", type=int, default=400)
+    args = parser.parse_args()
+
+    text = " ".join(SENTENCES[i % len(SENTENCES)] for i in range(args.sentences))
+    print(f"Response: {len(text)} characters, {args.sentences} sentences\n")
+
+    polly = FakePolly(args.overhead_ms, args.char_ms)
+    rows = [measure("single", text, polly, False, args.chunk_chars, 1)]
+    for parallel in (1, 2, 4, 8):
+        rows.append(measure(f"chunked x{parallel}", text, polly, True, args.chunk_chars, parallel))
+    print_table(rows, ["mode", "requests", "ok", "first_audio_ms", "total_ms"])
+
+
+if __name__ == "__main__":
+    main()
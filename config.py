@@ -4,7 +4,7 @@ Configuration management for Intelligent Voice Bot
 import os
 from pathlib import Path
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, Optional
 
 
 class Settings(BaseSettings):
@@ -33,10 +33,98 @@ class Settings(BaseSettings):
     audio_sample_rate: int = 16000
     audio_channels: int = 1
     audio_format: str = "pcm"
+    ffmpeg_max_processes: int = 4  # concurrent in-memory ffmpeg decodes
+    max_upload_mb: int = 25
+    
+    # Speech-to-Text Configuration
+    stt_backend: str = "whisper"  # whisper (PyTorch) or faster-whisper (CTranslate2)
+    stt_model: str = "small"
+    stt_compute_type: Optional[str] = None  # float32, float16 or int8; backend default if unset
+    stt_device: Optional[str] = None  # cpu or cuda; auto-detected if unset
+    stt_batching_enabled: bool = True  # batch concurrent clips into one Whisper pass
+    stt_batch_max_size: int = 8
+    stt_batch_max_wait_ms: int = 10
+    stt_cache_enabled: bool = True  # reuse transcriptions of byte-identical decoded audio
+    stt_cache_max_entries: int = 1024
+    stt_cache_dir: Optional[Path] = None  # on-disk tier, disabled if unset
+    stt_cache_ttl_seconds: int = 86400
+    vad_enabled: bool = True  # trim silence and skip clips without speech before Whisper
+    vad_max_segment_seconds: float = 30.0  # long recordings are split on pauses into segments this long
+    
+    # Intent Detection
+    intent_encoder: str = "transformer"  # transformer (PyTorch), onnx (ONNX Runtime, no torch) or hashing (numpy only)
+    intent_model: str = "sentence-transformers/all-MiniLM-L6-v2"
+    intent_onnx_dir: Optional[Path] = None  # written by export_intent_onnx.py; <base_dir>/models/intent_onnx if unset
+    intent_onnx_quantized: bool = True  # load the int8 graph
+    intent_min_confidence: float = 0.5  # below this, fall back to keywords or "general"
+    
+    # LLM Client
+    llm_deadline_ms: int = 10000  # total budget per Gemini request; the fallback response is used after it
+    llm_attempt_timeout_ms: int = 6000
+    llm_max_retries: int = 2  # retries of timed-out, rate-limited or 5xx attempts, with jittered backoff
+    llm_retry_backoff_ms: int = 200
+    llm_hedge_enabled: bool = True  # fire a second request when the first is slower than usual
+    llm_hedge_delay_ms: Optional[int] = None  # fixed hedge delay; observed p95 of successful attempts if unset
+    
+    # Prompt Assembly
+    prompt_context_token_budget: int = 600  # account/FAQ context per prompt; most relevant FAQs are kept first
+    prompt_conversation_token_budget: int = 400  # conversation summary plus recent turns per prompt
+    
+    # Conversations
+    conversation_enabled: bool = True  # keep multi-turn context per user (JWT identity or client session ID)
+    conversation_max_sessions: int = 1000
+    conversation_ttl_seconds: int = 1800  # idle sessions are forgotten after this
+    conversation_window_turns: int = 4  # recent turns kept verbatim; older ones are summarized
+    conversation_summary_max_tokens: int = 200
+    conversation_llm_summary: bool = False  # summarize with Gemini instead of extracting the first sentences
+    
+    # Response Routing
+    # Minimum intent confidence for answering from src/data/response_templates.json instead of the LLM
+    router_template_thresholds: Dict[str, float] = {"greeting": 0.8, "farewell": 0.8}
+    router_template_max_words: int = 8  # longer queries always go to the LLM
+    
+    # Response Cache
+    response_cache_enabled: bool = True  # reuse LLM answers to repeated queries (never for account-specific context)
+    response_cache_max_entries: int = 512
+    response_cache_ttl_seconds: int = 3600
+    response_cache_similarity: float = 0.92  # cosine similarity for near-duplicate hits; 0 disables that tier
+    
+    # Text-to-Speech
+    tts_chunking_enabled: bool = True  # split long texts into sentence chunks synthesized in parallel
+    tts_chunk_max_chars: int = 400  # Polly rejects requests over 3000 characters
+    tts_max_parallel: int = 4  # concurrent Polly requests per process
+    tts_stream_chunk_bytes: int = 4096  # AudioStream read size when relaying speech as it is produced
+    tts_stream_max_chars: int = 3000  # longest text accepted by /api/speech
+    
+    # Text-to-Speech Backends
+    tts_backends: str = "polly,espeak"  # comma-separated, in order of preference; unavailable ones are skipped
+    tts_backend_selection: str = "priority"  # priority (configured order) or latency (fastest time to first byte)
+    tts_backend_cooldown_seconds: int = 30  # a failed backend is only used as a last resort for this long
+    espeak_voice: str = "en-us"
+    espeak_words_per_minute: int = 175
+    
+    # Text-to-Speech Cache
+    tts_cache_enabled: bool = True  # reuse audio for repeated texts with the same voice settings
+    tts_cache_dir: Optional[Path] = Path(__file__).parent / "tts_cache"  # on-disk tier; memory only if unset
+    tts_cache_max_disk_mb: int = 512  # least recently used files are evicted beyond this (whole directory, all workers)
+    tts_cache_max_memory_mb: int = 32
     
     # Analytics Configuration
     analytics_enabled: bool = True
+    analytics_flush_seconds: float = 5.0  # buffered counters are merged into the file this often; 0 writes every event
     
+    # Model Serving
+    # Build the shared VoiceBot at import time. Combine with gunicorn --preload so
+    # model weights are loaded once in the master and shared copy-on-write by workers.
+    preload_models: bool = False
+    # Dummy inferences, pooled connections and canned-response audio before reporting ready
+    warmup_enabled: bool = True
+
+    # Job Queue
+    pipeline_workers: int = 2  # threads per process running the STT→NLP→LLM→TTS pipeline
+    job_queue_max_depth: int = 16  # queued jobs beyond this are rejected with 429
+    job_result_ttl_seconds: int = 600
+
     # Security
     jwt_secret_key: str = "super-secret-key-change-this"
 
@@ -55,6 +143,10 @@ class Settings(BaseSettings):
 # Create necessary directories
 settings = Settings()
 
+# Paths derived from base_dir follow it when BASE_DIR is overridden
+if settings.intent_onnx_dir is None:
+    settings.intent_onnx_dir = settings.base_dir / "models" / "intent_onnx"
+
 # Create directories if they don't exist
 settings.audio_dir.mkdir(exist_ok=True)
 settings.logs_dir.mkdir(exist_ok=True)
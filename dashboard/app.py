@@ -1,11 +1,15 @@
 """
 Analytics Dashboard and API using Flask
 """
-from flask import Flask, render_template, jsonify, request, send_from_directory, url_for
+from flask import Flask, Response, render_template, jsonify, request, send_from_directory, stream_with_context, url_for
 from flask_cors import CORS
-from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
+from flask_sock import Sock
+from flask_jwt_extended import (
+    JWTManager, create_access_token, decode_token, get_jwt_identity, jwt_required, verify_jwt_in_request
+)
 from werkzeug.security import generate_password_hash, check_password_hash
 from pathlib import Path
+import json
 import sys
 import logging
 
@@ -13,8 +17,12 @@ import logging
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.analytics import Analytics
-from src.voice_bot import VoiceBot
+from src.audio_decoder import Resampler
+from src.bot_provider import bot_provider
 from src.database import DatabaseManager
+from src.job_queue import JobQueue, QueueFullError
+from src.speech_to_text import pcm16_to_float32
+from src.vad import EndpointDetector
 from config import settings
 
 app = Flask(__name__)
@@ -23,10 +31,18 @@ CORS(app, resources={r"/api/*": {"origins": "*"}})
 
 # Configure JWT
 app.config["JWT_SECRET_KEY"] = settings.jwt_secret_key
+# Uploads are held in memory until decoded, so cap their size
+app.config["MAX_CONTENT_LENGTH"] = settings.max_upload_mb * 1024 * 1024
 jwt = JWTManager(app)
 
+# WebSocket support for live audio streaming
+sock = Sock(app)
+
 logger = logging.getLogger(__name__)
 
+if settings.preload_models:
+    bot_provider.preload()
+
 @app.route("/")
 def index():
     """Render dashboard homepage (Legacy)"""
@@ -98,10 +114,58 @@ def get_metrics():
     """Get detailed metrics"""
     analytics = Analytics()
     metrics = analytics.get_metrics()
+    # Live inference stats for this worker process (only if its models are already loaded)
+    if bot_provider.is_ready():
+        bot = bot_provider.get_bot()
+        if bot.speech_to_text:
+            metrics["speech_to_text"] = bot.speech_to_text.get_stats()
+        if bot.text_to_speech:
+            metrics["tts_backends"] = bot.text_to_speech.router.get_stats()
+        if bot.text_to_speech and bot.text_to_speech.cache:
+            metrics["tts_cache"] = bot.text_to_speech.cache.get_stats()
+        metrics["response_routing"] = bot.response_router.get_stats()
+        if bot.sessions:
+            metrics["conversations"] = bot.sessions.get_stats()
+        if bot.response_generator:
+            metrics["llm"] = bot.response_generator.llm_client.get_stats()
+            metrics["prompt"] = bot.response_generator.prompt_builder.get_stats()
+        if bot.response_generator and bot.response_generator.response_cache:
+            metrics["response_cache"] = bot.response_generator.response_cache.get_stats()
     return jsonify(metrics)
 
 # --- Voice Bot Routes ---
 
+def _session_id(client_session_id=None, token=None):
+    """
+    Conversation session key for the current caller: the JWT identity when a valid
+    token is sent (Authorization header, or token for WebSockets, which can't set
+    headers), otherwise the client-generated session ID, otherwise None (stateless).
+    """
+    identity = None
+    try:
+        if token:
+            identity = decode_token(token)["sub"]
+        else:
+            verify_jwt_in_request(optional=True)
+            identity = get_jwt_identity()
+    except Exception as e:
+        logger.warning(f"Ignoring invalid token for conversation session: {e}")
+    if identity:
+        return f"user:{identity}"
+    return f"client:{client_session_id}" if client_session_id else None
+
+
+@app.route('/api/session', methods=['DELETE'])
+def reset_session():
+    """Forget the caller's conversation history."""
+    session_id = _session_id(request.args.get('session_id'))
+    if session_id and bot_provider.is_ready():
+        bot = bot_provider.get_bot()
+        if bot.sessions:
+            bot.sessions.clear(session_id)
+    return jsonify({"status": "ok"}), 200
+
+
 @app.route('/api/submit_audio', methods=['POST'])
 # @jwt_required() # Optional: protect voice bot too? Maybe keep open for demo or protect. Let's keep open for now or protect if user wants auth. User said "separating home page and dashboard with auth pages". Home page is voice bot. So maybe Home is public? Or Auth required?
 # "separating home page and dashboard with auth pages" implies Auth is for Dashboard.
@@ -111,7 +175,7 @@ def get_metrics():
 # Let's protect it to be safe, as it uses resources.
 # @jwt_required()
 def submit_audio():
-    """Accept an uploaded audio file, process it through the VoiceBot, and return response info."""
+    """Accept an uploaded audio file and queue it for the VoiceBot pipeline. Returns a job ID at once."""
     try:
         if 'file' not in request.files:
             return jsonify({"error": "No file provided"}), 400
@@ -120,45 +184,236 @@ def submit_audio():
         if audio_file.filename == '':
             return jsonify({"error": "Empty filename"}), 400
 
-        # Save uploaded file to a temporary location
-        tmp_dir = Path(settings.base_dir) / 'tmp_uploads'
-        tmp_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Use a timestamp-based filename with proper extension
-        import time
-        timestamp = int(time.time() * 1000)
-        # Browser MediaRecorder usually produces webm
-        tmp_path = tmp_dir / f"recording_{timestamp}.webm"
-        audio_file.save(str(tmp_path))
-        
-        logger.info(f"Saved uploaded audio to: {tmp_path}, size: {tmp_path.stat().st_size} bytes")
+        # Keep the upload in memory; it is decoded straight from these bytes
+        audio_bytes = audio_file.read()
+        logger.info(f"Received uploaded audio: {audio_file.filename}, size: {len(audio_bytes)} bytes")
+
+        try:
+            job = job_queue.submit({
+                "audio_bytes": audio_bytes,
+                "session_id": _session_id(request.form.get('session_id')),
+            })
+        except QueueFullError as e:
+            logger.warning(f"Job queue full, rejecting upload (retry after {e.retry_after}s)")
+            return (
+                jsonify({"error": "Server busy, please retry shortly", "retry_after": e.retry_after}),
+                429,
+                {"Retry-After": str(e.retry_after)},
+            )
+
+        return jsonify({
+            "job_id": job.id,
+            "status": job.status,
+            "status_url": url_for('get_job', job_id=job.id, _external=True),
+            "events_url": url_for('job_events', job_id=job.id, _external=True),
+        }), 202
+    except Exception as e:
+        logger.error(f"Error processing audio: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+def _run_audio_job(job):
+    """Job handler: run an uploaded clip through the shared VoiceBot."""
+    bot = bot_provider.get_bot()
+    output_path, error_msg = bot.process_audio_bytes(
+        job.payload["audio_bytes"],
+        progress_callback=job.set_stage,
+        session_id=job.payload.get("session_id")
+    )
+    if not output_path:
+        raise RuntimeError(error_msg or "Processing failed")
+    return {"audio_file": Path(output_path).name}
+
+
+job_queue = JobQueue(
+    _run_audio_job,
+    num_workers=settings.pipeline_workers,
+    max_depth=settings.job_queue_max_depth,
+    result_ttl=settings.job_result_ttl_seconds,
+    # Gunicorn runs several worker processes; the database lets any of them answer polls
+    store=DatabaseManager()
+)
+
+
+def _job_payload(data):
+    """Resolve a job's response audio to a URL for the API."""
+    result = data.get("result")
+    if result and result.get("audio_file"):
+        # We need to return a full URL since the frontend is on a different port
+        data["audio_url"] = url_for('serve_audio_file', filename=result["audio_file"], _external=True)
+    return data
+
+
+@app.route('/api/jobs/<job_id>')
+def get_job(job_id: str):
+    """Poll the status of a queued audio job."""
+    status = job_queue.get_status(job_id)
+    if status is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(_job_payload(status)), 200
+
+
+@app.route('/api/jobs/<job_id>/events')
+def job_events(job_id: str):
+    """Server-Sent Events stream reporting a job's stage progress until it finishes."""
+    if job_queue.get_status(job_id) is None:
+        return jsonify({"error": "Job not found"}), 404
+
+    def generate():
+        for event in job_queue.stream(job_id):
+            if event is None:
+                # Comment line keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+                continue
+            yield f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
 
-        # Process audio using VoiceBot
-        bot = VoiceBot()
-        output_path, error_msg = bot.process_audio_file(str(tmp_path))
+        status = job_queue.get_status(job_id)
+        if status is not None:
+            yield f"event: result\ndata: {json.dumps(_job_payload(status))}\n\n"
 
-        # Keep the file for debugging if it failed
-        if output_path:
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _segment_payload(event):
+    """Resolve a streamed response segment's audio file to a URL for the API."""
+    payload = dict(event)
+    audio_file = payload.pop("audio_file", None)
+    if payload["type"] == "segment":
+        payload["audio_url"] = (
+            url_for('serve_audio_file', filename=audio_file, _external=True) if audio_file else None
+        )
+    return payload
+
+
+@app.route('/api/query_stream', methods=['POST'])
+def query_stream():
+    """
+    Answer a text query as Server-Sent Events: one "segment" event per spoken sentence
+    (text and audio URL, in playback order) as soon as it is synthesized, then "done".
+    """
+    data = request.get_json(silent=True) or {}
+    text = (data.get("text") or "").strip()
+    if not text:
+        return jsonify({"error": "Text is required"}), 400
+
+    bot = bot_provider.get_bot()
+    session_id = _session_id(data.get("session_id"))
+
+    def generate():
+        for event in bot.process_text_query_stream(text, session_id):
+            payload = _segment_payload(event)
+            yield f"event: {payload['type']}\ndata: {json.dumps(payload)}\n\n"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# Client capture rates accepted on the audio stream; the resampling filter grows with
+# the rate, so arbitrary values are refused
+MIN_STREAM_SAMPLE_RATE = 8000
+MAX_STREAM_SAMPLE_RATE = 48000
+
+
+@sock.route('/ws/stream')
+def stream_audio(ws):
+    """
+    Live audio streaming. The client sends binary frames of 16-bit mono PCM as they are
+    captured (optionally preceded by {"type": "start", "sample_rate": N}, which may also
+    carry "token" and/or "session_id" to keep conversation context) and may send
+    {"type": "end"} when the user stops. The server pushes "partial" transcripts while
+    audio arrives, a "final" transcript as soon as end-of-utterance is detected, then one
+    "response_segment" (sentence text and audio URL) per spoken sentence as it is
+    synthesized, and finally the full "response" text.
+    """
+    bot = bot_provider.get_bot()
+    if not bot.speech_to_text:
+        ws.send(json.dumps({"type": "error", "error": "Speech-to-Text not available"}))
+        return
+
+    sample_rate = settings.audio_sample_rate
+    resampler = Resampler(sample_rate)
+    transcriber = bot.speech_to_text.create_stream()
+    endpointer = EndpointDetector()
+    last_text = None
+    session_id = None
+
+    while True:
+        message = ws.receive()
+        if message is None:
+            return
+
+        end_of_utterance = False
+        if isinstance(message, str):
             try:
-                tmp_path.unlink()
-            except Exception:
-                pass
+                control = json.loads(message)
+                if not isinstance(control, dict):
+                    raise ValueError("expected a JSON object")
+                if control.get("type") == "start":
+                    requested_rate = int(control.get("sample_rate", sample_rate))
+                    if not MIN_STREAM_SAMPLE_RATE <= requested_rate <= MAX_STREAM_SAMPLE_RATE:
+                        raise ValueError(
+                            f"sample_rate must be between {MIN_STREAM_SAMPLE_RATE} and {MAX_STREAM_SAMPLE_RATE}"
+                        )
+                    requested_resampler = Resampler(requested_rate)
+            except (TypeError, ValueError, MemoryError) as e:
+                # Malformed control frames are rejected; the stream itself carries on
+                logger.warning(f"Invalid control message on audio stream: {e}")
+                ws.send(json.dumps({"type": "error", "error": f"Invalid control message: {e}"}))
+                continue
+            if control.get("type") == "start":
+                sample_rate = requested_rate
+                resampler = requested_resampler
+                session_id = _session_id(control.get("session_id"), control.get("token"))
+                continue
+            end_of_utterance = control.get("type") == "end"
         else:
-            logger.error(f"Processing failed, keeping file at: {tmp_path}")
+            audio = pcm16_to_float32(message, sample_rate, resampler)
+            end_of_utterance = endpointer.feed(audio)
+            hypothesis = transcriber.insert_audio(audio)
+            if hypothesis and hypothesis["text"] != last_text:
+                last_text = hypothesis["text"]
+                ws.send(json.dumps(hypothesis))
 
-        if not output_path:
-            return jsonify({"error": error_msg or "Processing failed"}), 500
+        if not end_of_utterance:
+            continue
 
-        # Build URL for audio file
-        # We need to return a full URL if frontend is on different port
-        # Or just relative path if proxying.
-        # Since we are using CORS, we should return full URL or relative to API.
-        audio_url = url_for('serve_audio_file', filename=Path(output_path).name, _external=True)
+        final = transcriber.finish()
+        ws.send(json.dumps(final))
+        transcript = final["text"]
+        if transcript:
+            # Each sentence is pushed as soon as its audio is ready, then the full text
+            for event in bot.process_text_query_stream(transcript, session_id):
+                payload = _segment_payload(event)
+                if payload["type"] == "segment":
+                    ws.send(json.dumps(dict(payload, type="response_segment")))
+                elif payload["type"] == "done":
+                    ws.send(json.dumps({"type": "response", "text": payload["text"], "audio_url": None}))
+                else:
+                    ws.send(json.dumps(payload))
+        else:
+            ws.send(json.dumps({"type": "error", "error": "No speech detected"}))
 
-        return jsonify({"audio_url": audio_url}), 200
-    except Exception as e:
-        logger.error(f"Error processing audio: {e}")
-        return jsonify({"error": str(e)}), 500
+        # Keep the socket open for the next utterance
+        transcriber = bot.speech_to_text.create_stream()
+        endpointer.reset()
+        last_text = None
+
+
+@app.route('/api/ready')
+def ready():
+    """Readiness probe: 200 once the shared VoiceBot's models are loaded, 503 otherwise."""
+    # Start warming this worker in the background so the first real request doesn't pay for it
+    bot_provider.ensure_loading()
+    status = bot_provider.get_status()
+    status["jobs"] = job_queue.get_stats()
+    return jsonify(status), 200 if status["ready"] else 503
 
 
 @app.route('/audio/<path:filename>')
@@ -168,6 +423,52 @@ def serve_audio_file(filename: str):
     return send_from_directory(audio_dir, filename)
 
 
+# Polly output formats and how they are served; PCM is raw 16-bit little-endian mono
+SPEECH_MIMETYPES = {
+    "mp3": "audio/mpeg",
+    "ogg_vorbis": "audio/ogg",
+    "pcm": "audio/L16;rate={rate};channels=1",
+}
+
+
+@app.route('/api/speech', methods=['GET', 'POST'])
+def speech():
+    """
+    Synthesize text and stream the audio with chunked transfer encoding while Polly
+    produces it. Accepts text and format (mp3, ogg_vorbis or pcm) as query parameters
+    or a JSON body; ogg_vorbis and pcm are rendered at AUDIO_SAMPLE_RATE.
+    """
+    data = request.get_json(silent=True) or request.args
+    text = (data.get("text") or "").strip()
+    output_format = data.get("format") or "mp3"
+    if not text:
+        return jsonify({"error": "Text is required"}), 400
+    if len(text) > settings.tts_stream_max_chars:
+        return jsonify({"error": f"Text is longer than {settings.tts_stream_max_chars} characters"}), 400
+    if output_format not in SPEECH_MIMETYPES:
+        return jsonify({"error": f"Unsupported format, use one of: {', '.join(SPEECH_MIMETYPES)}"}), 400
+
+    bot = bot_provider.get_bot()
+    if not bot.text_to_speech:
+        return jsonify({"error": "Text-to-speech is not available"}), 503
+    sample_rate = settings.audio_sample_rate if output_format != "mp3" else None
+    audio = bot.text_to_speech.synthesize_stream(text, output_format, sample_rate)
+    # Wait for the first bytes so a failed synthesis is an error status, not an empty 200
+    first = next(audio, None)
+    if first is None:
+        return jsonify({"error": "Speech synthesis failed"}), 502
+
+    def generate():
+        yield first
+        yield from audio
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype=SPEECH_MIMETYPES[output_format].format(rate=sample_rate),
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.route('/api/history')
 @jwt_required()
 def history():
@@ -0,0 +1,112 @@
+"""
+Export the intent encoder to ONNX with an int8 dynamically quantized copy.
+
+Run once per model (needs torch, transformers and onnxruntime); the server then
+loads the result with INTENT_ENCODER=onnx without importing torch:
+
+    python export_intent_onnx.py
+    python export_intent_onnx.py --model sentence-transformers/all-MiniLM-L6-v2 --output models/intent_onnx
+"""
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from config import settings
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def export(model_name: str, output_dir: Path, opset: int = 14):
+    """
+    Write model.onnx, model.int8.onnx and tokenizer.json to output_dir
+
+    Args:
+        model_name: Hugging Face model ID of the sentence encoder
+        output_dir: Destination directory
+        opset: ONNX opset version
+    """
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from transformers import AutoModel, AutoTokenizer
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    fp32_path = output_dir / "model.onnx"
+    int8_path = output_dir / "model.int8.onnx"
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    if not tokenizer.is_fast:
+        raise ValueError(f"{model_name} has no fast tokenizer; the ONNX runtime path needs tokenizer.json")
+    model = AutoModel.from_pretrained(model_name).eval()
+
+    sample = tokenizer(["export sample sentence"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    logger.info(f"Exporting {model_name} to {fp32_path}")
+    with torch.inference_mode():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            str(fp32_path),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset
+        )
+
+    logger.info(f"Quantizing weights to int8 in {int8_path}")
+    quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+
+    # save_pretrained writes tokenizer.json, which the standalone tokenizers library reads
+    tokenizer.save_pretrained(str(output_dir))
+    (output_dir / "source_model.txt").write_text(model_name + "\n", encoding="utf-8")
+
+    for path in (fp32_path, int8_path):
+        logger.info(f"{path.name}: {path.stat().st_size / (1024 * 1024):.1f} MB")
+
+
+def verify(model_name: str, output_dir: Path):
+    """Compare exported embeddings with the PyTorch encoder on the catalog examples"""
+    from src.intent_classifier import OnnxEncoder, TransformerEncoder, load_intent_catalog
+
+    texts = [text for entry in load_intent_catalog().values() for text in entry.get("examples", [])]
+    reference = TransformerEncoder(model_name, device="cpu").encode(texts)
+    for quantized in (False, True):
+        embeddings = OnnxEncoder(output_dir, quantized=quantized).encode(texts)
+        cosine = np.sum(reference * embeddings, axis=1)
+        logger.info(
+            f"{'int8' if quantized else 'fp32'} graph: cosine similarity to PyTorch "
+            f"min {cosine.min():.4f}, mean {cosine.mean():.4f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the intent encoder to ONNX (fp32 and int8)")
+    parser.add_argument("--model", default=settings.intent_model, help="Hugging Face model ID (default: %(default)s)")
+    parser.add_argument("--output", type=Path, default=settings.intent_onnx_dir, help="Output directory (default: %(default)s)")
+    parser.add_argument("--opset", type=int, default=14)
+    parser.add_argument("--skip-verify", action="store_true", help="Don't compare against the PyTorch encoder")
+    args = parser.parse_args()
+
+    try:
+        export(args.model, args.output, args.opset)
+        if not args.skip_verify:
+            verify(args.model, args.output)
+    except Exception as e:
+        logger.error(f"Failed to export intent model: {str(e)}")
+        sys.exit(1)
+
+    logger.info(f"Done. Set INTENT_ENCODER=onnx and INTENT_ONNX_DIR={args.output} to use it.")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,41 +5,46 @@ import { Mic, Square, Send } from 'lucide-react';
 import axios from 'axios';
 import { useAuth } from '../context/AuthContext';
 
+// Follow-up questions keep their context: the server keys conversations by the
+// logged-in user, or by this per-tab ID for anonymous visitors
+const getSessionId = () => {
+  let id = sessionStorage.getItem('sessionId');
+  if (!id) {
+    id = crypto.randomUUID();
+    sessionStorage.setItem('sessionId', id);
+  }
+  return id;
+};
+
 const Home = () => {
   const [state, setState] = useState('idle'); // idle, listening, processing, speaking
   const [audioStream, setAudioStream] = useState(null);
   const [responseAudio, setResponseAudio] = useState(null);
+  const [transcript, setTranscript] = useState('');
   const mediaRecorderRef = useRef(null);
   const chunksRef = useRef([]);
+  const wsRef = useRef(null);
+  const audioContextRef = useRef(null);
   const { user } = useAuth();
   
   // Audio playback
   const audioRef = useRef(new Audio());
+  // Streamed responses arrive as one audio segment per sentence, played back in order
+  const segmentQueueRef = useRef([]);
+  const segmentPlayingRef = useRef(false);
+  const responseDoneRef = useRef(false);
 
   const startListening = async () => {
     try {
       const stream = await navigator.mediaDevices.getUserMedia({ audio: true });
       setAudioStream(stream);
-      
-      mediaRecorderRef.current = new MediaRecorder(stream);
-      chunksRef.current = [];
-      
-      mediaRecorderRef.current.ondataavailable = (e) => {
-        if (e.data.size > 0) {
-          chunksRef.current.push(e.data);
-        }
-      };
-      
-      mediaRecorderRef.current.onstop = async () => {
-        const audioBlob = new Blob(chunksRef.current, { type: 'audio/wav' }); // or webm
-        await processAudio(audioBlob);
-        
-        // Stop all tracks
-        stream.getTracks().forEach(track => track.stop());
-        setAudioStream(null);
-      };
-      
-      mediaRecorderRef.current.start();
+      setTranscript('');
+
+      if (typeof WebSocket !== 'undefined' && window.AudioContext) {
+        startStreaming(stream);
+      } else {
+        startRecording(stream);
+      }
       setState('listening');
     } catch (err) {
       console.error("Error accessing microphone:", err);
@@ -47,8 +52,123 @@ const Home = () => {
     }
   };
 
+  // Live path: send 16-bit PCM frames over a WebSocket while the user speaks.
+  // The server pushes partial transcripts and replies as soon as it detects end of speech.
+  const startStreaming = (stream) => {
+    const ws = new WebSocket('ws://localhost:5000/ws/stream');
+    ws.binaryType = 'arraybuffer';
+    wsRef.current = ws;
+
+    const audioContext = new AudioContext();
+    const source = audioContext.createMediaStreamSource(stream);
+    const processor = audioContext.createScriptProcessor(4096, 1, 1);
+    audioContextRef.current = audioContext;
+
+    processor.onaudioprocess = (e) => {
+      if (ws.readyState !== WebSocket.OPEN) return;
+      const samples = e.inputBuffer.getChannelData(0);
+      const pcm = new Int16Array(samples.length);
+      for (let i = 0; i < samples.length; i++) {
+        const s = Math.max(-1, Math.min(1, samples[i]));
+        pcm[i] = s < 0 ? s * 0x8000 : s * 0x7fff;
+      }
+      ws.send(pcm.buffer);
+    };
+
+    let opened = false;
+    ws.onopen = () => {
+      opened = true;
+      segmentQueueRef.current = [];
+      responseDoneRef.current = false;
+      ws.send(JSON.stringify({
+        type: 'start',
+        sample_rate: audioContext.sampleRate,
+        token: localStorage.getItem('token') || undefined,
+        session_id: getSessionId()
+      }));
+      source.connect(processor);
+      processor.connect(audioContext.destination);
+    };
+
+    ws.onmessage = (e) => {
+      const message = JSON.parse(e.data);
+      if (message.type === 'partial') {
+        setTranscript(message.text);
+      } else if (message.type === 'final') {
+        setTranscript(message.text);
+        stopCapture(stream);
+        setState('processing');
+      } else if (message.type === 'response_segment') {
+        if (message.audio_url) {
+          enqueueSegment(message.audio_url);
+        }
+      } else if (message.type === 'response') {
+        ws.close();
+        responseDoneRef.current = true;
+        if (message.audio_url) {
+          playResponse(message.audio_url);
+        } else if (!segmentPlayingRef.current) {
+          setState('idle');
+        }
+      } else if (message.type === 'error') {
+        ws.close();
+        stopCapture(stream);
+        alert(`Error processing audio: ${message.error}`);
+        setState('idle');
+      }
+    };
+
+    ws.onerror = () => {
+      if (opened) return;
+      // Streaming unavailable: fall back to recording the clip and uploading it
+      stopCapture(stream, false);
+      startRecording(stream);
+    };
+  };
+
+  const stopCapture = (stream, stopTracks = true) => {
+    if (audioContextRef.current) {
+      audioContextRef.current.close();
+      audioContextRef.current = null;
+    }
+    if (stopTracks) {
+      stream.getTracks().forEach(track => track.stop());
+      setAudioStream(null);
+    }
+  };
+
+  // Fallback path: record the whole clip and upload it as a job
+  const startRecording = (stream) => {
+    wsRef.current = null;
+    mediaRecorderRef.current = new MediaRecorder(stream);
+    chunksRef.current = [];
+    
+    mediaRecorderRef.current.ondataavailable = (e) => {
+      if (e.data.size > 0) {
+        chunksRef.current.push(e.data);
+      }
+    };
+    
+    mediaRecorderRef.current.onstop = async () => {
+      const audioBlob = new Blob(chunksRef.current, { type: 'audio/wav' }); // or webm
+      await processAudio(audioBlob);
+      
+      // Stop all tracks
+      stream.getTracks().forEach(track => track.stop());
+      setAudioStream(null);
+    };
+    
+    mediaRecorderRef.current.start();
+  };
+
   const stopListening = () => {
-    if (mediaRecorderRef.current && state === 'listening') {
+    if (state !== 'listening') return;
+
+    if (wsRef.current && wsRef.current.readyState === WebSocket.OPEN) {
+      // Tell the server the utterance is over; it replies with the final transcript
+      wsRef.current.send(JSON.stringify({ type: 'end' }));
+      setState('processing');
+    } else if (mediaRecorderRef.current) {
       mediaRecorderRef.current.stop();
       setState('processing');
     }
@@ -57,6 +177,7 @@ const Home = () => {
   const processAudio = async (audioBlob) => {
     const formData = new FormData();
     formData.append('file', audioBlob, 'recording.webm');
+    formData.append('session_id', getSessionId());
     
     try {
       const token = localStorage.getItem('token');
@@ -69,15 +190,32 @@ const Home = () => {
         }
       });
       
-      const { audio_url } = response.data;
-      if (audio_url) {
-        playResponse(audio_url);
-      } else {
+      // The upload is queued as a job; follow its progress until the response audio is ready
+      const { events_url } = response.data;
+      const events = new EventSource(events_url);
+
+      events.addEventListener('result', (e) => {
+        events.close();
+        const job = JSON.parse(e.data);
+        if (job.audio_url) {
+          playResponse(job.audio_url);
+        } else {
+          alert(`Error processing audio: ${job.error || 'Processing failed'}`);
+          setState('idle');
+        }
+      });
+
+      events.onerror = () => {
+        events.close();
+        alert("Error processing audio: lost connection to the server");
         setState('idle');
-      }
+      };
     } catch (error) {
       console.error("Error processing audio:", error);
-      if (error.response) {
+      if (error.response && error.response.status === 429) {
+          const retryAfter = error.response.headers['retry-after'];
+          alert(`The assistant is busy. Please try again in ${retryAfter || 'a few'} seconds.`);
+      } else if (error.response) {
           console.error("Server Error:", error.response.status, error.response.data);
           alert(`Error processing audio: ${error.response.data.error || error.response.statusText}`);
       } else {
@@ -87,6 +225,30 @@ const Home = () => {
     }
   };
 
+  const enqueueSegment = (url) => {
+    segmentQueueRef.current.push(url);
+    if (!segmentPlayingRef.current) {
+      playNextSegment();
+    }
+  };
+
+  const playNextSegment = () => {
+    const next = segmentQueueRef.current.shift();
+    if (!next) {
+      // Queue drained: either the response is complete or the next sentence is still being synthesized
+      segmentPlayingRef.current = false;
+      if (responseDoneRef.current) {
+        setState('idle');
+      }
+      return;
+    }
+    segmentPlayingRef.current = true;
+    setState('speaking');
+    audioRef.current.src = next;
+    audioRef.current.onended = playNextSegment;
+    audioRef.current.play();
+  };
+
   const playResponse = (url) => {
     setState('speaking');
     audioRef.current.src = url;
@@ -136,6 +298,11 @@ const Home = () => {
           )}
         </div>
 
+        {/* Live transcript */}
+        {transcript && (
+          <p className="status-label">{transcript}</p>
+        )}
+
         {/* Controls */}
         <div className="flex gap-6">
           {state === 'idle' || state === 'speaking' ? (
@@ -0,0 +1,191 @@
+"""
+Re-run intent detection over historical query_logs rows.
+
+Run after editing src/data/intents.json so old rows use the current catalog.
+Rows are streamed from the database in batches, classified in parallel by one
+NLPProcessor per worker process, and rows whose intent changed are written back
+with bulk UPDATEs. Progress is checkpointed after every batch, so an interrupted
+run resumes where it stopped:
+
+    python reclassify_queries.py
+    python reclassify_queries.py --workers 8 --batch-size 1000 --encoder onnx
+    python reclassify_queries.py --restart  # ignore the checkpoint
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from config import settings
+from src.database import DatabaseManager
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+_nlp_processor = None
+
+
+def _init_worker(encoder: Optional[str]):
+    """Load one NLPProcessor per worker process"""
+    global _nlp_processor
+    # Parallelism comes from the process pool; keep each worker's math libraries single-threaded
+    os.environ["OMP_NUM_THREADS"] = "1"
+    from src.nlp_processor import NLPProcessor
+
+    _nlp_processor = NLPProcessor(encoder=encoder)
+
+
+def _classify_batch(rows: List[Tuple[int, str, Optional[str]]]) -> List[Tuple[int, str]]:
+    """Classify a batch and return (id, intent) for rows whose intent changed"""
+    results = _nlp_processor.detect_intents([text or "" for _, text, _ in rows])
+    return [
+        (row_id, result["intent"])
+        for (row_id, _, old_intent), result in zip(rows, results)
+        if result["intent"] != old_intent
+    ]
+
+
+def load_checkpoint(path: Path) -> Optional[Dict]:
+    """Read a checkpoint, or None if there isn't one"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_checkpoint(path: Path, checkpoint: Dict):
+    """Atomically replace the checkpoint file"""
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+def reclassify(
+    batch_size: int,
+    workers: int,
+    checkpoint_path: Path,
+    restart: bool = False,
+    dry_run: bool = False,
+    encoder: Optional[str] = None
+) -> Dict:
+    """
+    Re-classify every query log row up to the highest id present when the run began
+
+    Args:
+        batch_size: Rows per database fetch and per classification task
+        workers: Worker processes running NLP inference
+        checkpoint_path: File recording progress for resuming
+        restart: Ignore an existing checkpoint
+        dry_run: Classify and count changes without writing them
+        encoder: Intent encoder override (defaults to settings.intent_encoder)
+
+    Returns:
+        The final checkpoint dictionary
+    """
+    db = DatabaseManager()
+    if not db.Session:
+        raise RuntimeError("No database connection")
+
+    checkpoint = None if restart else load_checkpoint(checkpoint_path)
+    if checkpoint and checkpoint.get("done"):
+        logger.info(f"Checkpoint {checkpoint_path} marks a completed run; use --restart to run again")
+        return checkpoint
+    if checkpoint:
+        logger.info(f"Resuming after id {checkpoint['last_id']} ({checkpoint['processed']} rows already done)")
+    else:
+        # Rows logged after this point are classified with the current catalog already
+        checkpoint = {"last_id": 0, "max_id": db.get_max_query_id(), "processed": 0, "changed": 0, "done": False}
+
+    remaining = db.count_queries(checkpoint["last_id"], checkpoint["max_id"])
+    logger.info(f"{remaining} rows to classify with {workers} workers, batches of {batch_size}")
+
+    # Results are consumed in submission order so the checkpoint only ever covers a
+    # completed prefix of ids; the in-flight cap keeps memory bounded
+    max_in_flight = workers * 2
+    pending = deque()
+    started = time.time()
+    done_this_run = 0
+
+    def complete_oldest():
+        nonlocal done_this_run
+        last_id, count, result = pending.popleft()
+        changes = result.get()
+        if changes and not dry_run:
+            db.bulk_update_intents(changes)
+        checkpoint["last_id"] = last_id
+        checkpoint["processed"] += count
+        checkpoint["changed"] += len(changes)
+        done_this_run += count
+        if not dry_run:
+            save_checkpoint(checkpoint_path, checkpoint)
+
+        elapsed = max(time.time() - started, 1e-6)
+        logger.info(
+            f"{done_this_run}/{remaining} rows ({done_this_run / elapsed:.0f} rows/s), "
+            f"{checkpoint['changed']} changed so far"
+        )
+
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(workers, initializer=_init_worker, initargs=(encoder,)) as pool:
+        for rows in db.stream_query_batches(batch_size, checkpoint["last_id"], checkpoint["max_id"]):
+            pending.append((rows[-1][0], len(rows), pool.apply_async(_classify_batch, (rows,))))
+            if len(pending) >= max_in_flight:
+                complete_oldest()
+        while pending:
+            complete_oldest()
+
+    checkpoint["done"] = True
+    if not dry_run:
+        save_checkpoint(checkpoint_path, checkpoint)
+    return checkpoint
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-classify the intent of logged queries")
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows per batch (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes (default: all cores)")
+    parser.add_argument(
+        "--checkpoint",
+        type=Path,
+        default=settings.analytics_dir / "reclassify_checkpoint.json",
+        help="Progress file used to resume (default: %(default)s)"
+    )
+    parser.add_argument("--restart", action="store_true", help="Start from the first row, ignoring the checkpoint")
+    parser.add_argument("--dry-run", action="store_true", help="Count changes without writing them")
+    parser.add_argument("--encoder", choices=["transformer", "onnx", "hashing"], help="Override INTENT_ENCODER")
+    args = parser.parse_args()
+
+    try:
+        checkpoint = reclassify(
+            args.batch_size,
+            max(1, args.workers),
+            args.checkpoint,
+            restart=args.restart,
+            dry_run=args.dry_run,
+            encoder=args.encoder
+        )
+    except KeyboardInterrupt:
+        logger.info(f"Interrupted; rerun to resume from {args.checkpoint}")
+        sys.exit(130)
+    except Exception as e:
+        logger.error(f"Re-classification failed: {str(e)}")
+        sys.exit(1)
+
+    verb = "would change" if args.dry_run else "changed"
+    logger.info(f"Done: {checkpoint['processed']} rows classified, {checkpoint['changed']} {verb}")
+
+
+if __name__ == "__main__":
+    main()
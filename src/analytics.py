@@ -1,13 +1,24 @@
 """
 Analytics module for tracking bot performance
 """
+import atexit
 import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import partial
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List
+from typing import Callable, Dict, List
 from config import settings
 import logging
 
+try:
+    import fcntl
+except ImportError:  # Windows: a single process owns the file
+    fcntl = None
+
 logger = logging.getLogger(__name__)
 
 
@@ -17,8 +28,25 @@ class Analytics:
     def __init__(self):
         """Initialize analytics"""
         self.enabled = settings.analytics_enabled
+        # Pipeline worker threads share the bot's Analytics instance
+        self._lock = threading.Lock()
         self.data_file = settings.analytics_dir / "analytics.json"
-        self.metrics = {
+        self.lock_file = settings.analytics_dir / "analytics.lock"
+        # Updates not yet merged into the file. Every gunicorn worker has its own
+        # instance, so saving replays these onto the file's current contents
+        # rather than writing this process's view over the other workers' counts.
+        self._pending: List[Callable[[Dict], None]] = []
+        # Serializes merges so a flush and a synchronous save never interleave
+        self._save_lock = threading.Lock()
+        self._flush_seconds = settings.analytics_flush_seconds
+        self._flusher_pid = None
+        self.metrics = self._empty_metrics()
+        self._load_metrics()
+    
+    @staticmethod
+    def _empty_metrics() -> Dict:
+        """Metrics before any query has been tracked"""
+        return {
             "total_queries": 0,
             "successful_queries": 0,
             "failed_queries": 0,
@@ -27,7 +55,6 @@ class Analytics:
             "error_rates": {},
             "queries_by_hour": {}
         }
-        self._load_metrics()
     
     def _load_metrics(self):
         """Load metrics from file"""
@@ -38,16 +65,103 @@ class Analytics:
             except Exception as e:
                 logger.error(f"Error loading analytics: {str(e)}")
     
-    def _save_metrics(self):
-        """Save metrics to file"""
+    @contextmanager
+    def _file_lock(self):
+        """Hold an exclusive lock on the analytics file across processes"""
+        with open(self.lock_file, "a") as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+    
+    def _record(self, update: Callable[[Dict], None]):
+        """
+        Apply an update to this process's view and queue it for the file
+        
+        Args:
+            update: Function that mutates a metrics dictionary in place
+        """
+        with self._lock:
+            update(self.metrics)
+            self._pending.append(update)
+    
+    def _record_buffered(self, update: Callable[[Dict], None]):
+        """
+        Record an update and leave writing it to the background flusher
+        
+        Args:
+            update: Function that mutates a metrics dictionary in place
+        """
+        self._record(update)
+        if self._flush_seconds > 0:
+            self._ensure_flusher()
+        else:
+            self.flush()
+    
+    def _ensure_flusher(self):
+        """Start the flush thread in this process (threads do not survive a fork)"""
+        if self._flusher_pid == os.getpid():
+            return
+        
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+            threading.Thread(target=self._flush_loop, name="analytics-flusher", daemon=True).start()
+            if self._flusher_pid is None:
+                atexit.register(self.flush)
+                # The parent still owns what it buffered before forking
+                os.register_at_fork(after_in_child=lambda: self._pending.clear())
+            self._flusher_pid = os.getpid()
+    
+    def _flush_loop(self):
+        """Merge buffered updates into the file every few seconds"""
+        while True:
+            time.sleep(self._flush_seconds)
+            self.flush()
+    
+    def flush(self):
+        """Merge pending updates into the file"""
         if not self.enabled:
             return
         
-        try:
-            with open(self.data_file, "w") as f:
-                json.dump(self.metrics, f, indent=2)
-        except Exception as e:
-            logger.error(f"Error saving analytics: {str(e)}")
+        with self._save_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+            if not pending:
+                return
+            
+            try:
+                with self._file_lock():
+                    # Start from what the other workers have saved, not our stale copy
+                    metrics = self._empty_metrics()
+                    if self.data_file.exists():
+                        try:
+                            with open(self.data_file, "r") as f:
+                                metrics = json.load(f)
+                        except ValueError as e:
+                            logger.error(f"Discarding unreadable analytics file: {str(e)}")
+                    for update in pending:
+                        update(metrics)
+                    
+                    # Readers never see a half-written file
+                    tmp_file = self.data_file.with_suffix(f".{os.getpid()}.tmp")
+                    with open(tmp_file, "w") as f:
+                        json.dump(metrics, f, indent=2)
+                    os.replace(tmp_file, self.data_file)
+            except Exception as e:
+                logger.error(f"Error saving analytics: {str(e)}")
+                with self._lock:
+                    self._pending = pending + self._pending
+                return
+            
+            with self._lock:
+                # Keep anything recorded while the file was being written
+                for update in self._pending:
+                    update(metrics)
+                self.metrics = metrics
     
     def track_query(
         self,
@@ -70,34 +184,167 @@ class Analytics:
         if not self.enabled:
             return
         
-        self.metrics["total_queries"] += 1
+        self._record_buffered(partial(self._track_query, query_text=query_text, intent=intent,
+                                      response_time=response_time, success=success, error=error))
+    
+    @staticmethod
+    def _track_query(
+        metrics: Dict,
+        query_text: str,
+        intent: str,
+        response_time: int,
+        success: bool,
+        error: str = None
+    ):
+        """Update query counters in metrics"""
+        metrics["total_queries"] += 1
         
         if success:
-            self.metrics["successful_queries"] += 1
+            metrics["successful_queries"] += 1
         else:
-            self.metrics["failed_queries"] += 1
+            metrics["failed_queries"] += 1
             if error:
-                self.metrics["error_rates"][error] = self.metrics["error_rates"].get(error, 0) + 1
+                metrics["error_rates"][error] = metrics["error_rates"].get(error, 0) + 1
         
         # Update average response time
-        total = self.metrics["total_queries"]
-        current_avg = self.metrics["average_response_time"]
-        self.metrics["average_response_time"] = (
+        total = metrics["total_queries"]
+        current_avg = metrics["average_response_time"]
+        metrics["average_response_time"] = (
             (current_avg * (total - 1) + response_time) / total
         )
         
         # Track intent distribution
-        self.metrics["intent_distribution"][intent] = (
-            self.metrics["intent_distribution"].get(intent, 0) + 1
+        metrics["intent_distribution"][intent] = (
+            metrics["intent_distribution"].get(intent, 0) + 1
         )
         
         # Track queries by hour
         hour = datetime.now().hour
-        self.metrics["queries_by_hour"][str(hour)] = (
-            self.metrics["queries_by_hour"].get(str(hour), 0) + 1
+        metrics["queries_by_hour"][str(hour)] = (
+            metrics["queries_by_hour"].get(str(hour), 0) + 1
         )
+    
+    def track_speech(self, duration: float, speech_duration: float):
+        """
+        Track voice activity stats for an audio clip
+        
+        Args:
+            duration: Clip length in seconds
+            speech_duration: Seconds of the clip detected as speech
+        """
+        if not self.enabled:
+            return
+        
+        def update(metrics: Dict):
+            speech = metrics.setdefault("speech", {
+                "clips": 0,
+                "no_speech_clips": 0,
+                "total_audio_seconds": 0.0,
+                "total_speech_seconds": 0.0,
+                "average_speech_ratio": 0.0,
+                "speech_ratio_distribution": {}
+            })
+            ratio = speech_duration / duration if duration > 0 else 0.0
+            
+            speech["clips"] += 1
+            if speech_duration <= 0:
+                speech["no_speech_clips"] += 1
+            speech["total_audio_seconds"] = round(speech["total_audio_seconds"] + duration, 3)
+            speech["total_speech_seconds"] = round(speech["total_speech_seconds"] + speech_duration, 3)
+            speech["average_speech_ratio"] = (
+                (speech["average_speech_ratio"] * (speech["clips"] - 1) + ratio) / speech["clips"]
+            )
+            
+            # Ratio histogram in 10% buckets, e.g. "0.3-0.4"
+            bucket = min(int(ratio * 10), 9) / 10
+            key = f"{bucket:.1f}-{bucket + 0.1:.1f}"
+            speech["speech_ratio_distribution"][key] = speech["speech_ratio_distribution"].get(key, 0) + 1
+        
+        self._record_buffered(update)
+    
+    def track_cache(self, cache_name: str, hit: bool, saved_ms: float = 0.0, saved_bytes: int = 0):
+        """
+        Track a cache lookup
+        
+        Args:
+            cache_name: Name of the cache (e.g., "transcription")
+            hit: Whether the lookup was a hit
+            saved_ms: Latency avoided by the hit, in milliseconds
+            saved_bytes: Payload served by the hit instead of the upstream service
+        """
+        if not self.enabled:
+            return
+        
+        def update(metrics: Dict):
+            caches = metrics.setdefault("cache", {})
+            cache = caches.setdefault(cache_name, {"hits": 0, "misses": 0, "hit_ratio": 0.0})
+            cache["hits" if hit else "misses"] += 1
+            cache["hit_ratio"] = round(cache["hits"] / (cache["hits"] + cache["misses"]), 4)
+            if saved_ms:
+                cache["saved_ms"] = round(cache.get("saved_ms", 0.0) + saved_ms, 1)
+            if saved_bytes:
+                cache["saved_bytes"] = cache.get("saved_bytes", 0) + saved_bytes
+        
+        self._record_buffered(update)
+    
+    def track_route(self, tier: str, latency_ms: float):
+        """
+        Track which response tier answered a query
+        
+        Args:
+            tier: Response tier ("template" or "llm")
+            latency_ms: Time the tier took to produce the response, in milliseconds
+        """
+        if not self.enabled:
+            return
+        
+        def update(metrics: Dict):
+            routing = metrics.setdefault("routing", {"llm_calls_avoided": 0, "tiers": {}})
+            stats = routing["tiers"].setdefault(tier, {"count": 0, "average_ms": 0.0})
+            stats["count"] += 1
+            stats["average_ms"] = round(
+                (stats["average_ms"] * (stats["count"] - 1) + latency_ms) / stats["count"], 2
+            )
+            if tier != "llm":
+                routing["llm_calls_avoided"] += 1
+        
+        self._record_buffered(update)
+    
+    def track_latency(self, name: str, latency_ms: float):
+        """
+        Track a named latency (e.g., "time_to_first_audio_streaming")
+        
+        Args:
+            name: Metric name
+            latency_ms: Measured latency in milliseconds
+        """
+        if not self.enabled:
+            return
+        
+        def update(metrics: Dict):
+            latencies = metrics.setdefault("latency", {})
+            metric = latencies.setdefault(name, {
+                "count": 0,
+                "average_ms": 0.0,
+                "min_ms": None,
+                "max_ms": 0.0,
+                "distribution": {}
+            })
+            metric["count"] += 1
+            metric["average_ms"] = round(
+                (metric["average_ms"] * (metric["count"] - 1) + latency_ms) / metric["count"], 2
+            )
+            metric["min_ms"] = latency_ms if metric["min_ms"] is None else min(metric["min_ms"], latency_ms)
+            metric["max_ms"] = max(metric["max_ms"], latency_ms)
+            
+            # Doubling buckets, e.g. "500-1000"
+            upper = 250
+            while latency_ms >= upper and upper < 16000:
+                upper *= 2
+            key = f"{upper // 2 if upper > 250 else 0}-{upper}" if latency_ms < upper else f"{upper}+"
+            metric["distribution"][key] = metric["distribution"].get(key, 0) + 1
         
-        self._save_metrics()
+        self._record_buffered(update)
     
     def get_metrics(self) -> Dict:
         """
@@ -130,6 +377,12 @@ class Analytics:
             "failure_rate": f"{failure_rate:.2f}%",
             "average_response_time_ms": f"{self.metrics['average_response_time']:.2f}",
             "intent_distribution": self.metrics["intent_distribution"],
-            "error_rates": self.metrics["error_rates"]
+            "error_rates": self.metrics["error_rates"],
+            "llm_calls_avoided": self.metrics.get("routing", {}).get("llm_calls_avoided", 0),
+            "time_to_first_audio_ms": {
+                name.replace("time_to_first_audio_", ""): metric["average_ms"]
+                for name, metric in self.metrics.get("latency", {}).items()
+                if name.startswith("time_to_first_audio_")
+            }
         }
 
@@ -0,0 +1,239 @@
+"""
+In-memory audio decoding to 16 kHz mono float32 for speech recognition
+"""
+import io
+import subprocess
+import threading
+import wave
+from functools import lru_cache
+from fractions import Fraction
+from typing import Optional, Tuple
+
+import numpy as np
+
+from config import settings
+
+# Whisper models operate on 16 kHz mono audio
+SAMPLE_RATE = 16000
+# Zero crossings on each side of the resampling filter's windowed sinc
+RESAMPLE_FILTER_ZEROS = 10
+# Output samples computed per vectorized step, bounding resample()'s working memory
+RESAMPLE_BLOCK = 8192
+# Largest up/down factor of the resampling ratio. The filter has about
+# 20 * max(up, down) taps, so rates that share few factors with 16 kHz (e.g. 44101 Hz)
+# are resampled by the nearest ratio within this bound (inaudible for audio rates)
+RESAMPLE_MAX_FACTOR = 1000
+
+
+class AudioDecodeError(Exception):
+    """Raised when audio bytes cannot be decoded"""
+
+
+class AudioDecoder:
+    """
+    Decodes encoded audio (webm/ogg/mp3/wav/...) held in memory by piping it through
+    ffmpeg's stdin/stdout. The number of concurrent ffmpeg processes is bounded so a
+    burst of uploads cannot fork an unbounded number of decoders.
+    """
+
+    def __init__(self, max_processes: int = 4, timeout: float = 30.0, ffmpeg_binary: str = "ffmpeg"):
+        """
+        Initialize the decoder
+
+        Args:
+            max_processes: Maximum number of ffmpeg processes running at once
+            timeout: Seconds before a single decode is abandoned
+            ffmpeg_binary: ffmpeg executable name or path
+        """
+        self.max_processes = max(1, max_processes)
+        self.timeout = timeout
+        self.ffmpeg_binary = ffmpeg_binary
+        self._slots = threading.BoundedSemaphore(self.max_processes)
+
+    def decode(self, data: bytes) -> np.ndarray:
+        """
+        Decode audio bytes to 16 kHz mono float32 samples
+
+        Args:
+            data: Encoded audio bytes
+
+        Returns:
+            Float32 array in [-1, 1] sampled at 16 kHz
+
+        Raises:
+            AudioDecodeError: If the bytes cannot be decoded
+        """
+        if not data:
+            raise AudioDecodeError("No audio data")
+
+        # Plain PCM WAV needs no subprocess at all
+        audio = self._decode_wav(data)
+        if audio is not None:
+            return audio
+
+        return self._decode_ffmpeg(data)
+
+    def _decode_ffmpeg(self, data: bytes) -> np.ndarray:
+        """Pipe bytes through ffmpeg and read back raw 16-bit PCM"""
+        cmd = [
+            self.ffmpeg_binary,
+            "-hide_banner",
+            "-loglevel", "error",
+            "-threads", "0",
+            "-i", "pipe:0",
+            "-f", "s16le",
+            "-ac", "1",
+            "-acodec", "pcm_s16le",
+            "-ar", str(SAMPLE_RATE),
+            "pipe:1",
+        ]
+        with self._slots:
+            try:
+                result = subprocess.run(cmd, input=data, capture_output=True, timeout=self.timeout, check=False)
+            except FileNotFoundError:
+                raise AudioDecodeError(f"{self.ffmpeg_binary} not found; install ffmpeg and ensure it is on PATH")
+            except subprocess.TimeoutExpired:
+                raise AudioDecodeError(f"ffmpeg timed out after {self.timeout}s")
+
+        if result.returncode != 0:
+            raise AudioDecodeError(f"ffmpeg failed to decode audio: {result.stderr.decode(errors='ignore').strip()}")
+
+        return np.frombuffer(result.stdout, dtype="<i2").astype(np.float32) / 32768.0
+
+    def _decode_wav(self, data: bytes) -> Optional[np.ndarray]:
+        """Decode 16-bit PCM WAV natively; returns None for anything else"""
+        if data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+            return None
+
+        try:
+            with wave.open(io.BytesIO(data), "rb") as wav:
+                if wav.getsampwidth() != 2 or wav.getcomptype() != "NONE":
+                    return None
+                channels = wav.getnchannels()
+                sample_rate = wav.getframerate()
+                frames = wav.readframes(wav.getnframes())
+        except (wave.Error, EOFError):
+            return None
+
+        audio = np.frombuffer(frames, dtype="<i2").astype(np.float32) / 32768.0
+        if channels > 1:
+            audio = audio[:len(audio) - len(audio) % channels].reshape(-1, channels).mean(axis=1)
+        return resample(audio, sample_rate)
+
+
+class Resampler:
+    """
+    Resamples mono float32 audio to 16 kHz with a polyphase FIR filter. The filter
+    low-passes at the lower of the two Nyquist frequencies, so content above 8 kHz in
+    44.1/48 kHz audio is removed instead of aliasing into the speech band. Filter state
+    carries over between process() calls, so a stream can be resampled frame by frame
+    without discontinuities at the frame edges.
+    """
+
+    def __init__(self, sample_rate: int):
+        """
+        Initialize the resampler
+
+        Args:
+            sample_rate: Sample rate of the input
+        """
+        self.sample_rate = int(sample_rate)
+        if self.sample_rate <= 0:
+            raise ValueError(f"Invalid sample rate: {sample_rate}")
+        ratio = Fraction(SAMPLE_RATE, self.sample_rate)
+        if max(ratio.numerator, ratio.denominator) > RESAMPLE_MAX_FACTOR:
+            ratio = ratio.limit_denominator(RESAMPLE_MAX_FACTOR)
+            if ratio.numerator > RESAMPLE_MAX_FACTOR or ratio == 0:
+                raise ValueError(f"Unsupported sample rate: {sample_rate}")
+        self.up, self.down = ratio.numerator, ratio.denominator
+        self._phases, self._delay = _polyphase_filter(self.up, self.down)
+        self._taps_per_phase = self._phases.shape[1]
+
+        # Input history, starting with the zeros before the first sample
+        self._buffer = np.zeros(self._taps_per_phase, dtype=np.float32)
+        self._buffer_start = 0  # padded-input index of _buffer[0]
+        self._received = 0
+        self._emitted = 0
+
+    def process(self, audio: np.ndarray, final: bool = False) -> np.ndarray:
+        """
+        Resample the next piece of audio
+
+        Args:
+            audio: Mono float32 samples following the previous call's
+            final: End of input; the filter tail is flushed and nothing more may be passed
+
+        Returns:
+            Float32 samples at 16 kHz; output lags the input by the filter's half length
+            until final
+        """
+        audio = audio.astype(np.float32, copy=False)
+        if self.up == self.down:
+            return audio
+
+        self._received += len(audio)
+        pieces = [self._buffer, audio]
+        if final:
+            pieces.append(np.zeros(self._taps_per_phase, dtype=np.float32))
+        self._buffer = np.concatenate(pieces)
+
+        # Output n sits at n * down + delay on the (virtual) zero-stuffed input grid and
+        # needs input up to that point; only every up-th filter tap meets a real sample
+        available = self._buffer_start + len(self._buffer) - self._taps_per_phase
+        end = max(self._emitted, -(-(available * self.up - self._delay) // self.down))
+        if final:
+            end = max(self._emitted, int(round(self._received * self.up / self.down)))
+
+        output = np.empty(end - self._emitted, dtype=np.float32)
+        offsets = np.arange(self._taps_per_phase)
+        for start in range(self._emitted, end, RESAMPLE_BLOCK):
+            position = np.arange(start, min(start + RESAMPLE_BLOCK, end), dtype=np.int64) * self.down + self._delay
+            newest = position // self.up + self._taps_per_phase - self._buffer_start
+            inputs = self._buffer[newest[:, None] - offsets]
+            output[start - self._emitted:start - self._emitted + len(position)] = np.einsum(
+                "ij,ij->i", self._phases[position % self.up], inputs
+            )
+        self._emitted = end
+
+        # Keep only the history the next output still reaches back to
+        oldest = (end * self.down + self._delay) // self.up + 1 - self._buffer_start
+        oldest = min(max(oldest, 0), len(self._buffer))
+        self._buffer = self._buffer[oldest:]
+        self._buffer_start += oldest
+        return output
+
+
+def resample(audio: np.ndarray, sample_rate: int) -> np.ndarray:
+    """
+    Resample a complete mono float32 clip to 16 kHz (see Resampler)
+
+    Args:
+        audio: Mono float32 samples
+        sample_rate: Sample rate of the input
+
+    Returns:
+        Float32 samples at 16 kHz
+    """
+    if sample_rate == SAMPLE_RATE or not len(audio):
+        return audio.astype(np.float32, copy=False)
+    return Resampler(sample_rate).process(audio, final=True)
+
+
+@lru_cache(maxsize=8)
+def _polyphase_filter(up: int, down: int) -> Tuple[np.ndarray, int]:
+    """
+    Kaiser-windowed sinc low-pass for resampling by up/down, split into its up phases
+
+    Returns:
+        Tuple of (phases, one row of taps per phase; filter delay in zero-stuffed samples)
+    """
+    ratio = max(up, down)
+    delay = RESAMPLE_FILTER_ZEROS * ratio
+    n = np.arange(-delay, delay + 1)
+    taps = np.sinc(n / ratio) * np.kaiser(len(n), 5.0) * up / ratio
+    # Row p holds taps p, p + up, p + 2 * up, ...
+    taps = np.concatenate([taps, np.zeros(-len(taps) % up)])
+    return taps.reshape(-1, up).T.astype(np.float32), delay
+
+
+audio_decoder = AudioDecoder(max_processes=settings.ffmpeg_max_processes)
@@ -0,0 +1,156 @@
+"""
+Process-wide VoiceBot provider shared across requests
+"""
+import os
+import threading
+import time
+from typing import Dict, Optional
+from src.voice_bot import VoiceBot
+from config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BotProvider:
+    """Lazily builds a single warm VoiceBot per process and hands it out to requests"""
+
+    def __init__(self):
+        """Initialize an empty (cold) provider"""
+        self._bot: Optional[VoiceBot] = None
+        self._lock = threading.Lock()
+        self._loader: Optional[threading.Thread] = None
+        self._status = "cold"  # cold, loading, warming, ready, failed
+        self._error: Optional[str] = None
+        self._load_time_ms: Optional[int] = None
+        self._preloaded = False
+        self._pid = os.getpid()
+
+    def get_bot(self) -> VoiceBot:
+        """
+        Return the shared VoiceBot, building it on first use
+
+        Returns:
+            The process-wide VoiceBot instance
+        """
+        bot = self._bot
+        if bot is not None:
+            return bot
+
+        with self._lock:
+            # Another thread may have finished building while we waited
+            if self._bot is None:
+                self._build()
+            return self._bot
+
+    def preload(self):
+        """
+        Build the bot eagerly. Call this from the gunicorn master (``--preload``)
+        so model weights are loaded once and shared copy-on-write by the workers.
+        Connections are left to each worker (see _after_fork_in_child).
+        """
+        with self._lock:
+            if self._bot is None:
+                self._build(warm_up_connections=False)
+        self._preloaded = True
+        logger.info(f"Voice Bot preloaded in process {os.getpid()}")
+
+    def ensure_loading(self):
+        """Start building the bot in a background thread if nothing has started it yet"""
+        if self._bot is not None or self._status == "loading":
+            return
+
+        with self._lock:
+            if self._bot is not None or (self._loader and self._loader.is_alive()):
+                return
+            self._loader = threading.Thread(target=self._background_build, name="bot-loader", daemon=True)
+            self._loader.start()
+
+    def is_ready(self) -> bool:
+        """Whether the shared bot has been built and fully warmed up"""
+        return self._status == "ready"
+
+    def get_status(self) -> Dict:
+        """
+        Get readiness details for the current process
+
+        Returns:
+            Dictionary with readiness status and per-component availability
+        """
+        status = {
+            "ready": self.is_ready(),
+            "status": self._status,
+            "pid": os.getpid(),
+            "preloaded": self._preloaded,
+            "load_time_ms": self._load_time_ms,
+            "error": self._error,
+        }
+
+        bot = self._bot
+        if bot is not None:
+            status["components"] = {
+                "speech_to_text": bot.speech_to_text is not None,
+                "nlp_processor": bot.nlp_processor is not None,
+                "response_generator": bot.response_generator is not None,
+                "text_to_speech": bot.text_to_speech is not None,
+                "database": bot.database.Session is not None,
+            }
+            status["warmup_ms"] = dict(bot.warmup_ms)
+        return status
+
+    def _build(self, warm_up_connections: bool = True):
+        """Construct (and warm up) the VoiceBot. Caller must hold the lock."""
+        self._status = "loading"
+        start_time = time.time()
+        try:
+            self._bot = VoiceBot(warm_up_connections=warm_up_connections)
+            self._load_time_ms = int((time.time() - start_time) * 1000)
+            self._status = "ready"
+            self._error = None
+            logger.info(f"Shared Voice Bot ready in {self._load_time_ms}ms (pid {os.getpid()})")
+        except Exception as e:
+            self._status = "failed"
+            self._error = str(e)
+            logger.error(f"Error building shared Voice Bot: {str(e)}")
+            raise
+
+    def _background_build(self):
+        """Thread target for ensure_loading"""
+        try:
+            self.get_bot()
+        except Exception:
+            # Already logged and recorded in _build; the next request will retry
+            pass
+
+    def _warm_up_connections(self):
+        """Thread target: finish a preloaded bot's warm-up in this worker, then report ready"""
+        try:
+            self._bot.warm_up(models=False)
+        finally:
+            self._status = "ready"
+            logger.info(f"Voice Bot connections warmed up (pid {os.getpid()})")
+
+    def _after_fork_in_child(self):
+        """
+        Reset per-process state after a fork. Model weights stay shared, but the
+        lock and pooled database connections inherited from the parent must not be.
+        A preloaded bot opens this worker's own connections in the background and
+        reports ready once they are up.
+        """
+        self._lock = threading.Lock()
+        self._loader = None
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            bot = self._bot
+            if bot is not None and bot.database.engine is not None:
+                # Drop inherited pooled connections without closing the parent's sockets
+                bot.database.engine.dispose(close=False)
+            if bot is not None and self._preloaded and settings.warmup_enabled and self._status == "ready":
+                self._status = "warming"
+                threading.Thread(target=self._warm_up_connections, name="bot-warmup", daemon=True).start()
+
+
+bot_provider = BotProvider()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=bot_provider._after_fork_in_child)
@@ -0,0 +1,279 @@
+"""
+Multi-turn conversation sessions: rolling turn window plus an incremental summary
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+import logging
+
+from src.prompt_builder import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+SENTENCE_END_PATTERN = re.compile(r"(?<=[.!?])\s+")
+
+
+def _first_sentence(text: str, max_chars: int) -> str:
+    sentence = SENTENCE_END_PATTERN.split(text.strip(), 1)[0]
+    return sentence if len(sentence) <= max_chars else sentence[:max_chars].rsplit(" ", 1)[0] + " ..."
+
+
+def extractive_summary(summary: str, turns: List[Dict], max_tokens: int = 200) -> str:
+    """
+    Fold turns into a running summary without an LLM call: one line per turn with the
+    intent and the first sentence of each side. The oldest lines are dropped once the
+    summary exceeds max_tokens.
+
+    Args:
+        summary: Summary so far (may be empty)
+        turns: Turns to fold in, oldest first ({"user", "assistant", "intent"})
+        max_tokens: Summary size limit
+
+    Returns:
+        Updated summary
+    """
+    lines = summary.splitlines() if summary else []
+    for turn in turns:
+        lines.append(
+            f"- User ({turn['intent']}): {_first_sentence(turn['user'], 120)} "
+            f"| Assistant: {_first_sentence(turn['assistant'], 160)}"
+        )
+    while len(lines) > 1 and estimate_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+class ConversationSession:
+    """One user's conversation: recent turns verbatim, older ones as a summary"""
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.turns: List[Dict] = []
+        self.summary = ""
+        self.folded_turns = 0
+        self.folding = False
+        self.created = time.time()
+        self.last_active = self.created
+        self.lock = threading.Lock()
+
+    def snapshot(self) -> Optional[Dict]:
+        """
+        Conversation context for the next prompt
+
+        Returns:
+            {"summary", "turns"} or None if nothing has been said yet
+        """
+        with self.lock:
+            if not self.turns and not self.summary:
+                return None
+            return {"summary": self.summary, "turns": list(self.turns)}
+
+    def to_dict(self) -> Dict:
+        """Serializable session state (caller must hold the session lock)"""
+        return {
+            "session_id": self.session_id,
+            "turns": list(self.turns),
+            "summary": self.summary,
+            "folded_turns": self.folded_turns,
+            "created": self.created,
+            "last_active": self.last_active,
+        }
+
+    def load(self, state: Optional[Dict]):
+        """Replace this session's state with a stored copy, or reset it if there is none (lock held)"""
+        self.turns = list(state["turns"]) if state else []
+        self.summary = state["summary"] if state else ""
+        self.folded_turns = state["folded_turns"] if state else 0
+        if state:
+            self.created = state["created"]
+
+
+class SessionStore:
+    """
+    Bounded, expiring store of conversation sessions. Each session keeps the last
+    window_turns turns verbatim; when twice that many have accumulated, the oldest
+    window_turns are folded into the summary in one step, so the summary (and any
+    provider-side cache of the prompt prefix built on it) changes only every
+    window_turns turns. Sessions idle for ttl_seconds expire; beyond max_sessions the
+    least recently active session is evicted.
+
+    With a shared store, the store is the source of truth: every lookup reloads the
+    session from it and every turn is written back, so consecutive requests of one
+    conversation can land on different worker processes. The in-memory sessions are
+    then only this process's working copies.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 1000,
+        ttl_seconds: int = 1800,
+        window_turns: int = 4,
+        max_summary_tokens: int = 200,
+        summarize: Optional[Callable[[str, List[Dict]], str]] = None,
+        store: Optional[Any] = None
+    ):
+        """
+        Initialize the store
+
+        Args:
+            max_sessions: Sessions kept in memory
+            ttl_seconds: Idle time after which a session is forgotten
+            window_turns: Recent turns kept verbatim
+            max_summary_tokens: Size limit of each session's summary
+            summarize: Called as summarize(summary, turns) to fold turns into the summary
+                (e.g., with an LLM); falls back to extractive_summary if it fails or is None
+            store: Optional shared session store (e.g. DatabaseManager) with save_conversation/
+                get_conversation/delete_conversation/purge_conversations
+        """
+        self.max_sessions = max(1, max_sessions)
+        self.ttl_seconds = ttl_seconds
+        self.window_turns = max(1, window_turns)
+        self.max_summary_tokens = max_summary_tokens
+        self.summarize = summarize
+        self.store = store
+
+        self._sessions: "OrderedDict[str, ConversationSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"created": 0, "expired": 0, "evicted": 0, "turns": 0, "folds": 0}
+
+    def get(self, session_id: str) -> ConversationSession:
+        """
+        Get a live session, creating it if it is new or has expired
+
+        Args:
+            session_id: Session key (e.g., the JWT identity)
+
+        Returns:
+            ConversationSession
+        """
+        now = time.time()
+        created = False
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None and now - session.last_active > self.ttl_seconds:
+                del self._sessions[session_id]
+                self.stats["expired"] += 1
+                session = None
+            if session is None:
+                session = self._sessions[session_id] = ConversationSession(session_id)
+                self.stats["created"] += 1
+                created = True
+                self._prune(now)
+            self._sessions.move_to_end(session_id)
+
+        if self.store is not None:
+            if created:
+                self.store.purge_conversations(self.ttl_seconds)
+            # Another process may have advanced (or cleared) the conversation since
+            state = self.store.get_conversation(session_id)
+            if state is not None and now - state["last_active"] > self.ttl_seconds:
+                state = None
+            with session.lock:
+                # Mid-fold, this process holds turns the stored copy doesn't have yet
+                if not session.folding:
+                    session.load(state)
+        session.last_active = now
+        return session
+
+    def context_for(self, session_id: Optional[str]) -> Optional[Dict]:
+        """
+        Conversation context for a session's next prompt
+
+        Args:
+            session_id: Session key, or None for a stateless request
+
+        Returns:
+            {"summary", "turns"} or None
+        """
+        if not session_id:
+            return None
+        return self.get(session_id).snapshot()
+
+    def record(self, session_id: Optional[str], user_text: str, response_text: str, intent: str):
+        """
+        Append a completed turn, folding old turns into the summary when the window overflows
+
+        Args:
+            session_id: Session key, or None for a stateless request (nothing is recorded)
+            user_text: What the user said
+            response_text: What the bot answered
+            intent: Detected intent
+        """
+        if not session_id:
+            return
+
+        session = self.get(session_id)
+        with session.lock:
+            session.turns.append({"user": user_text, "assistant": response_text, "intent": intent})
+            folding = None
+            if len(session.turns) >= 2 * self.window_turns and not session.folding:
+                folding = session.turns[:self.window_turns]
+                session.turns = session.turns[self.window_turns:]
+                session.folding = True
+            summary = session.summary
+        with self._lock:
+            self.stats["turns"] += 1
+        self._save(session)
+
+        if folding:
+            # Summarize outside the session lock; concurrent turns on the same session
+            # only append to the window until this fold is done
+            summary = self._fold(summary, folding)
+            with session.lock:
+                session.summary = summary
+                session.folded_turns += len(folding)
+                session.folding = False
+            with self._lock:
+                self.stats["folds"] += 1
+            self._save(session)
+
+    def clear(self, session_id: str):
+        """Forget a session (e.g., on logout)"""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+        if self.store is not None:
+            self.store.delete_conversation(session_id)
+
+    def get_stats(self) -> Dict:
+        """
+        Get session statistics for this process
+
+        Returns:
+            Dictionary with active sessions and created/expired/evicted/turn/fold counts
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["active"] = len(self._sessions)
+        return stats
+
+    def _save(self, session: ConversationSession):
+        """Write a session back to the shared store"""
+        if self.store is None:
+            return
+        with session.lock:
+            state = session.to_dict()
+        self.store.save_conversation(state)
+
+    def _fold(self, summary: str, turns: List[Dict]) -> str:
+        if self.summarize:
+            try:
+                return self.summarize(summary, turns)
+            except Exception as e:
+                logger.error(f"Error summarizing conversation: {str(e)}")
+        return extractive_summary(summary, turns, self.max_summary_tokens)
+
+    def _prune(self, now: float):
+        """Drop expired sessions, then the least recently active beyond the limit (lock held)"""
+        while self._sessions:
+            oldest_id, oldest = next(iter(self._sessions.items()))
+            if now - oldest.last_active > self.ttl_seconds:
+                del self._sessions[oldest_id]
+                self.stats["expired"] += 1
+            elif len(self._sessions) > self.max_sessions:
+                del self._sessions[oldest_id]
+                self.stats["evicted"] += 1
+            else:
+                break
@@ -1,11 +1,12 @@
 """
 Database module for backend integration
 """
-from typing import Optional, Dict, List
-from sqlalchemy import create_engine, Column, String, DateTime, Text, Integer
+import json
+from typing import Optional, Dict, Iterator, List, Tuple
+from sqlalchemy import create_engine, Column, String, DateTime, Text, Integer, func, select, update
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from datetime import datetime
+from datetime import datetime, timedelta
 from config import settings
 import logging
 
@@ -36,6 +37,31 @@ class User(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
+class PipelineJob(Base):
+    """Model for sharing queued job status across worker processes"""
+    __tablename__ = "pipeline_jobs"
+    
+    id = Column(String(32), primary_key=True)
+    status = Column(String(20), nullable=False)
+    stage = Column(String(50))
+    result = Column(Text, nullable=True)  # JSON-encoded
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ConversationState(Base):
+    """Model for sharing conversation sessions across worker processes"""
+    __tablename__ = "conversation_sessions"
+    
+    id = Column(String(200), primary_key=True)
+    turns = Column(Text, nullable=False)  # JSON-encoded
+    summary = Column(Text, default="")
+    folded_turns = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
 class DatabaseManager:
     """Manages database connections and operations"""
     
@@ -69,6 +95,24 @@ class DatabaseManager:
         else:
             logger.warning("No database configuration found")
     
+    def ping(self) -> bool:
+        """
+        Open a pooled connection and run a trivial query
+        
+        Returns:
+            True if the database answered
+        """
+        if not self.engine:
+            return False
+        
+        try:
+            with self.engine.connect() as connection:
+                connection.execute(select(1))
+            return True
+        except Exception as e:
+            logger.error(f"Error pinging database: {str(e)}")
+            return False
+    
     def log_query(
         self,
         query_text: str,
@@ -220,3 +264,281 @@ class DatabaseManager:
             logger.error(f"Error retrieving user: {str(e)}")
             return None
 
+    def save_job(self, job: Dict):
+        """
+        Insert or update the shared status row for a pipeline job
+        
+        Args:
+            job: Job dictionary as returned by Job.to_dict()
+        """
+        if not self.Session:
+            return
+        
+        try:
+            session = self.Session()
+            row = session.get(PipelineJob, job["job_id"])
+            if row is None:
+                row = PipelineJob(id=job["job_id"])
+                session.add(row)
+            row.status = job["status"]
+            row.stage = job["stage"]
+            row.result = json.dumps(job["result"]) if job["result"] is not None else None
+            row.error = job["error"]
+            row.updated_at = datetime.utcnow()
+            session.commit()
+            session.close()
+        except Exception as e:
+            logger.error(f"Error saving job status: {str(e)}")
+    
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        """
+        Retrieve the shared status of a pipeline job
+        
+        Args:
+            job_id: Job identifier
+            
+        Returns:
+            Job dictionary or None if not found
+        """
+        if not self.Session:
+            return None
+        
+        try:
+            session = self.Session()
+            row = session.get(PipelineJob, job_id)
+            session.close()
+            if row is None:
+                return None
+            return {
+                "job_id": row.id,
+                "status": row.status,
+                "stage": row.stage,
+                "result": json.loads(row.result) if row.result else None,
+                "error": row.error,
+            }
+        except Exception as e:
+            logger.error(f"Error retrieving job status: {str(e)}")
+            return None
+    
+    def purge_jobs(self, max_age_seconds: int):
+        """
+        Delete job status rows not updated within the given age
+        
+        Args:
+            max_age_seconds: Age after which job rows are removed
+        """
+        if not self.Session:
+            return
+        
+        try:
+            session = self.Session()
+            cutoff = datetime.utcnow() - timedelta(seconds=max_age_seconds)
+            session.query(PipelineJob).filter(PipelineJob.updated_at < cutoff).delete()
+            session.commit()
+            session.close()
+        except Exception as e:
+            logger.error(f"Error purging job status: {str(e)}")
+    
+    def save_conversation(self, conversation: Dict):
+        """
+        Insert or update the shared state of a conversation session
+        
+        Args:
+            conversation: Session dictionary as returned by ConversationSession.to_dict()
+        """
+        if not self.Session:
+            return
+        
+        try:
+            session = self.Session()
+            row = session.get(ConversationState, conversation["session_id"])
+            if row is None:
+                row = ConversationState(id=conversation["session_id"])
+                session.add(row)
+            row.turns = json.dumps(conversation["turns"])
+            row.summary = conversation["summary"]
+            row.folded_turns = conversation["folded_turns"]
+            row.created_at = datetime.utcfromtimestamp(conversation["created"])
+            row.updated_at = datetime.utcfromtimestamp(conversation["last_active"])
+            session.commit()
+            session.close()
+        except Exception as e:
+            logger.error(f"Error saving conversation: {str(e)}")
+    
+    def get_conversation(self, session_id: str) -> Optional[Dict]:
+        """
+        Retrieve the shared state of a conversation session
+        
+        Args:
+            session_id: Session key
+            
+        Returns:
+            Session dictionary or None if not found
+        """
+        if not self.Session:
+            return None
+        
+        try:
+            session = self.Session()
+            row = session.get(ConversationState, session_id)
+            session.close()
+            if row is None:
+                return None
+            return {
+                "session_id": row.id,
+                "turns": json.loads(row.turns),
+                "summary": row.summary or "",
+                "folded_turns": row.folded_turns or 0,
+                "created": (row.created_at - datetime(1970, 1, 1)).total_seconds(),
+                "last_active": (row.updated_at - datetime(1970, 1, 1)).total_seconds(),
+            }
+        except Exception as e:
+            logger.error(f"Error retrieving conversation: {str(e)}")
+            return None
+    
+    def delete_conversation(self, session_id: str):
+        """
+        Delete the shared state of a conversation session
+        
+        Args:
+            session_id: Session key
+        """
+        if not self.Session:
+            return
+        
+        try:
+            session = self.Session()
+            session.query(ConversationState).filter(ConversationState.id == session_id).delete()
+            session.commit()
+            session.close()
+        except Exception as e:
+            logger.error(f"Error deleting conversation: {str(e)}")
+    
+    def purge_conversations(self, max_age_seconds: int):
+        """
+        Delete conversation sessions idle for longer than the given age
+        
+        Args:
+            max_age_seconds: Idle time after which sessions are removed
+        """
+        if not self.Session:
+            return
+        
+        try:
+            session = self.Session()
+            cutoff = datetime.utcnow() - timedelta(seconds=max_age_seconds)
+            session.query(ConversationState).filter(ConversationState.updated_at < cutoff).delete()
+            session.commit()
+            session.close()
+        except Exception as e:
+            logger.error(f"Error purging conversations: {str(e)}")
+    
+    def count_queries(self, after_id: int = 0, max_id: Optional[int] = None) -> int:
+        """
+        Count query log rows in an id range
+        
+        Args:
+            after_id: Only count rows with a larger id
+            max_id: Only count rows up to this id (inclusive)
+            
+        Returns:
+            Number of rows
+        """
+        if not self.Session:
+            return 0
+        
+        try:
+            session = self.Session()
+            query = session.query(func.count(QueryLog.id)).filter(QueryLog.id > after_id)
+            if max_id is not None:
+                query = query.filter(QueryLog.id <= max_id)
+            count = query.scalar() or 0
+            session.close()
+            return count
+        except Exception as e:
+            logger.error(f"Error counting queries: {str(e)}")
+            return 0
+    
+    def get_max_query_id(self) -> int:
+        """
+        Get the highest query log id
+        
+        Returns:
+            The id, or 0 if the table is empty
+        """
+        if not self.Session:
+            return 0
+        
+        session = self.Session()
+        try:
+            return session.query(func.max(QueryLog.id)).scalar() or 0
+        finally:
+            session.close()
+    
+    def stream_query_batches(
+        self,
+        batch_size: int = 500,
+        after_id: int = 0,
+        max_id: Optional[int] = None
+    ) -> Iterator[List[Tuple[int, str, Optional[str]]]]:
+        """
+        Stream query log rows in id order without loading the table into memory
+        
+        Args:
+            batch_size: Rows per yielded batch
+            after_id: Resume after this id
+            max_id: Stop at this id (inclusive)
+            
+        Yields:
+            Lists of (id, query_text, intent) tuples
+        """
+        if not self.Session:
+            return
+        
+        def page(last_id: int):
+            statement = select(QueryLog.id, QueryLog.query_text, QueryLog.intent).where(QueryLog.id > last_id)
+            if max_id is not None:
+                statement = statement.where(QueryLog.id <= max_id)
+            return statement.order_by(QueryLog.id)
+        
+        if self.engine.dialect.name == "sqlite":
+            # SQLite can't commit writes while another connection holds a read
+            # cursor open, so page through by id with short reads instead
+            last_id = after_id
+            while True:
+                with self.engine.connect() as connection:
+                    rows = [tuple(row) for row in connection.execute(page(last_id).limit(batch_size))]
+                if not rows:
+                    return
+                last_id = rows[-1][0]
+                yield rows
+        else:
+            # Server-side cursor: the driver fetches batch_size rows at a time
+            with self.engine.connect() as connection:
+                result = connection.execution_options(stream_results=True, yield_per=batch_size).execute(page(after_id))
+                for partition in result.partitions():
+                    yield [tuple(row) for row in partition]
+    
+    def bulk_update_intents(self, updates: List[Tuple[int, str]]) -> int:
+        """
+        Set the intent of many query log rows in one executemany UPDATE
+        
+        Args:
+            updates: (id, intent) pairs
+            
+        Returns:
+            Number of rows written
+        """
+        if not self.Session or not updates:
+            return 0
+        
+        session = self.Session()
+        try:
+            session.execute(update(QueryLog), [{"id": row_id, "intent": intent} for row_id, intent in updates])
+            session.commit()
+            return len(updates)
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
@@ -0,0 +1,164 @@
+"""
+Single-pass entity extraction for transcripts
+"""
+import re
+from datetime import date
+from typing import Dict, List, Optional
+
+DIGIT_WORDS = {
+    "zero": "0", "oh": "0", "one": "1", "two": "2", "three": "3", "four": "4",
+    "five": "5", "six": "6", "seven": "7", "eight": "8", "nine": "9",
+}
+
+MONTHS = {
+    "january": 1, "february": 2, "march": 3, "april": 4, "may": 5, "june": 6,
+    "july": 7, "august": 8, "september": 9, "october": 10, "november": 11, "december": 12,
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "jun": 6, "jul": 7,
+    "aug": 8, "sep": 9, "sept": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+
+CURRENCIES = {
+    "$": "USD", "usd": "USD", "dollar": "USD", "dollars": "USD", "buck": "USD", "bucks": "USD",
+    "cent": "USD", "cents": "USD",
+    "€": "EUR", "eur": "EUR", "euro": "EUR", "euros": "EUR",
+    "£": "GBP", "gbp": "GBP", "pound": "GBP", "pounds": "GBP",
+    "₹": "INR", "inr": "INR", "rs": "INR", "rs.": "INR", "rupee": "INR", "rupees": "INR",
+}
+
+_DIGIT_WORD = "|".join(DIGIT_WORDS)
+_SPELLED = rf"(?:{_DIGIT_WORD})(?:[\s,-]+(?:{_DIGIT_WORD})){{2,}}"
+_MONTH = "|".join(sorted(MONTHS, key=len, reverse=True))
+_WEEKDAY = "monday|tuesday|wednesday|thursday|friday|saturday|sunday"
+_NUMBER = r"\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?"
+_ORDINAL = r"(?:st|nd|rd|th)?"
+
+# Alternatives are tried in order at each position, so more specific patterns come
+# first: "account 1234567890" is an account number, not a phone number
+PATTERNS = [
+    ("account", rf"(?:account|acct|a/c)(?:\s+(?:number|num|no\.?|#))?(?:\s+is)?\s*[:#]?\s*"
+                rf"(?P<account_value>\d{{3,}}(?:[ -]\d{{2,}})*|{_SPELLED})"),
+    ("phone", r"(?:\+\d{1,3}[\s.-]?)?(?:\(\d{3}\)\s?|\d{3}[\s.-]?)\d{3}[\s.-]?\d{4}(?!\d)"),
+    ("date_iso", r"(?P<iso_year>\d{4})-(?P<iso_month>\d{1,2})-(?P<iso_day>\d{1,2})"),
+    ("date_numeric", r"\d{1,2}[/.]\d{1,2}[/.]\d{2,4}"),
+    ("date_month_day", rf"(?P<md_month>{_MONTH})\.?\s+(?P<md_day>\d{{1,2}}){_ORDINAL}(?:,?\s+(?P<md_year>\d{{4}}))?"),
+    ("date_day_month", rf"(?P<dm_day>\d{{1,2}}){_ORDINAL}\s+(?:of\s+)?(?P<dm_month>{_MONTH})(?:,?\s+(?P<dm_year>\d{{4}}))?"),
+    ("date_relative", rf"today|tonight|yesterday|tomorrow|(?:last|next|this)\s+(?:week|month|year|{_WEEKDAY})"),
+    ("amount_prefixed", rf"(?P<prefix_currency>[$€£₹]|rs\.?|usd|eur|gbp|inr)\s?(?P<prefix_value>{_NUMBER})"),
+    ("amount_suffixed", rf"(?P<suffix_value>{_NUMBER})\s?(?P<suffix_currency>dollars?|bucks?|cents?|euros?|pounds?|rupees?|usd|eur|gbp|inr)"),
+    ("spelled_number", _SPELLED),
+    ("number", _NUMBER),
+]
+
+ENTITY_TYPES = {
+    "account": "account_number",
+    "phone": "phone_number",
+    "date_iso": "date",
+    "date_numeric": "date",
+    "date_month_day": "date",
+    "date_day_month": "date",
+    "date_relative": "date",
+    "amount_prefixed": "amount",
+    "amount_suffixed": "amount",
+    "spelled_number": "number",
+    "number": "number",
+}
+
+
+def _spelled_to_digits(text: str) -> str:
+    return "".join(DIGIT_WORDS[word] for word in re.findall(_DIGIT_WORD, text.lower()))
+
+
+def _iso_date(year: Optional[str], month: int, day: str) -> Optional[str]:
+    """Format a date as YYYY-MM-DD, or None if the year is unknown or the date is invalid"""
+    if not year:
+        return None
+    try:
+        return date(int(year), month, int(day)).isoformat()
+    except ValueError:
+        return None
+
+
+class EntityExtractor:
+    """
+    Extracts typed entities (account_number, phone_number, date, amount, number)
+    with character positions. All patterns are compiled into one regex, so each
+    transcript is scanned once regardless of how many entity types there are.
+    """
+
+    def __init__(self):
+        self.pattern = re.compile(
+            r"(?<!\w)(?:" + "|".join(f"(?P<{name}>{pattern})" for name, pattern in PATTERNS) + r")(?!\w)",
+            re.IGNORECASE
+        )
+
+    def extract(self, text: str) -> List[Dict]:
+        """
+        Extract entities from text
+
+        Args:
+            text: Input text
+
+        Returns:
+            List of entities in order of appearance, each with type, value (normalized),
+            text (as spoken), start and end; amounts also carry a currency code
+        """
+        entities = []
+        for match in self.pattern.finditer(text):
+            kind = match.lastgroup
+            entity = {
+                "type": ENTITY_TYPES[kind],
+                "value": match.group(0),
+                "text": match.group(0),
+                "start": match.start(),
+                "end": match.end(),
+            }
+            self._normalize(kind, match, entity)
+            entities.append(entity)
+        return entities
+
+    def extract_batch(self, texts: List[str]) -> List[List[Dict]]:
+        """
+        Extract entities from several texts
+
+        Args:
+            texts: Input texts
+
+        Returns:
+            One entity list per text, in order
+        """
+        return [self.extract(text) for text in texts]
+
+    @staticmethod
+    def _normalize(kind: str, match: re.Match, entity: Dict):
+        """Fill in the normalized value for a match"""
+        groups = match.groupdict()
+        if kind == "account":
+            raw = groups["account_value"]
+            entity["value"] = re.sub(r"\D", "", raw) or _spelled_to_digits(raw)
+        elif kind == "phone":
+            entity["value"] = ("+" if entity["text"].startswith("+") else "") + re.sub(r"\D", "", entity["text"])
+        elif kind == "spelled_number":
+            entity["value"] = _spelled_to_digits(entity["text"])
+        elif kind == "number":
+            entity["value"] = entity["text"].replace(",", "")
+        elif kind in ("amount_prefixed", "amount_suffixed"):
+            prefix = kind == "amount_prefixed"
+            value = groups["prefix_value" if prefix else "suffix_value"].replace(",", "")
+            unit = groups["prefix_currency" if prefix else "suffix_currency"].lower()
+            if unit.startswith("cent"):
+                value = f"{float(value) / 100:.2f}"
+            entity["value"] = value
+            entity["currency"] = CURRENCIES.get(unit, "USD")
+        elif kind == "date_iso":
+            entity["value"] = _iso_date(groups["iso_year"], int(groups["iso_month"]), groups["iso_day"]) or entity["text"]
+        elif kind == "date_month_day":
+            month = MONTHS[groups["md_month"].lower()]
+            entity["value"] = _iso_date(groups["md_year"], month, groups["md_day"]) or entity["text"].lower()
+        elif kind == "date_day_month":
+            month = MONTHS[groups["dm_month"].lower()]
+            entity["value"] = _iso_date(groups["dm_year"], month, groups["dm_day"]) or entity["text"].lower()
+        elif kind == "date_relative":
+            entity["value"] = " ".join(entity["text"].lower().split())
+
+
+entity_extractor = EntityExtractor()
@@ -0,0 +1,193 @@
+"""
+Dynamic cross-request batching for model inference
+"""
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class _Request:
+    """A single item waiting to be batched"""
+
+    __slots__ = ("item", "future", "enqueued_at")
+
+    def __init__(self, item: Any):
+        self.item = item
+        self.future: Future = Future()
+        self.enqueued_at = time.monotonic()
+
+
+class BatchScheduler:
+    """
+    Collects concurrent inference requests for up to ``max_wait_ms`` (or until
+    ``max_batch_size`` are waiting), runs them through ``batch_fn`` in one pass and
+    scatters the results back to each caller's future.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 10.0,
+        name: str = "inference",
+        stats_window: int = 1000
+    ):
+        """
+        Initialize the scheduler
+
+        Args:
+            batch_fn: Callable mapping a list of inputs to a list of outputs in the same order
+            max_batch_size: Maximum number of requests per batch
+            max_wait_ms: Maximum time the first request in a batch waits for company
+            name: Name used for the worker thread and logs
+            stats_window: Number of recent requests/batches kept for statistics
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self.name = name
+
+        self._queue: "queue.Queue[_Request]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_pid: Optional[int] = None
+        self._start_lock = threading.Lock()
+
+        self._stats_lock = threading.Lock()
+        self._queue_delays: deque = deque(maxlen=stats_window)
+        self._batch_sizes: deque = deque(maxlen=stats_window)
+        self._completions: deque = deque(maxlen=stats_window)  # monotonic completion times
+        self._busy_seconds = 0.0
+        self._total_requests = 0
+        self._total_batches = 0
+        self._started_at = time.monotonic()
+
+    def submit(self, item: Any) -> Future:
+        """
+        Queue an item for batched inference
+
+        Args:
+            item: Model input
+
+        Returns:
+            Future resolved with the model output for this item
+        """
+        self._ensure_worker()
+        request = _Request(item)
+        self._queue.put(request)
+        return request.future
+
+    def run(self, item: Any, timeout: Optional[float] = None) -> Any:
+        """
+        Run one item through the scheduler and wait for its result
+
+        Args:
+            item: Model input
+            timeout: Optional seconds to wait for the result
+
+        Returns:
+            Model output for this item
+        """
+        return self.submit(item).result(timeout=timeout)
+
+    def get_stats(self) -> Dict:
+        """
+        Get throughput and queueing statistics over the recent window
+
+        Returns:
+            Dictionary of scheduler metrics
+        """
+        with self._stats_lock:
+            delays = sorted(self._queue_delays)
+            sizes = list(self._batch_sizes)
+            completions = list(self._completions)
+            busy_seconds = self._busy_seconds
+            total_requests = self._total_requests
+            total_batches = self._total_batches
+
+        throughput = 0.0
+        if len(completions) > 1 and completions[-1] > completions[0]:
+            throughput = (len(completions) - 1) / (completions[-1] - completions[0])
+        cores = os.cpu_count() or 1
+
+        def percentile(p: float) -> float:
+            if not delays:
+                return 0.0
+            return delays[min(len(delays) - 1, int(p * len(delays)))] * 1000
+
+        return {
+            "name": self.name,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "total_requests": total_requests,
+            "total_batches": total_batches,
+            "queue_depth": self._queue.qsize(),
+            "average_batch_size": round(sum(sizes) / len(sizes), 2) if sizes else 0.0,
+            "throughput_per_sec": round(throughput, 3),
+            "throughput_per_sec_per_core": round(throughput / cores, 3),
+            "busy_fraction": round(busy_seconds / max(1e-9, time.monotonic() - self._started_at), 3),
+            "queue_delay_ms": {
+                "avg": round(sum(delays) / len(delays) * 1000, 2) if delays else 0.0,
+                "p50": round(percentile(0.50), 2),
+                "p95": round(percentile(0.95), 2),
+                "max": round(delays[-1] * 1000, 2) if delays else 0.0,
+            },
+        }
+
+    def _ensure_worker(self):
+        """Start the batching thread in this process (threads do not survive a fork)"""
+        if self._worker_pid == os.getpid():
+            return
+
+        with self._start_lock:
+            if self._worker_pid == os.getpid():
+                return
+            self._worker = threading.Thread(target=self._loop, name=f"{self.name}-batcher", daemon=True)
+            self._worker.start()
+            self._worker_pid = os.getpid()
+
+    def _loop(self):
+        """Gather batches and run them forever"""
+        while True:
+            batch = [self._queue.get()]
+            deadline = batch[0].enqueued_at + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._run_batch(batch)
+
+    def _run_batch(self, batch: List[_Request]):
+        """Run one batch and resolve its futures"""
+        started = time.monotonic()
+        try:
+            outputs = self.batch_fn([request.item for request in batch])
+            if len(outputs) != len(batch):
+                raise RuntimeError(f"{self.name}: batch_fn returned {len(outputs)} results for {len(batch)} inputs")
+            for request, output in zip(batch, outputs):
+                request.future.set_result(output)
+        except Exception as e:
+            logger.error(f"Error running {self.name} batch of {len(batch)}: {str(e)}")
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+
+        finished = time.monotonic()
+        with self._stats_lock:
+            self._busy_seconds += finished - started
+            self._total_batches += 1
+            self._total_requests += len(batch)
+            self._batch_sizes.append(len(batch))
+            for request in batch:
+                self._queue_delays.append(started - request.enqueued_at)
+                self._completions.append(finished)
@@ -0,0 +1,365 @@
+"""
+Intent classification with sentence embeddings and a calibrated logistic head
+"""
+import json
+import re
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+INTENTS_PATH = Path(__file__).parent / "data" / "intents.json"
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+DIGITS_PATTERN = re.compile(r"\d+")
+
+
+def load_intent_catalog(path: Path = INTENTS_PATH) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Load the intent catalog
+
+    Args:
+        path: JSON file mapping each intent to its "keywords" and "examples"
+
+    Returns:
+        Dictionary of intent name to catalog entry
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class HashingEncoder:
+    """Dependency-free encoder hashing word and character n-grams into a fixed-size vector"""
+
+    name = "hashing"
+
+    def __init__(self, dim: int = 2 ** 14):
+        """
+        Initialize the encoder
+
+        Args:
+            dim: Embedding size (number of hash buckets)
+        """
+        self.dim = dim
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts
+
+        Args:
+            texts: Input texts
+
+        Returns:
+            L2-normalized float32 matrix of shape (len(texts), dim)
+        """
+        embeddings = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, count in self._features(text).items():
+                bucket = zlib.crc32(feature.encode("utf-8"))
+                # The top hash bit picks a sign so collisions cancel rather than accumulate
+                sign = 1.0 if bucket & 0x80000000 else -1.0
+                embeddings[row, bucket % self.dim] += sign * (1.0 + np.log(count))
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings / np.maximum(norms, 1e-8)
+
+    @staticmethod
+    def _features(text: str) -> Counter:
+        # Account numbers and amounts vary per query; only their presence matters
+        tokens = TOKEN_PATTERN.findall(DIGITS_PATTERN.sub("0", text.lower()))
+        features = Counter(f"w:{token}" for token in tokens)
+        features.update(f"b:{a} {b}" for a, b in zip(tokens, tokens[1:]))
+        for token in tokens:
+            padded = f"<{token}>"
+            features.update(f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2))
+        return features
+
+
+class TransformerEncoder:
+    """Mean-pooled sentence embeddings from a small Hugging Face encoder"""
+
+    name = "transformer"
+
+    def __init__(
+        self,
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        device: Optional[str] = None,
+        batch_size: int = 32
+    ):
+        """
+        Load the encoder
+
+        Args:
+            model_name: Hugging Face model ID of a sentence embedding model
+            device: Torch device; cuda when available if None
+            batch_size: Maximum texts per forward pass
+        """
+        # Imported here so the hashing encoder never pays for loading torch
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+
+        self.torch = torch
+        self.model_name = model_name
+        self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+        self.batch_size = batch_size
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModel.from_pretrained(model_name).to(self.device).eval()
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts
+
+        Args:
+            texts: Input texts
+
+        Returns:
+            L2-normalized float32 matrix of shape (len(texts), hidden_size)
+        """
+        chunks = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = self.tokenizer(
+                texts[start:start + self.batch_size],
+                padding=True,
+                truncation=True,
+                max_length=64,
+                return_tensors="pt"
+            ).to(self.device)
+            with self.torch.inference_mode():
+                hidden = self.model(**batch).last_hidden_state
+            mask = batch["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+            pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+            chunks.append(self.torch.nn.functional.normalize(pooled, dim=1).cpu().numpy())
+        if not chunks:
+            return np.zeros((0, self.model.config.hidden_size), dtype=np.float32)
+        return np.concatenate(chunks).astype(np.float32)
+
+
+class OnnxEncoder:
+    """
+    The transformer encoder exported by export_intent_onnx.py, run with ONNX Runtime.
+    Uses the standalone tokenizers library, so torch and transformers are never imported.
+    """
+
+    name = "onnx"
+
+    def __init__(self, model_dir: Path, quantized: bool = True, batch_size: int = 32, num_threads: int = 0):
+        """
+        Load the exported graph and tokenizer
+
+        Args:
+            model_dir: Directory written by export_intent_onnx.py
+            quantized: Load the int8 graph (model.int8.onnx) instead of model.onnx
+            batch_size: Maximum texts per run
+            num_threads: Intra-op threads for ONNX Runtime (0 lets it decide)
+        """
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        model_dir = Path(model_dir)
+        model_path = model_dir / ("model.int8.onnx" if quantized else "model.onnx")
+        if not model_path.exists():
+            raise FileNotFoundError(f"{model_path} not found. Run: python export_intent_onnx.py --output {model_dir}")
+
+        self.model_name = str(model_path)
+        self.batch_size = batch_size
+        self.tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=64)
+        self.tokenizer.enable_padding()
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = num_threads
+        self.session = onnxruntime.InferenceSession(str(model_path), options, providers=["CPUExecutionProvider"])
+        self.input_names = {graph_input.name for graph_input in self.session.get_inputs()}
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts
+
+        Args:
+            texts: Input texts
+
+        Returns:
+            L2-normalized float32 matrix of shape (len(texts), hidden_size)
+        """
+        chunks = []
+        for start in range(0, len(texts), self.batch_size):
+            encodings = self.tokenizer.encode_batch(texts[start:start + self.batch_size])
+            feeds = {
+                "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+                "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            }
+            if "token_type_ids" in self.input_names:
+                feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+            hidden = self.session.run(None, feeds)[0]
+            mask = feeds["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            chunks.append(pooled / np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12))
+        if not chunks:
+            return np.zeros((0, self.session.get_outputs()[0].shape[-1]), dtype=np.float32)
+        return np.concatenate(chunks).astype(np.float32)
+
+
+def create_encoder(
+    encoder: str = "transformer",
+    model_name: Optional[str] = None,
+    onnx_dir: Optional[Path] = None,
+    onnx_quantized: bool = True
+):
+    """
+    Instantiate a sentence encoder by name
+
+    Args:
+        encoder: "transformer", "onnx" or "hashing"
+        model_name: Hugging Face model ID for the transformer encoder
+        onnx_dir: Directory with the exported graph for the onnx encoder
+        onnx_quantized: Whether the onnx encoder loads the int8 graph
+
+    Returns:
+        The encoder
+    """
+    if encoder == HashingEncoder.name:
+        return HashingEncoder()
+    if encoder == TransformerEncoder.name:
+        return TransformerEncoder(model_name) if model_name else TransformerEncoder()
+    if encoder == OnnxEncoder.name:
+        if onnx_dir is None:
+            raise ValueError("onnx_dir is required for the onnx intent encoder")
+        return OnnxEncoder(onnx_dir, quantized=onnx_quantized)
+    raise ValueError(f"Unknown intent encoder '{encoder}'. Choose one of: transformer, onnx, hashing")
+
+
+class IntentClassifier:
+    """Multinomial logistic regression over sentence embeddings with temperature-scaled confidence"""
+
+    def __init__(self, encoder, l2: float = 1e-3, max_iter: int = 500, calibration_folds: int = 4):
+        """
+        Initialize the classifier
+
+        Args:
+            encoder: Object with an encode(texts) -> ndarray method
+            l2: Weight decay for the logistic head
+            max_iter: Gradient descent iterations
+            calibration_folds: Cross-validation folds used to fit the temperature
+        """
+        self.encoder = encoder
+        self.l2 = l2
+        self.max_iter = max_iter
+        self.calibration_folds = calibration_folds
+
+        self.labels: List[str] = []
+        self.weights: Optional[np.ndarray] = None
+        self.bias: Optional[np.ndarray] = None
+        self.temperature = 1.0
+
+    def fit(self, examples: Dict[str, List[str]]) -> "IntentClassifier":
+        """
+        Train the head on example utterances
+
+        Args:
+            examples: Dictionary of intent name to example utterances
+
+        Returns:
+            self
+        """
+        self.labels = sorted(intent for intent, texts in examples.items() if texts)
+        if len(self.labels) < 2:
+            raise ValueError("At least two intents with examples are required")
+
+        texts = [text for label in self.labels for text in examples[label]]
+        y = np.array([i for i, label in enumerate(self.labels) for _ in examples[label]])
+        X = self.encoder.encode(texts)
+
+        self.temperature = self._calibrate(X, y)
+        self.weights, self.bias = self._train(X, y)
+        return self
+
+    def predict_proba(self, texts: List[str]) -> np.ndarray:
+        """
+        Calibrated intent probabilities
+
+        Args:
+            texts: Input texts
+
+        Returns:
+            Matrix of shape (len(texts), len(labels)); columns follow self.labels
+        """
+        if self.weights is None:
+            raise RuntimeError("IntentClassifier.fit must be called before predicting")
+        if not texts:
+            return np.zeros((0, len(self.labels)), dtype=np.float32)
+        logits = self.encoder.encode(texts) @ self.weights + self.bias
+        return _softmax(logits / self.temperature)
+
+    def predict(self, texts: List[str]) -> List[Dict]:
+        """
+        Predict the most likely intent for each text in one batch
+
+        Args:
+            texts: Input texts
+
+        Returns:
+            List of dictionaries with intent, confidence and per-intent scores
+        """
+        results = []
+        for probs in self.predict_proba(texts):
+            best = int(np.argmax(probs))
+            results.append({
+                "intent": self.labels[best],
+                "confidence": float(probs[best]),
+                "scores": {label: round(float(p), 4) for label, p in zip(self.labels, probs)},
+            })
+        return results
+
+    def _train(self, X: np.ndarray, y: np.ndarray):
+        """Fit weights and bias by full-batch gradient descent on the cross-entropy"""
+        n, n_classes = len(y), len(self.labels)
+        targets = np.eye(n_classes, dtype=np.float64)[y]
+
+        # With far fewer examples than dimensions, gradient descent keeps W in the
+        # span of the examples (W = X^T A), so iterate on the n x n Gram matrix instead
+        gram = X.astype(np.float64) @ X.T.astype(np.float64)
+        step = 1.0 / (0.5 * np.linalg.eigvalsh(gram)[-1] / n + 2 * self.l2)
+        coef = np.zeros((n, n_classes))
+        bias = np.zeros(n_classes)
+        for _ in range(self.max_iter):
+            error = (_softmax(gram @ coef + bias) - targets) / n
+            coef -= step * (error + 2 * self.l2 * coef)
+            bias -= step * error.sum(axis=0)
+
+        return (X.T.astype(np.float64) @ coef).astype(np.float32), bias.astype(np.float32)
+
+    def _calibrate(self, X: np.ndarray, y: np.ndarray) -> float:
+        """Pick the softmax temperature minimizing held-out log loss across folds"""
+        folds = min(self.calibration_folds, int(np.bincount(y).min()))
+        if folds < 2:
+            return 1.0
+
+        # Stratified assignment: each intent's examples are spread round-robin over folds
+        fold_of = np.zeros(len(y), dtype=int)
+        for label in np.unique(y):
+            members = np.flatnonzero(y == label)
+            fold_of[members] = np.arange(len(members)) % folds
+
+        held_out_logits = np.zeros((len(y), len(self.labels)))
+        for fold in range(folds):
+            train, test = fold_of != fold, fold_of == fold
+            weights, bias = self._train(X[train], y[train])
+            held_out_logits[test] = X[test] @ weights + bias
+
+        temperatures = np.logspace(-1.5, 1.5, 61)
+        losses = [
+            -np.log(_softmax(held_out_logits / t)[np.arange(len(y)), y] + 1e-12).mean()
+            for t in temperatures
+        ]
+        return float(temperatures[int(np.argmin(losses))])
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    shifted = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(shifted)
+    return exp / exp.sum(axis=1, keepdims=True)
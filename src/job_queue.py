@@ -0,0 +1,342 @@
+"""
+Background job queue for running the voice pipeline off the request thread
+"""
+import os
+import queue
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATES = ("done", "failed")
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue is at its configured depth limit"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Job queue is full")
+        self.retry_after = retry_after
+
+
+class Job:
+    """A single queued unit of pipeline work and its progress history"""
+
+    def __init__(self, payload: Any, on_change: Optional[Callable[["Job"], None]] = None):
+        self.id = uuid.uuid4().hex
+        self.on_change = on_change
+        self.payload = payload
+        self.status = "queued"  # queued, running, done, failed
+        self.stage = "queued"
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.events: List[Dict] = []
+        self._changed = threading.Condition()
+        self._record("queued")
+
+    def set_stage(self, stage: str):
+        """
+        Report pipeline progress
+
+        Args:
+            stage: Name of the stage the job has entered
+        """
+        self.stage = stage
+        self._record("stage")
+
+    def to_dict(self) -> Dict:
+        """
+        Serialize job status for the API
+
+        Returns:
+            Dictionary with status, stage, timings, result and error
+        """
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "stage": self.stage,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error,
+        }
+
+    def wait_for_events(self, since: int, timeout: float) -> List[Dict]:
+        """
+        Block until there are events newer than ``since`` or the timeout elapses
+
+        Args:
+            since: Number of events the caller has already seen
+            timeout: Maximum seconds to wait
+
+        Returns:
+            List of new events (possibly empty on timeout)
+        """
+        with self._changed:
+            if len(self.events) <= since and self.status not in TERMINAL_STATES:
+                self._changed.wait(timeout)
+            return self.events[since:]
+
+    def _start(self):
+        self.status = "running"
+        self.started_at = time.time()
+        self._record("started")
+
+    def _finish(self, result: Optional[Dict] = None, error: Optional[str] = None):
+        self.finished_at = time.time()
+        self.result = result
+        self.error = error
+        self.status = "failed" if error else "done"
+        self.stage = self.status
+        self._record(self.status)
+        # Payloads can be large (uploaded audio); nothing needs them once finished
+        self.payload = None
+
+    def _record(self, event_type: str):
+        with self._changed:
+            self.events.append({
+                "event": event_type,
+                "status": self.status,
+                "stage": self.stage,
+                "timestamp": time.time(),
+            })
+            self._changed.notify_all()
+        if self.on_change:
+            self.on_change(self)
+
+
+class JobQueue:
+    """Bounded queue drained by a fixed pool of pipeline worker threads"""
+
+    def __init__(
+        self,
+        handler: Callable[[Job], Optional[Dict]],
+        num_workers: int = 2,
+        max_depth: int = 16,
+        result_ttl: int = 600,
+        store: Optional[Any] = None
+    ):
+        """
+        Initialize the job queue
+
+        Args:
+            handler: Callable run for each job; returns the job result or raises on failure
+            num_workers: Number of pipeline worker threads
+            max_depth: Maximum number of jobs waiting in the queue before rejecting
+            result_ttl: Seconds to keep finished jobs around for polling
+            store: Optional shared status store (e.g. DatabaseManager) with save_job/get_job/purge_jobs,
+                so any worker process can answer polls for a job another process is running
+        """
+        self.handler = handler
+        self.store = store
+        self.num_workers = max(1, num_workers)
+        self.max_depth = max(1, max_depth)
+        self.result_ttl = result_ttl
+
+        self._queue: "queue.Queue[Job]" = queue.Queue(maxsize=self.max_depth)
+        self._jobs: Dict[str, Job] = {}
+        self._jobs_lock = threading.Lock()
+        self._workers: List[threading.Thread] = []
+        self._workers_pid: Optional[int] = None
+        self._avg_job_seconds = 5.0
+
+    def submit(self, payload: Any) -> Job:
+        """
+        Queue a new job
+
+        Args:
+            payload: Data handed to the handler via ``job.payload``
+
+        Returns:
+            The queued Job
+
+        Raises:
+            QueueFullError: If the queue is at its depth limit
+        """
+        self._ensure_workers()
+        self._purge_expired()
+
+        job = Job(payload)
+        if self.store is not None:
+            # Persist before a worker can pick the job up, so the shared row never
+            # misses (or overwrites) a transition made by a fast worker
+            job.on_change = self._persist
+            self._persist(job)
+        with self._jobs_lock:
+            self._jobs[job.id] = job
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._jobs_lock:
+                del self._jobs[job.id]
+            # The caller never learns this job's ID; the row is purged with the other finished jobs
+            job._finish(error="Rejected: job queue is full")
+            raise QueueFullError(self.estimate_retry_after())
+
+        logger.info(f"Queued job {job.id} (depth {self._queue.qsize()}/{self.max_depth})")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """
+        Look up a job by ID
+
+        Args:
+            job_id: Job identifier
+
+        Returns:
+            The Job or None if unknown or expired
+        """
+        with self._jobs_lock:
+            return self._jobs.get(job_id)
+
+    def get_status(self, job_id: str) -> Optional[Dict]:
+        """
+        Get a job's status, whichever process is running it
+
+        Args:
+            job_id: Job identifier
+
+        Returns:
+            Job dictionary or None if unknown or expired
+        """
+        job = self.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        if self.store is not None:
+            return self.store.get_job(job_id)
+        return None
+
+    def stream(self, job_id: str, heartbeat: float = 15.0, poll_interval: float = 0.5) -> Iterator[Optional[Dict]]:
+        """
+        Follow a job's progress until it reaches a terminal state
+
+        Args:
+            job_id: Job identifier
+            heartbeat: Seconds of silence after which a None heartbeat is yielded
+            poll_interval: Seconds between shared-store polls for jobs owned by another process
+
+        Yields:
+            Event dictionaries as the job changes, or None as an idle heartbeat
+        """
+        job = self.get(job_id)
+        if job is not None:
+            seen = 0
+            while True:
+                events = job.wait_for_events(seen, timeout=heartbeat)
+                if not events:
+                    yield None
+                    continue
+                seen += len(events)
+                for event in events:
+                    yield event
+                if job.status in TERMINAL_STATES:
+                    return
+
+        # Job is owned by another worker process: follow it through the shared store
+        last_seen = None
+        last_yield = time.time()
+        while self.store is not None:
+            status = self.store.get_job(job_id)
+            if status is None:
+                return
+            current = (status["status"], status["stage"])
+            if current != last_seen:
+                last_seen = current
+                last_yield = time.time()
+                yield {"event": "stage", "status": status["status"], "stage": status["stage"], "timestamp": last_yield}
+            if status["status"] in TERMINAL_STATES:
+                return
+            if time.time() - last_yield >= heartbeat:
+                last_yield = time.time()
+                yield None
+            time.sleep(poll_interval)
+
+    def estimate_retry_after(self) -> int:
+        """
+        Estimate how long a rejected client should wait before retrying
+
+        Returns:
+            Seconds until roughly one queue slot frees up
+        """
+        depth = self._queue.qsize()
+        return max(1, int(round(self._avg_job_seconds * depth / self.num_workers)))
+
+    def get_stats(self) -> Dict:
+        """
+        Get queue statistics
+
+        Returns:
+            Dictionary with queue depth, capacity and worker count
+        """
+        with self._jobs_lock:
+            running = sum(1 for job in self._jobs.values() if job.status == "running")
+        return {
+            "queue_depth": self._queue.qsize(),
+            "max_depth": self.max_depth,
+            "workers": self.num_workers,
+            "running": running,
+            "average_job_seconds": round(self._avg_job_seconds, 3),
+        }
+
+    def _ensure_workers(self):
+        """Start worker threads in this process (threads do not survive a fork)"""
+        if self._workers_pid == os.getpid():
+            return
+
+        with self._jobs_lock:
+            if self._workers_pid == os.getpid():
+                return
+            self._workers = []
+            for i in range(self.num_workers):
+                worker = threading.Thread(target=self._worker_loop, name=f"pipeline-worker-{i}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+            self._workers_pid = os.getpid()
+            logger.info(f"Started {self.num_workers} pipeline workers in process {self._workers_pid}")
+
+    def _worker_loop(self):
+        """Drain the queue forever"""
+        while True:
+            job = self._queue.get()
+            try:
+                self._run(job)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, job: Job):
+        """Execute one job through the handler"""
+        job._start()
+        try:
+            result = self.handler(job)
+            job._finish(result=result)
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {str(e)}")
+            job._finish(error=str(e))
+
+        # Exponential moving average keeps Retry-After estimates current
+        duration = job.finished_at - job.started_at
+        self._avg_job_seconds = 0.8 * self._avg_job_seconds + 0.2 * duration
+
+    def _persist(self, job: Job):
+        """Mirror a job's status into the shared store"""
+        self.store.save_job(job.to_dict())
+
+    def _purge_expired(self):
+        """Forget finished jobs older than the result TTL"""
+        cutoff = time.time() - self.result_ttl
+        with self._jobs_lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job.finished_at is not None and job.finished_at < cutoff
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+        if expired and self.store is not None:
+            self.store.purge_jobs(self.result_ttl)
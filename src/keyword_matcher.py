@@ -0,0 +1,175 @@
+"""
+Compiled keyword matcher for intent catalogs
+"""
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import logging
+
+from src.intent_classifier import INTENTS_PATH, load_intent_catalog
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _trie_pattern(phrases: List[str]) -> str:
+    """
+    Build a regex alternation shaped like a trie of the phrases, so matching costs
+    the length of the longest phrase per position instead of the number of phrases
+
+    Args:
+        phrases: Normalized phrases
+
+    Returns:
+        Regex source matching any of the phrases, preferring the longest
+    """
+    trie: Dict = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def build(node: Dict) -> str:
+        terminal = "" in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # Greedy optional: try the longer phrase first, backtrack to the shorter one
+        return f"(?:{body})?" if terminal else body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """
+    Scores intents by weighted keyword phrases found on token boundaries. All
+    phrases are compiled into one trie-shaped regex that scans the text once, and
+    the catalog is reloaded when its file changes.
+
+    Catalog keywords are either plain strings (weight 1.0) or objects of the form
+    {"phrase": "...", "weight": 2.0}.
+    """
+
+    def __init__(self, path: Path = INTENTS_PATH, check_interval: float = 2.0):
+        """
+        Load and compile the catalog
+
+        Args:
+            path: Intent catalog JSON file
+            check_interval: Minimum seconds between file modification checks
+        """
+        self.path = Path(path)
+        self.check_interval = check_interval
+
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._mtime: Optional[float] = None
+        # (compiled pattern, phrase -> [(intent, weight)], intent names), swapped as one unit
+        self._compiled: Tuple[Optional[re.Pattern], Dict[str, List[Tuple[str, float]]], List[str]] = (None, {}, [])
+        self.reload()
+
+    @property
+    def intents(self) -> List[str]:
+        return list(self._compiled[2])
+
+    def reload(self) -> bool:
+        """
+        Re-read and recompile the catalog
+
+        Returns:
+            True if the catalog was loaded, False if it could not be read or parsed (the
+            previous one is kept)
+        """
+        mtime = None
+        try:
+            mtime = os.path.getmtime(self.path)
+            catalog = load_intent_catalog(self.path)
+
+            # Parse everything before swapping, so a bad entry cannot leave a half-built catalog
+            phrases: Dict[str, List[Tuple[str, float]]] = {}
+            for intent, entry in catalog.items():
+                for keyword in entry.get("keywords", []):
+                    if isinstance(keyword, dict):
+                        phrase, weight = keyword.get("phrase", ""), float(keyword.get("weight", 1.0))
+                    else:
+                        phrase, weight = keyword, 1.0
+                    phrase = _normalize(phrase)
+                    if phrase:
+                        phrases.setdefault(phrase, []).append((intent, weight))
+
+            pattern = None
+            if phrases:
+                pattern = re.compile(r"(?<!\w)(?:" + _trie_pattern(list(phrases)) + r")(?!\w)")
+        except Exception as e:
+            logger.error(f"Error loading intent catalog {self.path}: {str(e)}")
+            if mtime is not None:
+                # Not retried until the file changes again
+                with self._lock:
+                    self._mtime = mtime
+            return False
+
+        with self._lock:
+            self._compiled = (pattern, phrases, list(catalog))
+            self._mtime = mtime
+        logger.info(f"Compiled {len(phrases)} keyword phrases for {len(catalog)} intents")
+        return True
+
+    def maybe_reload(self):
+        """Reload the catalog if its file changed since the last load (rate-limited)"""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked_at < self.check_interval:
+                return
+            self._checked_at = now
+            known_mtime = self._mtime
+        try:
+            changed = os.path.getmtime(self.path) != known_mtime
+        except OSError:
+            return
+        if changed:
+            self.reload()
+
+    def score(self, text: str) -> Dict[str, float]:
+        """
+        Sum matched phrase weights per intent
+
+        Args:
+            text: Input text
+
+        Returns:
+            Dictionary of intent to score (only intents with a match)
+        """
+        self.maybe_reload()
+        pattern, phrases, _ = self._compiled
+        scores: Dict[str, float] = {}
+        if pattern is None:
+            return scores
+        for match in pattern.finditer(_normalize(text)):
+            for intent, weight in phrases[match.group(0)]:
+                scores[intent] = scores.get(intent, 0.0) + weight
+        return scores
+
+    def match(self, text: str, default: str = "general") -> str:
+        """
+        Pick the intent with the highest keyword score
+
+        Args:
+            text: Input text
+            default: Intent returned when nothing matches
+
+        Returns:
+            Detected intent
+        """
+        scores = self.score(text)
+        if not scores:
+            return default
+        return max(scores, key=scores.get)
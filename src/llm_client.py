@@ -0,0 +1,409 @@
+"""
+Deadline-aware async LLM client with bounded retries and hedged requests
+"""
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from typing import AsyncIterator, Callable, Dict, Iterator, Optional
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the attempt latency histogram buckets; the last bucket is open-ended
+HISTOGRAM_BOUNDS = (50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000)
+
+
+class LLMDeadlineExceeded(Exception):
+    """No attempt succeeded before the deadline budget or the attempt timeouts ran out"""
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Timeouts, rate limits, server errors and connection failures are retried; other client errors are not"""
+    code = getattr(error, "code", None) or getattr(error, "status_code", None)
+    if isinstance(code, int) and 400 <= code < 500:
+        return code in (408, 429)
+    return True
+
+
+class LatencyHistogram:
+    """Bucketed latency counts plus a window of recent samples for percentiles"""
+
+    def __init__(self, window: int = 512):
+        self.counts = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+        self.samples: "deque[float]" = deque(maxlen=window)
+        self.total_ms = 0.0
+
+    def record(self, latency_ms: float):
+        index = next((i for i, bound in enumerate(HISTOGRAM_BOUNDS) if latency_ms < bound), len(HISTOGRAM_BOUNDS))
+        self.counts[index] += 1
+        self.samples.append(latency_ms)
+        self.total_ms += latency_ms
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+    def snapshot(self) -> Dict:
+        count = sum(self.counts)
+        buckets = {}
+        lower = 0
+        for bound, bucket_count in zip(HISTOGRAM_BOUNDS, self.counts):
+            buckets[f"{lower}-{bound}"] = bucket_count
+            lower = bound
+        buckets[f"{lower}+"] = self.counts[-1]
+        p50, p95 = self.percentile(50), self.percentile(95)
+        return {
+            "count": count,
+            "average_ms": round(self.total_ms / count, 2) if count else 0.0,
+            "p50_ms": round(p50, 2) if p50 is not None else None,
+            "p95_ms": round(p95, 2) if p95 is not None else None,
+            "buckets": buckets,
+        }
+
+
+class GeminiTransport:
+    """Async transport over the google-genai client"""
+
+    def __init__(self, client, model_name: str):
+        """
+        Initialize the transport
+
+        Args:
+            client: genai.Client
+            model_name: Gemini model to call
+        """
+        self.client = client
+        self.model_name = model_name
+
+    async def generate(self, prompt: str) -> str:
+        response = await self.client.aio.models.generate_content(model=self.model_name, contents=prompt)
+        return response.text.strip()
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        chunks = await self.client.aio.models.generate_content_stream(model=self.model_name, contents=prompt)
+        async for chunk in chunks:
+            if chunk.text:
+                yield chunk.text
+
+    async def connect(self):
+        """Open a pooled connection with a metadata request (no tokens are generated)"""
+        await self.client.aio.models.get(model=self.model_name)
+
+
+class LLMClient:
+    """
+    Runs LLM requests under a per-request deadline. Each attempt is bounded by an
+    attempt timeout, failed attempts are retried with full-jitter backoff while the
+    budget allows, and a hedge request is fired when the first attempt is slower
+    than the observed p95 (the first one to succeed wins, the other is cancelled).
+
+    The transport is any object with async generate(prompt) -> str and
+    stream(prompt) -> async iterator of str, so a local fake can stand in for Gemini.
+    Requests run on one private event loop thread; the sync generate() and stream()
+    wrappers can be called from any worker thread.
+    """
+
+    def __init__(
+        self,
+        transport,
+        deadline_ms: float = 10000,
+        attempt_timeout_ms: float = 6000,
+        max_retries: int = 2,
+        backoff_ms: float = 200,
+        hedge_enabled: bool = True,
+        hedge_delay_ms: Optional[float] = None,
+        hedge_min_samples: int = 20,
+        on_attempt: Optional[Callable[[str, float], None]] = None
+    ):
+        """
+        Initialize the client
+
+        Args:
+            transport: Async transport (e.g., GeminiTransport)
+            deadline_ms: Default total budget per request, across all attempts
+            attempt_timeout_ms: Maximum time for a single attempt (including its hedge)
+            max_retries: Retries after the first failed attempt
+            backoff_ms: Base backoff; retry n sleeps uniformly in [0, backoff_ms * 2**(n-1)]
+            hedge_enabled: Fire a second request when the first is slow
+            hedge_delay_ms: Fixed hedge delay; if None, the p95 of successful attempts is used
+                once hedge_min_samples have been seen (no hedging before that)
+            hedge_min_samples: Successful attempts required before the observed p95 is trusted
+            on_attempt: Called with (outcome, latency_ms) after every attempt, where outcome is
+                "success", "error", "timeout" or "cancelled" (lost a hedge race)
+        """
+        self.transport = transport
+        self.deadline_ms = deadline_ms
+        self.attempt_timeout_ms = attempt_timeout_ms
+        self.max_retries = max(0, max_retries)
+        self.backoff_ms = backoff_ms
+        self.hedge_enabled = hedge_enabled
+        self.hedge_delay_ms = hedge_delay_ms
+        self.hedge_min_samples = hedge_min_samples
+        self.on_attempt = on_attempt
+
+        self._lock = threading.Lock()
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.stats = {
+            "requests": 0,
+            "attempts": 0,
+            "retries": 0,
+            "hedges": 0,
+            "hedge_wins": 0,
+            "deadline_exceeded": 0,
+            "failures": 0,
+        }
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_lock = threading.Lock()
+
+    def generate(self, prompt: str, deadline_ms: Optional[float] = None) -> str:
+        """
+        Generate a response, blocking the calling thread
+
+        Args:
+            prompt: Full prompt text
+            deadline_ms: Total budget for this request (default: the client's deadline_ms)
+
+        Returns:
+            Response text
+
+        Raises:
+            LLMDeadlineExceeded: If no attempt succeeded within the budget
+            Exception: The last transport error, if it is not retryable or retries are exhausted
+        """
+        return self.run(self.generate_async(prompt, deadline_ms))
+
+    def stream(self, prompt: str, deadline_ms: Optional[float] = None) -> Iterator[str]:
+        """
+        Stream a response, blocking the calling thread between pieces
+
+        Args:
+            prompt: Full prompt text
+            deadline_ms: Total budget for the whole stream
+
+        Yields:
+            Pieces of the response text
+
+        Raises:
+            LLMDeadlineExceeded: If the budget ran out (possibly after some pieces were yielded)
+        """
+        loop = self._get_loop()
+        pieces = self.stream_async(prompt, deadline_ms)
+        try:
+            while True:
+                try:
+                    yield asyncio.run_coroutine_threadsafe(pieces.__anext__(), loop).result()
+                except StopAsyncIteration:
+                    return
+        finally:
+            asyncio.run_coroutine_threadsafe(pieces.aclose(), loop).result()
+
+    def run(self, coroutine, timeout: Optional[float] = None):
+        """Run a coroutine on the client's event loop and wait for its result"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self._get_loop()).result(timeout)
+
+    def warm_up(self, timeout_ms: Optional[float] = None):
+        """
+        Start the event loop thread and let the transport open its connections
+        (transports without connect() only get the loop)
+
+        Args:
+            timeout_ms: Time limit; defaults to the request deadline
+        """
+        connect = getattr(self.transport, "connect", None)
+        if connect is None:
+            self._get_loop()
+            return
+        self.run(connect(), (timeout_ms or self.deadline_ms) / 1000)
+
+    async def generate_async(self, prompt: str, deadline_ms: Optional[float] = None) -> str:
+        """
+        Generate a response
+
+        Args:
+            prompt: Full prompt text
+            deadline_ms: Total budget for this request (default: the client's deadline_ms)
+
+        Returns:
+            Response text
+        """
+        self._count("requests")
+        deadline = time.monotonic() + (deadline_ms or self.deadline_ms) / 1000
+        attempt = 0
+        while True:
+            try:
+                return await self._hedged(prompt, min(deadline - time.monotonic(), self.attempt_timeout_ms / 1000))
+            except Exception as e:
+                if not await self._backoff(e, attempt, deadline):
+                    self._fail(e)
+            attempt += 1
+
+    async def stream_async(self, prompt: str, deadline_ms: Optional[float] = None) -> AsyncIterator[str]:
+        """
+        Stream a response. Attempts are retried only until the first piece arrives,
+        since a partially spoken answer cannot be restarted; streams are not hedged.
+
+        Args:
+            prompt: Full prompt text
+            deadline_ms: Total budget for the whole stream
+
+        Yields:
+            Pieces of the response text
+        """
+        self._count("requests")
+        deadline = time.monotonic() + (deadline_ms or self.deadline_ms) / 1000
+        attempt = 0
+        while True:
+            self._count("attempts")
+            start = time.perf_counter()
+            pieces = self.transport.stream(prompt)
+            received = False
+            try:
+                while True:
+                    # Until the first piece, a single attempt is also bounded by the attempt timeout
+                    limit = deadline - time.monotonic()
+                    if not received:
+                        limit = min(limit, self.attempt_timeout_ms / 1000 - (time.perf_counter() - start))
+                    if limit <= 0:
+                        raise asyncio.TimeoutError()
+                    try:
+                        piece = await asyncio.wait_for(pieces.__anext__(), timeout=limit)
+                    except StopAsyncIteration:
+                        break
+                    received = True
+                    yield piece
+                self._record("success", start)
+                return
+            except Exception as e:
+                self._record("timeout" if isinstance(e, asyncio.TimeoutError) else "error", start)
+                if received or not await self._backoff(e, attempt, deadline):
+                    self._fail(e)
+            finally:
+                await pieces.aclose()
+            attempt += 1
+
+    def get_stats(self) -> Dict:
+        """
+        Get client statistics for this process
+
+        Returns:
+            Dictionary with request/attempt counters, the current hedge delay and
+            per-outcome attempt latency histograms
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["attempts_latency"] = {outcome: h.snapshot() for outcome, h in self.histograms.items()}
+        hedge_delay = self._hedge_delay()
+        stats["hedge_delay_ms"] = round(hedge_delay * 1000, 2) if hedge_delay is not None else None
+        return stats
+
+    async def _hedged(self, prompt: str, timeout: float) -> str:
+        """One attempt, plus a hedge request if it is still running after the hedge delay"""
+        start = time.monotonic()
+        if timeout <= 0:
+            raise asyncio.TimeoutError()
+        started = {self._launch(prompt): time.perf_counter()}
+        tasks = set(started)
+        primary = next(iter(tasks))
+        hedge_delay = self._hedge_delay()
+        hedge_at = start + hedge_delay if hedge_delay is not None and hedge_delay < timeout else None
+        timed_out = False
+        error: Optional[BaseException] = None
+        try:
+            while tasks:
+                wake = start + timeout if hedge_at is None else hedge_at
+                done, tasks = await asyncio.wait(
+                    tasks, timeout=max(0.0, wake - time.monotonic()), return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        self._record("success", started[task])
+                        if task is not primary:
+                            self._count("hedge_wins")
+                        return task.result()
+                    self._record("error", started[task])
+                    error = task.exception()
+                if done or not tasks:
+                    continue
+                if hedge_at is not None:
+                    # The primary is slower than usual; race a second request against it
+                    hedge_at = None
+                    self._count("hedges")
+                    hedge = self._launch(prompt)
+                    started[hedge] = time.perf_counter()
+                    tasks.add(hedge)
+                else:
+                    timed_out = True
+                    raise asyncio.TimeoutError()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+                self._record("timeout" if timed_out else "cancelled", started[task])
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _launch(self, prompt: str) -> "asyncio.Future":
+        self._count("attempts")
+        return asyncio.ensure_future(self.transport.generate(prompt))
+
+    async def _backoff(self, error: BaseException, attempt: int, deadline: float) -> bool:
+        """Sleep before the next retry. Returns False if the request should not be retried."""
+        if attempt >= self.max_retries or not is_retryable(error):
+            return False
+        delay = random.uniform(0, self.backoff_ms * 2 ** attempt) / 1000
+        if time.monotonic() + delay >= deadline:
+            return False
+        logger.info(f"LLM attempt {attempt + 1} failed ({type(error).__name__}); retrying")
+        self._count("retries")
+        await asyncio.sleep(delay)
+        return True
+
+    def _fail(self, error: BaseException):
+        """Give up on a request: timeouts surface as LLMDeadlineExceeded, anything else as is"""
+        if isinstance(error, asyncio.TimeoutError):
+            self._count("deadline_exceeded")
+            raise LLMDeadlineExceeded("LLM request timed out") from error
+        self._count("failures")
+        raise error
+
+    def _hedge_delay(self) -> Optional[float]:
+        """Seconds after which a hedge is fired, or None if hedging is off or not yet calibrated"""
+        if not self.hedge_enabled:
+            return None
+        if self.hedge_delay_ms is not None:
+            return self.hedge_delay_ms / 1000
+        with self._lock:
+            successes = self.histograms.get("success")
+            if successes is None or len(successes.samples) < self.hedge_min_samples:
+                return None
+            p95 = successes.percentile(95)
+        return p95 / 1000
+
+    def _count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _record(self, outcome: str, start: float):
+        latency_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self.histograms.setdefault(outcome, LatencyHistogram()).record(latency_ms)
+        if self.on_attempt:
+            try:
+                self.on_attempt(outcome, latency_ms)
+            except Exception as e:
+                logger.error(f"Error reporting LLM attempt: {str(e)}")
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """Start the private event loop thread on first use"""
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="llm-client-loop", daemon=True).start()
+                self._loop = loop
+            return self._loop
@@ -1,44 +1,56 @@
 """
-NLP module for intent detection using Hugging Face Transformers
+NLP module for intent detection using sentence embeddings
 """
 from typing import Dict, Optional, List
-from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
-import torch
+
+from config import settings
+from src.intent_classifier import IntentClassifier, create_encoder, load_intent_catalog
+from src.entity_extractor import entity_extractor
+from src.keyword_matcher import KeywordMatcher
 
 
 class NLPProcessor:
     """Handles Natural Language Understanding and Intent Detection"""
     
-    def __init__(self, model_name: str = "distilbert-base-uncased"):
+    def __init__(self, encoder: Optional[str] = None, model_name: Optional[str] = None):
         """
         Initialize the NLP processor
         
         Args:
-            model_name: Name of the Hugging Face model to use
+            encoder: Sentence encoder ("transformer", "onnx" or "hashing"). Defaults to settings.intent_encoder
+            model_name: Hugging Face model for the transformer encoder. Defaults to settings.intent_model
         """
-        self.model_name = model_name
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        encoder = encoder or settings.intent_encoder
+        self.model_name = model_name or settings.intent_model
+        self.min_confidence = settings.intent_min_confidence
+        
+        # Intents, their keywords and example utterances live in src/data/intents.json.
+        # Keyword edits are picked up without a restart; the classifier retrains on startup.
+        catalog = load_intent_catalog()
+        self.keyword_matcher = KeywordMatcher()
+        examples = {intent: entry.get("examples", []) for intent, entry in catalog.items()}
         
-        # Initialize intent classification pipeline
+        # Train the intent head from the example utterances
         try:
-            self.intent_classifier = pipeline(
-                "text-classification",
-                model=model_name,
-                device=0 if self.device == "cuda" else -1
-            )
+            self.intent_classifier = IntentClassifier(self._load_encoder(encoder)).fit(examples)
         except Exception as e:
-            print(f"Error loading NLP model: {str(e)}")
+            print(f"Error loading intent classifier: {str(e)}")
             self.intent_classifier = None
-        
-        # Predefined intents (you can expand this)
-        self.intents = {
-            "greeting": ["hello", "hi", "hey", "good morning", "good afternoon"],
-            "farewell": ["goodbye", "bye", "see you", "thanks"],
-            "account_inquiry": ["account", "balance", "details", "information"],
-            "faq": ["what", "how", "where", "when", "why", "explain"],
-            "support": ["help", "support", "assist", "issue", "problem"],
-            "transaction": ["transaction", "transfer", "payment", "deposit", "withdraw"]
-        }
+    
+    def _load_encoder(self, encoder: str):
+        """Load the configured encoder, falling back to hashing if the transformer is unavailable"""
+        try:
+            return create_encoder(
+                encoder,
+                self.model_name,
+                onnx_dir=settings.intent_onnx_dir,
+                onnx_quantized=settings.intent_onnx_quantized
+            )
+        except Exception as e:
+            if encoder == "hashing":
+                raise
+            print(f"Error loading {encoder} encoder, using hashing encoder instead: {str(e)}")
+            return create_encoder("hashing")
     
     def detect_intent(self, text: str) -> Dict[str, any]:
         """
@@ -50,26 +62,41 @@ class NLPProcessor:
         Returns:
             Dictionary with intent and confidence score
         """
+        return self.detect_intents([text])[0]
+    
+    def detect_intents(self, texts: List[str]) -> List[Dict[str, any]]:
+        """
+        Detect user intents for several texts in one batch
+        
+        Args:
+            texts: Input texts to analyze
+            
+        Returns:
+            List of dictionaries with intent, calibrated confidence and the source of the decision
+        """
         if not self.intent_classifier:
             # Fallback to keyword-based intent detection
-            return self._keyword_based_intent(text)
+            return [self._keyword_based_intent(text) for text in texts]
         
         try:
-            # Use transformer model for intent classification
-            result = self.intent_classifier(text)
-            
-            # Process result and match with predefined intents
-            intent = self._match_intent(text)
-            
-            return {
-                "intent": intent,
-                "confidence": result[0]["score"] if isinstance(result, list) else 0.5,
-                "text": text,
-                "model_prediction": result
-            }
+            predictions = self.intent_classifier.predict(texts)
         except Exception as e:
             print(f"Error in intent detection: {str(e)}")
-            return self._keyword_based_intent(text)
+            return [self._keyword_based_intent(text) for text in texts]
+        
+        results = []
+        for text, prediction in zip(texts, predictions):
+            intent, source = prediction["intent"], "model"
+            if prediction["confidence"] < self.min_confidence:
+                # Unsure model: trust an explicit keyword, otherwise treat as out of scope
+                intent, source = self._match_intent(text), "keywords"
+            results.append({
+                "intent": intent,
+                "confidence": prediction["confidence"],
+                "text": text,
+                "source": source
+            })
+        return results
     
     def _match_intent(self, text: str) -> str:
         """
@@ -81,20 +108,8 @@ class NLPProcessor:
         Returns:
             Detected intent
         """
-        text_lower = text.lower()
-        
-        # Score each intent
-        intent_scores = {}
-        for intent, keywords in self.intents.items():
-            score = sum(1 for keyword in keywords if keyword in text_lower)
-            if score > 0:
-                intent_scores[intent] = score
-        
-        if intent_scores:
-            # Return intent with highest score
-            return max(intent_scores, key=intent_scores.get)
-        
-        return "general"
+        # Single pass over the text with a compiled, token-boundary-aware matcher
+        return self.keyword_matcher.match(text)
     
     def _keyword_based_intent(self, text: str) -> Dict[str, any]:
         """
@@ -110,28 +125,19 @@ class NLPProcessor:
         return {
             "intent": intent,
             "confidence": 0.7,
-            "text": text
+            "text": text,
+            "source": "keywords"
         }
     
-    def extract_entities(self, text: str) -> List[Dict[str, str]]:
+    def extract_entities(self, text: str) -> List[Dict[str, any]]:
         """
-        Extract named entities from text (can be extended with NER model)
+        Extract typed entities from text in a single scan
         
         Args:
             text: Input text
             
         Returns:
-            List of entities
+            List of entities (account_number, phone_number, date, amount, number) with
+            normalized value, original text and start/end positions
         """
-        # Placeholder for entity extraction
-        # Can be extended with NER models like spaCy or transformers NER
-        entities = []
-        
-        # Simple example: extract numbers (could be account numbers, amounts, etc.)
-        import re
-        numbers = re.findall(r'\d+', text)
-        if numbers:
-            entities.append({"type": "number", "value": numbers[0]})
-        
-        return entities
-
+        return entity_extractor.extract(text)
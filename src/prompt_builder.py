@@ -0,0 +1,293 @@
+"""
+Token-budgeted prompt assembly for response generation
+"""
+import math
+import re
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+BASE_PROMPT = "You are a helpful and friendly customer service voice assistant."
+
+INTENT_PROMPTS = {
+    "greeting": "Respond warmly to the greeting and ask how you can help.",
+    "farewell": "Thank the user and wish them well.",
+    "account_inquiry": "Provide helpful information about account-related queries. Be concise and clear.",
+    "faq": "Answer frequently asked questions clearly and helpfully.",
+    "support": "Offer support and assistance. If you cannot resolve the issue, guide them to human support.",
+    "transaction": "Assist with transaction-related queries. Be careful with sensitive information."
+}
+DEFAULT_INTENT_PROMPT = "Provide helpful assistance."
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Approximate the LLM token count of a text without a tokenizer: one token per
+    punctuation mark and per started 4 characters of each word, which tracks
+    SentencePiece/BPE counts for English closely enough for budgeting.
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Estimated token count
+    """
+    return sum(math.ceil(len(piece) / 4) for piece in TOKEN_PATTERN.findall(text))
+
+
+def _format_value(value) -> str:
+    if isinstance(value, dict):
+        return ", ".join(f"{k}: {_format_value(v)}" for k, v in value.items() if v not in (None, "", [], {}))
+    if isinstance(value, (list, tuple)):
+        return "; ".join(_format_value(v) for v in value)
+    return str(value)
+
+
+def format_faq(faq) -> str:
+    """Render one FAQ entry: "Q: ... A: ..." for question/answer dicts, "key: value" pairs otherwise"""
+    if isinstance(faq, dict):
+        question = faq.get("question") or faq.get("q")
+        answer = faq.get("answer") or faq.get("a")
+        if question and answer:
+            return f"Q: {str(question).strip()} A: {str(answer).strip()}"
+    return _format_value(faq)
+
+
+class PromptBuilder:
+    """
+    Assembles prompts from a static per-intent prefix (built once) and context
+    sections that are fitted to a token budget: account fields first, then FAQ
+    entries in order of relevance to the query, with whatever doesn't fit dropped.
+    Conversation history has its own budget: the most recent turns first, then as
+    much of the session summary as still fits.
+
+    Sections are ordered from most to least stable (instructions, conversation
+    summary, recent turns, per-query context, query) so repeated prefixes can be
+    served from provider-side caches.
+    """
+
+    def __init__(
+        self,
+        context_token_budget: int = 600,
+        conversation_token_budget: int = 400,
+        encoder=None,
+        count_tokens: Callable[[str], int] = estimate_tokens
+    ):
+        """
+        Initialize the builder
+
+        Args:
+            context_token_budget: Maximum tokens of account/FAQ context in one prompt
+            conversation_token_budget: Maximum tokens of conversation summary and recent turns
+            encoder: Object with encode(texts) -> L2-normalized ndarray, used to rank FAQs;
+                word overlap with the query is used if None
+            count_tokens: Token counter (e.g., a real tokenizer); defaults to estimate_tokens
+        """
+        self.context_token_budget = context_token_budget
+        self.conversation_token_budget = conversation_token_budget
+        self.encoder = encoder
+        self.count_tokens = count_tokens
+
+        # intent -> (prefix, token count)
+        self.prefixes: Dict[str, Tuple[str, int]] = {
+            intent: self._prefix(instruction) for intent, instruction in INTENT_PROMPTS.items()
+        }
+        self.default_prefix = self._prefix(DEFAULT_INTENT_PROMPT)
+
+        self._lock = threading.Lock()
+        self.stats = {
+            "prompts": 0,
+            "total_tokens": 0,
+            "context_tokens": 0,
+            "conversation_tokens": 0,
+            "trimmed": 0,
+            "faqs_dropped": 0,
+        }
+
+    def build(self, user_query: str, intent: str, context: Optional[Dict] = None) -> Tuple[str, Dict]:
+        """
+        Build the full prompt for a query
+
+        Args:
+            user_query: The user's query text
+            intent: Detected intent
+            context: Additional context (e.g., account_info, faqs, and conversation as
+                {"summary", "turns"} from SessionStore)
+
+        Returns:
+            Tuple of (prompt text, size stats with tokens, context_tokens,
+            conversation_tokens, faqs_kept, faqs_total and trimmed)
+        """
+        context = context or {}
+        prefix, prefix_tokens = self.prefixes.get(intent, self.default_prefix)
+        summary, turns, conversation_tokens = self._fit_conversation(context.get("conversation"))
+        sections, context_tokens, faqs_kept, faqs_total, trimmed = self._fit_context(user_query, context)
+
+        prompt = f"{prefix}{summary}{turns}{''.join(sections)}\n\nUser: {user_query}\nAssistant:"
+        size = {
+            "tokens": prefix_tokens + conversation_tokens + context_tokens + self.count_tokens(user_query) + 4,
+            "context_tokens": context_tokens,
+            "conversation_tokens": conversation_tokens,
+            "faqs_kept": faqs_kept,
+            "faqs_total": faqs_total,
+            "trimmed": trimmed,
+        }
+        with self._lock:
+            self.stats["prompts"] += 1
+            self.stats["total_tokens"] += size["tokens"]
+            self.stats["context_tokens"] += context_tokens
+            self.stats["conversation_tokens"] += conversation_tokens
+            self.stats["trimmed"] += int(trimmed)
+            self.stats["faqs_dropped"] += faqs_total - faqs_kept
+        return prompt, size
+
+    def get_stats(self) -> Dict:
+        """
+        Get prompt size statistics for this process
+
+        Returns:
+            Dictionary with prompt count, average total/context tokens, how many prompts
+            had context trimmed and FAQ entries dropped
+        """
+        with self._lock:
+            stats = dict(self.stats)
+        prompts = stats.pop("prompts")
+        return {
+            "prompts": prompts,
+            "average_tokens": round(stats.pop("total_tokens") / prompts, 1) if prompts else 0.0,
+            "average_context_tokens": round(stats.pop("context_tokens") / prompts, 1) if prompts else 0.0,
+            "average_conversation_tokens": round(stats.pop("conversation_tokens") / prompts, 1) if prompts else 0.0,
+            "context_token_budget": self.context_token_budget,
+            "conversation_token_budget": self.conversation_token_budget,
+            **stats,
+        }
+
+    def _prefix(self, instruction: str) -> Tuple[str, int]:
+        text = f"{BASE_PROMPT} {instruction}"
+        return text, self.count_tokens(text)
+
+    def _fit_conversation(self, conversation: Optional[Dict]) -> Tuple[str, str, int]:
+        """Summary and recent-turn sections within the conversation budget: (summary, turns, tokens)"""
+        if not conversation:
+            return "", "", 0
+
+        remaining = self.conversation_token_budget
+        # Newest turns matter most for follow-ups; keep as many as fit, in order
+        kept = []
+        turns_header = "\nRecent conversation:"
+        remaining -= self.count_tokens(turns_header)
+        for turn in reversed(conversation.get("turns") or []):
+            line = f"\nUser: {turn['user']}\nAssistant: {turn['assistant']}"
+            line_tokens = self.count_tokens(line)
+            if line_tokens > remaining:
+                break
+            kept.insert(0, line)
+            remaining -= line_tokens
+        if not kept:
+            remaining += self.count_tokens(turns_header)
+        turns = turns_header + "".join(kept) if kept else ""
+
+        summary = ""
+        summary_text = conversation.get("summary") or ""
+        summary_header = "\nEarlier in this conversation:\n"
+        available = remaining - self.count_tokens(summary_header)
+        if summary_text and available > 1:
+            if self.count_tokens(summary_text) > available:
+                # Keep the most recent summary lines
+                lines = summary_text.splitlines()
+                while len(lines) > 1 and self.count_tokens("\n".join(lines)) > available:
+                    lines.pop(0)
+                summary_text = "\n".join(lines)
+                if self.count_tokens(summary_text) > available:
+                    summary_text = self._truncate(summary_text, available)
+            summary = summary_header + summary_text
+            remaining -= self.count_tokens(summary)
+
+        return summary, turns, self.conversation_token_budget - remaining
+
+    def _fit_context(self, user_query: str, context: Dict) -> Tuple[List[str], int, int, int, bool]:
+        """Context sections within the budget: (sections, tokens, faqs kept, faqs total, trimmed)"""
+        remaining = self.context_token_budget
+        sections = []
+        trimmed = False
+
+        account_info = context.get("account_info")
+        if account_info:
+            fields = account_info.items() if isinstance(account_info, dict) else [("details", account_info)]
+            header = "\nAccount Information: "
+            kept = []
+            cost = self.count_tokens(header)
+            for key, value in fields:
+                if value in (None, "", [], {}):
+                    continue
+                field = f"{key}: {_format_value(value)}"
+                field_tokens = self.count_tokens(field) + 1
+                if cost + field_tokens > remaining:
+                    trimmed = True
+                    continue
+                kept.append(field)
+                cost += field_tokens
+            if kept:
+                sections.append(header + "; ".join(kept))
+                remaining -= cost
+
+        faqs = context.get("faqs") or []
+        if isinstance(faqs, (str, dict)):
+            faqs = [faqs]
+        kept_faqs = []
+        if faqs:
+            header = "\nRelevant FAQs:"
+            available = remaining - self.count_tokens(header)
+            rendered = [format_faq(faq) for faq in faqs]
+            order = self._rank(user_query, rendered)
+            for index in order:
+                faq_tokens = self.count_tokens(rendered[index]) + 1
+                if faq_tokens <= available:
+                    kept_faqs.append(rendered[index])
+                    available -= faq_tokens
+                else:
+                    trimmed = True
+            if not kept_faqs and available > 1:
+                # Nothing fits whole; keep the start of the most relevant entry
+                kept_faqs.append(self._truncate(rendered[order[0]], available - 1))
+                available -= self.count_tokens(kept_faqs[0]) + 1
+            if kept_faqs:
+                sections.append(header + "".join(f"\n- {faq}" for faq in kept_faqs))
+                remaining = available
+
+        return sections, self.context_token_budget - remaining, len(kept_faqs), len(faqs), trimmed
+
+    def _rank(self, user_query: str, faqs: List[str]) -> List[int]:
+        """FAQ indexes, most relevant to the query first"""
+        if len(faqs) < 2:
+            return list(range(len(faqs)))
+        if self.encoder is not None:
+            try:
+                embeddings = self.encoder.encode([user_query] + faqs)
+                scores = embeddings[1:] @ embeddings[0]
+                return [int(i) for i in np.argsort(-scores, kind="stable")]
+            except Exception as e:
+                logger.error(f"Error ranking FAQs by embedding: {str(e)}")
+
+        query_words = {word for word in TOKEN_PATTERN.findall(user_query.lower()) if len(word) > 2}
+        scores = []
+        for faq in faqs:
+            faq_words = {word for word in TOKEN_PATTERN.findall(faq.lower()) if len(word) > 2}
+            scores.append(len(query_words & faq_words) / math.sqrt(len(faq_words) or 1))
+        return sorted(range(len(faqs)), key=lambda i: -scores[i])
+
+    def _truncate(self, text: str, max_tokens: int) -> str:
+        """Cut text at a word boundary so it fits max_tokens, marking the cut with "..." """
+        kept, cost = [], self.count_tokens("...")
+        for word in text.split():
+            cost += self.count_tokens(word)
+            if cost > max_tokens:
+                return " ".join(kept) + " ..."
+            kept.append(word)
+        return text
@@ -0,0 +1,278 @@
+"""
+Cache of generated responses with near-duplicate matching and request coalescing
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+PUNCTUATION_PATTERN = re.compile(r"[^\w\s]")
+DIGITS_PATTERN = re.compile(r"\d+")
+
+# Context keys holding data about a specific customer or conversation; responses built on them are never shared
+PERSONAL_CONTEXT_KEYS = ("account_info", "conversation")
+
+
+def normalize_query(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace"""
+    return " ".join(PUNCTUATION_PATTERN.sub(" ", text.lower()).split())
+
+
+class _Flight:
+    """An in-progress generation that identical concurrent misses wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response: Optional[str] = None
+        self.error: Optional[BaseException] = None
+
+
+class ResponseCache:
+    """
+    LRU + TTL cache of LLM responses keyed by intent and normalized query text.
+    An optional embedding tier also matches near-duplicate phrasings of the same
+    intent. Concurrent misses for the same key share a single upstream call.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl_seconds: int = 3600,
+        encoder=None,
+        similarity_threshold: float = 0.92,
+        on_lookup: Optional[Callable[[str, float], None]] = None
+    ):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries: Maximum cached responses
+            ttl_seconds: Age after which a response is regenerated
+            encoder: Object with encode(texts) -> L2-normalized ndarray; enables near-duplicate matching
+            similarity_threshold: Minimum cosine similarity for a near-duplicate hit
+            on_lookup: Called with (status, saved_ms) after every lookup, where status is one of
+                "hit", "semantic_hit", "coalesced", "miss" or "bypass"
+        """
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.encoder = encoder
+        self.similarity_threshold = similarity_threshold
+        self.on_lookup = on_lookup
+
+        # key -> {"intent", "response", "created", "latency_ms", "embedding", "digits"}
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hit": 0, "semantic_hit": 0, "coalesced": 0, "miss": 0, "bypass": 0, "saved_ms": 0.0}
+
+    @staticmethod
+    def is_cacheable(context: Optional[Dict]) -> bool:
+        """Whether a response built on this context may be shared between users"""
+        return not (context and any(context.get(key) for key in PERSONAL_CONTEXT_KEYS))
+
+    def get_or_generate(
+        self,
+        intent: str,
+        query: str,
+        context: Optional[Dict],
+        generate: Callable[[], str]
+    ) -> str:
+        """
+        Return a cached response or generate, cache and return a new one
+
+        Args:
+            intent: Detected intent
+            query: User query text
+            context: Context used for generation; account- or conversation-specific context bypasses the cache
+            generate: Produces the response on a miss; exceptions propagate and nothing is cached
+
+        Returns:
+            Response text
+        """
+        if not self.is_cacheable(context):
+            self._record("bypass")
+            return generate()
+
+        entry, status = self._find(intent, query)
+        if entry is not None:
+            self._record(status, entry["latency_ms"])
+            return entry["response"]
+
+        key = self._key(intent, query)
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if leader:
+            self._record("miss")
+        else:
+            # An identical query is already being generated; wait for its answer
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            self._record("coalesced", self._latency_of(key))
+            return flight.response
+
+        start = time.perf_counter()
+        try:
+            flight.response = generate()
+            self.store(intent, query, context, flight.response, (time.perf_counter() - start) * 1000)
+            return flight.response
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def lookup(self, intent: str, query: str, context: Optional[Dict] = None) -> Optional[str]:
+        """
+        Find a fresh cached response (exact, then near-duplicate). Records a miss if none.
+
+        Args:
+            intent: Detected intent
+            query: User query text
+            context: Generation context; account- or conversation-specific context always misses
+
+        Returns:
+            Cached response text or None
+        """
+        if not self.is_cacheable(context):
+            self._record("bypass")
+            return None
+
+        entry, status = self._find(intent, query)
+        self._record(status, entry["latency_ms"] if entry else 0.0)
+        return entry["response"] if entry else None
+
+    def store(self, intent: str, query: str, context: Optional[Dict], response: str, latency_ms: float):
+        """
+        Cache a generated response
+
+        Args:
+            intent: Detected intent
+            query: User query text
+            context: Generation context; nothing is stored for account- or conversation-specific context
+            response: Generated response text
+            latency_ms: How long generation took (credited as saved on later hits)
+        """
+        if not response or not self.is_cacheable(context):
+            return
+
+        embedding = None
+        if self.encoder is not None:
+            try:
+                embedding = self.encoder.encode([normalize_query(query)])[0]
+            except Exception as e:
+                logger.error(f"Error embedding query for response cache: {str(e)}")
+
+        key = self._key(intent, query)
+        with self._lock:
+            self._entries[key] = {
+                "intent": intent,
+                "response": response,
+                "created": time.time(),
+                "latency_ms": latency_ms,
+                "embedding": embedding,
+                "digits": DIGITS_PATTERN.findall(query),
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_stats(self) -> Dict:
+        """
+        Get cache statistics for this process
+
+        Returns:
+            Dictionary with lookup counts, hit ratio, latency saved and size
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._entries)
+        served = stats["hit"] + stats["semantic_hit"] + stats["coalesced"]
+        lookups = served + stats["miss"]
+        stats["hit_ratio"] = round(served / lookups, 3) if lookups else 0.0
+        stats["saved_ms"] = round(stats["saved_ms"])
+        return stats
+
+    def _key(self, intent: str, query: str) -> str:
+        return f"{intent}:{normalize_query(query)}"
+
+    def _find(self, intent: str, query: str) -> Tuple[Optional[Dict], str]:
+        """Exact match, then near-duplicate match. Returns (entry or None, lookup status)."""
+        key = self._key(intent, query)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry["created"] > self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is not None:
+            return entry, "hit"
+
+        entry = self._nearest(intent, query, now)
+        if entry is not None:
+            return entry, "semantic_hit"
+        return None, "miss"
+
+    def _latency_of(self, key: str) -> float:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry["latency_ms"] if entry else 0.0
+
+    def _nearest(self, intent: str, query: str, now: float) -> Optional[Dict]:
+        """Most similar fresh entry of the same intent above the threshold"""
+        if self.encoder is None:
+            return None
+
+        # Queries that mention different numbers (amounts, dates) are never interchangeable
+        digits = DIGITS_PATTERN.findall(query)
+        with self._lock:
+            candidates = [
+                (key, entry) for key, entry in self._entries.items()
+                if entry["intent"] == intent
+                and entry["embedding"] is not None
+                and entry["digits"] == digits
+                and now - entry["created"] <= self.ttl_seconds
+            ]
+        if not candidates:
+            return None
+
+        try:
+            query_embedding = self.encoder.encode([normalize_query(query)])[0]
+        except Exception as e:
+            logger.error(f"Error embedding query for response cache: {str(e)}")
+            return None
+
+        similarities = np.stack([entry["embedding"] for _, entry in candidates]) @ query_embedding
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.similarity_threshold:
+            return None
+
+        key, entry = candidates[best]
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        return entry
+
+    def _record(self, status: str, saved_ms: float = 0.0):
+        with self._lock:
+            self.stats[status] += 1
+            self.stats["saved_ms"] += saved_ms
+        if self.on_lookup:
+            try:
+                self.on_lookup(status, saved_ms)
+            except Exception as e:
+                logger.error(f"Error reporting response cache lookup: {str(e)}")
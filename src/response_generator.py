@@ -2,17 +2,48 @@
 Response generation module using Google Gemini API
 """
 import os
-from typing import Dict, Optional
+import time
+from typing import Callable, Dict, Iterator, List, Optional
 # import google.generativeai as genai
 from google import genai
 from config import settings
+from src.llm_client import GeminiTransport, LLMClient
+from src.prompt_builder import PromptBuilder
+from src.response_cache import ResponseCache
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Spoken when the API call fails or runs out of time
+FALLBACK_RESPONSES = {
+    "greeting": "Hello! How can I assist you today?",
+    "farewell": "Thank you for contacting us. Have a great day!",
+    "account_inquiry": "I can help you with account information. Please provide more details.",
+    "faq": "I'm here to answer your questions. What would you like to know?",
+    "support": "I'm here to help. Please describe the issue you're experiencing.",
+    "transaction": "I can assist with transaction-related queries. How can I help?",
+    "general": "I'm here to help. Could you please provide more details?"
+}
+DEFAULT_FALLBACK_RESPONSE = "I'm here to assist you. How can I help?"
 
 
 class ResponseGenerator:
     """Handles response generation using Google Gemini API"""
     
-    def __init__(self):
-        """Initialize the Gemini client"""
+    def __init__(
+        self,
+        response_cache: Optional[ResponseCache] = None,
+        on_llm_attempt: Optional[Callable[[str, float], None]] = None,
+        prompt_builder: Optional[PromptBuilder] = None
+    ):
+        """
+        Initialize the Gemini client
+        
+        Args:
+            response_cache: Optional cache consulted before calling the API
+            on_llm_attempt: Called with (outcome, latency_ms) after every Gemini attempt
+            prompt_builder: Assembles token-budgeted prompts (default: PROMPT_CONTEXT_TOKEN_BUDGET)
+        """
         if not settings.gemini_api_key:
             raise ValueError("Gemini API key not found in environment variables")
         # client = genai.Client(api_key=settings.gemini_api_key)
@@ -23,6 +54,22 @@ class ResponseGenerator:
         # print(f"Available models: {model_names}")
         # self.model = genai.GenerativeModel('gemini-2.5-flash-preview-native-audio-dialog-2025-05-19')
         self.client = genai.Client(api_key=settings.gemini_api_key)
+        self.model_name = "gemini-2.5-flash"
+        self.response_cache = response_cache
+        self.prompt_builder = prompt_builder or PromptBuilder(
+            settings.prompt_context_token_budget,
+            settings.prompt_conversation_token_budget
+        )
+        self.llm_client = LLMClient(
+            GeminiTransport(self.client, self.model_name),
+            deadline_ms=settings.llm_deadline_ms,
+            attempt_timeout_ms=settings.llm_attempt_timeout_ms,
+            max_retries=settings.llm_max_retries,
+            backoff_ms=settings.llm_retry_backoff_ms,
+            hedge_enabled=settings.llm_hedge_enabled,
+            hedge_delay_ms=settings.llm_hedge_delay_ms,
+            on_attempt=on_llm_attempt
+        )
 
 
     
@@ -30,7 +77,8 @@ class ResponseGenerator:
         self,
         user_query: str,
         intent: str,
-        context: Optional[Dict] = None
+        context: Optional[Dict] = None,
+        deadline_ms: Optional[float] = None
     ) -> str:
         """
         Generate a response based on user query and intent
@@ -38,60 +86,119 @@ class ResponseGenerator:
         Args:
             user_query: The user's query text
             intent: Detected intent
-            context: Additional context (e.g., account info, FAQs)
+            context: Additional context (e.g., account info, FAQs, conversation history)
+            deadline_ms: Time budget for the API call; the fallback response is returned
+                once it runs out (default: LLM_DEADLINE_MS)
             
         Returns:
             Generated response text
         """
         try:
-            # Build system prompt based on intent
-            system_prompt = self._build_system_prompt(intent, context)
+            full_prompt, prompt_size = self.prompt_builder.build(user_query, intent, context)
+            logger.debug(f"Full prompt: {full_prompt}")
+            
+            def generate() -> str:
+                start = time.perf_counter()
+                response = self._generate(full_prompt, deadline_ms)
+                self._log_prompt_size(intent, prompt_size, (time.perf_counter() - start) * 1000, "response")
+                return response
             
-            # Combine system prompt and user query
-            full_prompt = f"{system_prompt}\n\nUser: {user_query}\nAssistant:"
-            print(f"Full prompt: {full_prompt}")
-            response = self.client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=full_prompt
-            )
-            # print(f"Response: {response}")
-            # print("CONTROLLED REACHED HERE")
-            return response.text.strip()
+            if self.response_cache:
+                return self.response_cache.get_or_generate(intent, user_query, context, generate)
+            return generate()
         except Exception as e:
             print(f"Error generating response: {str(e)}")
             return self._fallback_response(intent)
     
-    def _build_system_prompt(self, intent: str, context: Optional[Dict]) -> str:
+    def _generate(self, full_prompt: str, deadline_ms: Optional[float] = None) -> str:
         """
-        Build system prompt based on intent
+        Call the Gemini API, with timeouts, retries and hedging
         
         Args:
-            intent: Detected intent
-            context: Additional context
+            full_prompt: Complete prompt text
+            deadline_ms: Time budget for all attempts
             
         Returns:
-            System prompt string
+            Generated response text
+        """
+        return self.llm_client.generate(full_prompt, deadline_ms)
+    
+    def generate_response_stream(
+        self,
+        user_query: str,
+        intent: str,
+        context: Optional[Dict] = None,
+        deadline_ms: Optional[float] = None
+    ) -> Iterator[str]:
         """
-        base_prompt = "You are a helpful and friendly customer service voice assistant."
+        Generate a response as a stream of text pieces, as the model produces them
         
-        intent_prompts = {
-            "greeting": "Respond warmly to the greeting and ask how you can help.",
-            "farewell": "Thank the user and wish them well.",
-            "account_inquiry": "Provide helpful information about account-related queries. Be concise and clear.",
-            "faq": "Answer frequently asked questions clearly and helpfully.",
-            "support": "Offer support and assistance. If you cannot resolve the issue, guide them to human support.",
-            "transaction": "Assist with transaction-related queries. Be careful with sensitive information."
-        }
+        Args:
+            user_query: The user's query text
+            intent: Detected intent
+            context: Additional context (e.g., account info, FAQs, conversation history)
+            deadline_ms: Time budget for the whole stream (default: LLM_DEADLINE_MS)
+            
+        Yields:
+            Pieces of the response text. If the API fails or the deadline runs out
+            before any text arrives, the fallback response is yielded instead.
+        """
+        if self.response_cache:
+            cached = self.response_cache.lookup(intent, user_query, context)
+            if cached is not None:
+                yield cached
+                return
         
-        prompt = f"{base_prompt} {intent_prompts.get(intent, 'Provide helpful assistance.')}"
+        pieces = []
+        start = time.perf_counter()
+        try:
+            full_prompt, prompt_size = self.prompt_builder.build(user_query, intent, context)
+            logger.debug(f"Full prompt: {full_prompt}")
+            for piece in self.llm_client.stream(full_prompt, deadline_ms):
+                if not pieces:
+                    self._log_prompt_size(intent, prompt_size, (time.perf_counter() - start) * 1000, "first piece")
+                pieces.append(piece)
+                yield piece
+        except Exception as e:
+            print(f"Error streaming response: {str(e)}")
+            if not pieces:
+                yield self._fallback_response(intent)
+            return
         
-        if context:
-            if "account_info" in context:
-                prompt += f"\nAccount Information: {context['account_info']}"
-            if "faqs" in context:
-                prompt += f"\nRelevant FAQs: {context['faqs']}"
+        # Streams are not coalesced, but a completed one is cached for later queries
+        if self.response_cache:
+            latency_ms = (time.perf_counter() - start) * 1000
+            self.response_cache.store(intent, user_query, context, "".join(pieces).strip(), latency_ms)
+    
+    def _log_prompt_size(self, intent: str, prompt_size: Dict, latency_ms: float, path: str):
+        """Log the prompt size next to the LLM latency it produced"""
+        logger.info(
+            f"LLM {path}: intent={intent} prompt_tokens={prompt_size['tokens']} "
+            f"context_tokens={prompt_size['context_tokens']} "
+            f"conversation_tokens={prompt_size['conversation_tokens']} "
+            f"faqs={prompt_size['faqs_kept']}/{prompt_size['faqs_total']} "
+            f"trimmed={prompt_size['trimmed']} latency_ms={latency_ms:.0f}"
+        )
+    
+    def summarize_conversation(self, summary: str, turns: List[Dict]) -> str:
+        """
+        Fold conversation turns into a running summary with the LLM
         
-        return prompt
+        Args:
+            summary: Summary so far (may be empty)
+            turns: Turns to fold in, oldest first ({"user", "assistant", "intent"})
+            
+        Returns:
+            Updated summary
+        """
+        transcript = "\n".join(f"User: {turn['user']}\nAssistant: {turn['assistant']}" for turn in turns)
+        prompt = (
+            "Update the summary of a customer service conversation with the new turns. "
+            "Keep account numbers, amounts, dates and unresolved requests; drop pleasantries. "
+            f"Answer with the updated summary only, in at most {settings.conversation_summary_max_tokens // 2} words."
+            f"\n\nSummary so far:\n{summary or '(none)'}\n\nNew turns:\n{transcript}\n\nUpdated summary:"
+        )
+        return self.llm_client.generate(prompt)
     
     def _fallback_response(self, intent: str) -> str:
         """
@@ -103,14 +210,4 @@ class ResponseGenerator:
         Returns:
             Fallback response text
         """
-        fallback_responses = {
-            "greeting": "Hello! How can I assist you today?",
-            "farewell": "Thank you for contacting us. Have a great day!",
-            "account_inquiry": "I can help you with account information. Please provide more details.",
-            "faq": "I'm here to answer your questions. What would you like to know?",
-            "support": "I'm here to help. Please describe the issue you're experiencing.",
-            "transaction": "I can assist with transaction-related queries. How can I help?",
-            "general": "I'm here to help. Could you please provide more details?"
-        }
-        
-        return fallback_responses.get(intent, "I'm here to assist you. How can I help?")
+        return FALLBACK_RESPONSES.get(intent, DEFAULT_FALLBACK_RESPONSE)
@@ -0,0 +1,161 @@
+"""
+Tiered response routing: canned templates for trivial intents, the LLM otherwise
+"""
+import json
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+TEMPLATES_PATH = Path(__file__).parent / "data" / "response_templates.json"
+
+TEMPLATE_TIER = "template"
+LLM_TIER = "llm"
+
+
+class ResponseRouter:
+    """
+    Picks the cheapest tier that can answer a query. Intents with a configured
+    confidence threshold and canned templates (e.g., greeting, farewell) are answered
+    from a template when the classifier is confident and the query is short;
+    everything else escalates to the LLM.
+    """
+
+    def __init__(
+        self,
+        response_generator=None,
+        thresholds: Optional[Dict[str, float]] = None,
+        max_template_words: int = 8,
+        templates_path: Path = TEMPLATES_PATH,
+        on_route: Optional[Callable[[str, float], None]] = None
+    ):
+        """
+        Initialize the router
+
+        Args:
+            response_generator: ResponseGenerator for the LLM tier (may be None)
+            thresholds: Minimum intent confidence per intent for the template tier
+            max_template_words: Longer queries always go to the LLM, since they likely ask for more
+            templates_path: JSON file mapping intents to response variants
+            on_route: Called with (tier, latency_ms) after each response
+        """
+        self.response_generator = response_generator
+        self.thresholds = thresholds or {}
+        self.max_template_words = max_template_words
+        self.on_route = on_route
+
+        try:
+            with open(templates_path, "r", encoding="utf-8") as f:
+                self.templates: Dict[str, List[str]] = json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading response templates: {str(e)}")
+            self.templates = {}
+
+        self._last_variant: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.stats = {TEMPLATE_TIER: {"count": 0, "total_ms": 0.0}, LLM_TIER: {"count": 0, "total_ms": 0.0}}
+
+    def select_tier(self, text: str, intent_data: Dict) -> str:
+        """
+        Decide which tier answers a query
+
+        Args:
+            text: User query text
+            intent_data: Result of NLPProcessor.detect_intent
+
+        Returns:
+            "template" or "llm"
+        """
+        intent = intent_data.get("intent", "general")
+        threshold = self.thresholds.get(intent)
+        if (
+            threshold is not None
+            and self.templates.get(intent)
+            and intent_data.get("confidence", 0.0) >= threshold
+            and len(text.split()) <= self.max_template_words
+        ):
+            return TEMPLATE_TIER
+        return LLM_TIER
+
+    def respond(self, tier: str, text: str, intent: str, context: Optional[Dict] = None) -> str:
+        """
+        Produce the response on the selected tier
+
+        Args:
+            tier: Tier from select_tier
+            text: User query text
+            intent: Detected intent
+            context: Context for the LLM tier
+
+        Returns:
+            Response text
+        """
+        start = time.perf_counter()
+        if tier == TEMPLATE_TIER:
+            response = self._template(intent)
+        else:
+            response = self.response_generator.generate_response(text, intent, context)
+        self._record(tier, (time.perf_counter() - start) * 1000)
+        return response
+
+    def respond_stream(self, tier: str, text: str, intent: str, context: Optional[Dict] = None) -> Iterator[str]:
+        """
+        Stream the response on the selected tier
+
+        Args:
+            tier: Tier from select_tier
+            text: User query text
+            intent: Detected intent
+            context: Context for the LLM tier
+
+        Yields:
+            Pieces of the response text
+        """
+        start = time.perf_counter()
+        if tier == TEMPLATE_TIER:
+            yield self._template(intent)
+        else:
+            yield from self.response_generator.generate_response_stream(text, intent, context)
+        self._record(tier, (time.perf_counter() - start) * 1000)
+
+    def get_stats(self) -> Dict:
+        """
+        Get routing statistics for this process
+
+        Returns:
+            Dictionary with LLM calls avoided and count/average latency per tier
+        """
+        with self._lock:
+            tiers = {
+                tier: {
+                    "count": stats["count"],
+                    "average_ms": round(stats["total_ms"] / stats["count"], 2) if stats["count"] else 0.0,
+                }
+                for tier, stats in self.stats.items()
+            }
+        return {"llm_calls_avoided": tiers[TEMPLATE_TIER]["count"], "tiers": tiers}
+
+    def _template(self, intent: str) -> str:
+        """Pick a variant, never the same one twice in a row"""
+        variants = self.templates[intent]
+        with self._lock:
+            choices = [i for i in range(len(variants)) if i != self._last_variant.get(intent)] or [0]
+            index = random.choice(choices)
+            self._last_variant[intent] = index
+        return variants[index]
+
+    def _record(self, tier: str, latency_ms: float):
+        with self._lock:
+            stats = self.stats.setdefault(tier, {"count": 0, "total_ms": 0.0})
+            stats["count"] += 1
+            stats["total_ms"] += latency_ms
+        if self.on_route:
+            try:
+                self.on_route(tier, latency_ms)
+            except Exception as e:
+                logger.error(f"Error reporting response route: {str(e)}")
@@ -0,0 +1,159 @@
+"""
+Stream LLM text into sentence-sized TTS segments
+"""
+import queue
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Sentence end: terminal punctuation (plus closing quotes/brackets) followed by whitespace, or a line break
+BOUNDARY_PATTERN = re.compile(r"(?<=[.!?])[\"')\]]*\s+|\n+")
+ABBREVIATIONS = {"mr", "mrs", "ms", "dr", "st", "vs", "etc", "e.g", "i.e", "no", "approx"}
+
+
+class SentenceChunker:
+    """
+    Incrementally cuts a token stream into sentences. A boundary is only trusted once
+    the whitespace after it has arrived, so "3." followed by "5" is not split.
+    """
+
+    def __init__(self, min_chars: int = 20, max_chars: int = 250):
+        """
+        Initialize the chunker
+
+        Args:
+            min_chars: Shorter sentences are merged with the next one (fewer, fuller TTS calls)
+            max_chars: Text without a sentence boundary is cut at a comma or space past this length
+        """
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self._buffer = ""
+
+    def feed(self, delta: str) -> List[str]:
+        """
+        Add streamed text
+
+        Args:
+            delta: Next piece of text from the model
+
+        Returns:
+            Sentences completed by this piece (possibly empty)
+        """
+        self._buffer += delta
+        sentences = []
+        start = 0
+        for match in BOUNDARY_PATTERN.finditer(self._buffer):
+            candidate = self._buffer[start:match.start()].strip()
+            if len(candidate) < self.min_chars or self._ends_with_abbreviation(candidate):
+                continue
+            sentences.append(candidate)
+            start = match.end()
+        self._buffer = self._buffer[start:]
+
+        while len(self._buffer) > self.max_chars:
+            cut = self._buffer.rfind(", ", 0, self.max_chars)
+            cut = cut + 1 if cut > 0 else self._buffer.rfind(" ", 0, self.max_chars)
+            if cut <= 0:
+                break
+            sentences.append(self._buffer[:cut].strip())
+            self._buffer = self._buffer[cut:]
+        return sentences
+
+    def flush(self) -> List[str]:
+        """
+        End of stream
+
+        Returns:
+            The remaining text as a final sentence, if any
+        """
+        remainder, self._buffer = self._buffer.strip(), ""
+        return [remainder] if remainder else []
+
+    @staticmethod
+    def _ends_with_abbreviation(text: str) -> bool:
+        if not text.endswith("."):
+            return False
+        last_word = text[:-1].rsplit(None, 1)[-1].lower() if text[:-1].strip() else ""
+        return last_word in ABBREVIATIONS
+
+
+class SpeechStreamer:
+    """
+    Pipes a text stream through a SentenceChunker into a synthesis function. Each
+    sentence is synthesized as soon as it is complete, in parallel with the model
+    still generating, and segments are yielded strictly in order.
+    """
+
+    def __init__(
+        self,
+        synthesize: Callable[[str, int], Any],
+        max_parallel: int = 2,
+        min_chars: int = 20,
+        max_chars: int = 250
+    ):
+        """
+        Initialize the streamer
+
+        Args:
+            synthesize: Called as synthesize(sentence, index); its return value is the segment's audio
+            max_parallel: Sentences synthesized concurrently
+            min_chars: See SentenceChunker
+            max_chars: See SentenceChunker
+        """
+        self.synthesize = synthesize
+        self.max_parallel = max_parallel
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+
+    def stream(self, text_deltas: Iterable[str]) -> Iterator[Dict]:
+        """
+        Synthesize a streamed response sentence by sentence
+
+        Args:
+            text_deltas: Iterable of text pieces (e.g., an LLM token stream)
+
+        Yields:
+            Dictionaries with index, text and audio, in sentence order
+        """
+        executor = ThreadPoolExecutor(max_workers=self.max_parallel, thread_name_prefix="tts-segment")
+        segments: "queue.Queue" = queue.Queue()
+        cancelled = threading.Event()
+
+        def produce():
+            # Runs on its own thread so reading the model stream never waits on TTS
+            chunker = SentenceChunker(self.min_chars, self.max_chars)
+            index = 0
+            try:
+                for delta in text_deltas:
+                    if cancelled.is_set():
+                        return
+                    for sentence in chunker.feed(delta):
+                        segments.put((index, sentence, executor.submit(self.synthesize, sentence, index)))
+                        index += 1
+                for sentence in chunker.flush():
+                    segments.put((index, sentence, executor.submit(self.synthesize, sentence, index)))
+                    index += 1
+            except Exception as e:
+                segments.put(e)
+            finally:
+                segments.put(None)
+
+        threading.Thread(target=produce, name="llm-stream-reader", daemon=True).start()
+        try:
+            while True:
+                item = segments.get()
+                if item is None:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                index, sentence, future = item
+                yield {"index": index, "text": sentence, "audio": future.result()}
+        finally:
+            # Also reached when the consumer stops early (e.g., the client disconnected)
+            cancelled.set()
+            executor.shutdown(wait=False)
@@ -1,64 +1,94 @@
 """
-Speech-to-Text module using OpenAI Whisper
+Speech-to-Text module using OpenAI Whisper (or another configured STT backend)
 """
 import os
-import tempfile
-from typing import Optional
+from typing import Callable, Dict, List, Optional
 
-try:
-    import whisper
-    import torch
-except Exception:
-    whisper = None
-    torch = None
+import numpy as np
 
 from config import settings
+from src.audio_decoder import AudioDecodeError, Resampler, SAMPLE_RATE as WHISPER_SAMPLE_RATE, audio_decoder, resample
+from src.inference_scheduler import BatchScheduler
+from src.stt_backends import STTBackend, create_backend
+from src.transcription_cache import TranscriptionCache
+from src.vad import VoiceActivityDetector
 
 # Add FFmpeg to PATH if on Windows
-import os
 import platform
 if platform.system() == "Windows":
     ffmpeg_path = r"C:\Users\DELL\AppData\Local\Microsoft\WinGet\Packages\Gyan.FFmpeg_Microsoft.Winget.Source_8wekyb3d8bbwe\ffmpeg-8.0.1-full_build\bin"
     if os.path.exists(ffmpeg_path):
         os.environ["PATH"] = ffmpeg_path + os.pathsep + os.environ.get("PATH", "")
 
+# Longest clip a single batched decode window covers
+MAX_BATCH_SAMPLES = 30 * WHISPER_SAMPLE_RATE
+# Audio kept before the last committed word when trimming the streaming buffer, since
+# word timestamps are approximate; words re-decoded from it are skipped
+TRIM_MARGIN_SECONDS = 0.2
+
 
 class SpeechToText:
-    """Handles speech-to-text conversion using OpenAI Whisper"""
+    """Handles speech-to-text conversion using OpenAI Whisper or another configured backend"""
 
-    def __init__(self, model_name: str = "small", device: Optional[str] = None):
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        device: Optional[str] = None,
+        backend: Optional[str] = None,
+        compute_type: Optional[str] = None
+    ):
         """
-        Initialize the Whisper model
+        Initialize the STT backend
 
         Args:
-            model_name: Whisper model size to load (e.g., tiny, base, small, medium, large)
-            device: Torch device string (e.g., 'cpu' or 'cuda'). If None, auto-detects.
+            model_name: Model size to load (e.g., tiny, base, small, medium, large). Defaults to settings.stt_model
+            device: Device string (e.g., 'cpu' or 'cuda'). Defaults to settings.stt_device, auto-detected if unset
+            backend: Backend name ("whisper" or "faster-whisper"). Defaults to settings.stt_backend
+            compute_type: Numeric precision (e.g., float32, int8). Defaults to settings.stt_compute_type
         """
-        if whisper is None:
-            raise RuntimeError("Whisper package not installed. Please install 'openai-whisper' and ensure ffmpeg is available.")
-
-        # Auto-select device if not provided
-        if device is None:
-            if torch is not None and torch.cuda.is_available():
-                device = "cuda"
-            else:
-                device = "cpu"
-
+        model_name = model_name or settings.stt_model
+        backend = backend or settings.stt_backend
         try:
-            self.model = whisper.load_model(model_name, device=device)
+            self.backend: STTBackend = create_backend(
+                backend,
+                model_name=model_name,
+                device=device or settings.stt_device,
+                compute_type=compute_type or settings.stt_compute_type
+            )
             self.model_name = model_name
-            self.device = device
+            self.device = self.backend.device
         except Exception as e:
-            print(f"Error loading Whisper model '{model_name}': {e}")
+            print(f"Error loading {backend} model '{model_name}': {e}")
             raise
 
-        # Buffer used for streaming-style transcription (simple append-to-temp-file approach)
-        self._stream_temp_file = None
+        # Silence trimming and pause splitting ahead of the model
+        self.vad: Optional[VoiceActivityDetector] = None
+        if settings.vad_enabled:
+            self.vad = VoiceActivityDetector(max_segment_seconds=settings.vad_max_segment_seconds)
+
+        # Repeated audio (retries, re-submissions) skips the model entirely
+        self.cache: Optional[TranscriptionCache] = None
+        if settings.stt_cache_enabled:
+            self.cache = TranscriptionCache(
+                max_entries=settings.stt_cache_max_entries,
+                disk_dir=settings.stt_cache_dir,
+                ttl_seconds=settings.stt_cache_ttl_seconds
+            )
+
+        # Batch concurrent requests for clips that fit in one 30 s window
+        self.scheduler: Optional[BatchScheduler] = None
+        if settings.stt_batching_enabled and self.backend.supports_batching:
+            self.scheduler = BatchScheduler(
+                self.backend.transcribe_batch,
+                max_batch_size=settings.stt_batch_max_size,
+                max_wait_ms=settings.stt_batch_max_wait_ms,
+                name=self.backend.name
+            )
 
     def transcribe_audio_file(self, audio_file_path: str) -> Optional[str]:
         """
-        Transcribe an audio file using Whisper. Whisper accepts many audio formats and will
-        resample as needed via ffmpeg.
+        Transcribe an audio file using Whisper. The file is decoded in memory to
+        16 kHz mono samples; any format ffmpeg understands is accepted.
 
         Args:
             audio_file_path: Path to the audio file
@@ -66,85 +96,376 @@ class SpeechToText:
         Returns:
             Transcribed text or None if transcription fails
         """
-        try:
-            if not os.path.exists(audio_file_path):
-                print(f"Audio file not found: {audio_file_path}")
-                return None
-
-            print(f"Attempting to transcribe: {audio_file_path}")
-            print(f"File size: {os.path.getsize(audio_file_path)} bytes")
-            
-            # Whisper handles loading and resampling via ffmpeg
-            result = self.model.transcribe(audio_file_path)
-            transcribed_text = result.get("text", "").strip()
-            print(f"Transcription result: '{transcribed_text}'")
-            return transcribed_text
-        except Exception as e:
-            import traceback
-            print(f"Error transcribing audio with Whisper: {e}")
-            print(f"Full traceback: {traceback.format_exc()}")
+        if not os.path.exists(audio_file_path):
+            print(f"Audio file not found: {audio_file_path}")
             return None
 
+        print(f"Attempting to transcribe: {audio_file_path}")
+        print(f"File size: {os.path.getsize(audio_file_path)} bytes")
+
+        with open(audio_file_path, "rb") as f:
+            return self.transcribe_audio_bytes(f.read())
+
     def transcribe_audio_bytes(self, audio_bytes: bytes, suffix: str = ".wav") -> Optional[str]:
         """
-        Transcribe audio provided as bytes. Writes bytes to a temporary file then transcribes.
+        Transcribe encoded audio provided as bytes, decoding it in memory (no temp files).
 
         Args:
-            audio_bytes: Raw audio bytes (wav/mp3/etc.)
-            suffix: File suffix to use when creating a temp file (default: .wav)
+            audio_bytes: Encoded audio bytes (webm/wav/mp3/etc.)
+            suffix: Unused; kept for backwards compatibility (the container format is sniffed)
 
         Returns:
             Transcribed text or None
         """
-        try:
-            with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
-                tmp.write(audio_bytes)
-                tmp_path = tmp.name
+        audio = self.decode_audio(audio_bytes)
+        if audio is None:
+            return None
+        return self.transcribe_audio(audio)
 
-            result = self.transcribe_audio_file(tmp_path)
+    def decode_audio(self, audio_bytes: bytes) -> Optional[np.ndarray]:
+        """
+        Decode encoded audio bytes in memory
 
-            try:
-                os.unlink(tmp_path)
-            except Exception:
-                pass
+        Args:
+            audio_bytes: Encoded audio bytes (webm/wav/mp3/etc.)
 
-            return result
-        except Exception as e:
-            print(f"Error transcribing audio bytes with Whisper: {e}")
+        Returns:
+            Mono float32 samples at 16 kHz, or None if decoding fails
+        """
+        try:
+            return audio_decoder.decode(audio_bytes)
+        except AudioDecodeError as e:
+            print(f"Error decoding audio bytes: {e}")
             return None
 
-    def stream_transcribe(self, audio_chunk: bytes, finalize: bool = False) -> Optional[str]:
+    def transcribe_audio(self, audio: np.ndarray) -> Optional[str]:
+        """
+        Transcribe decoded audio samples
+
+        Args:
+            audio: Mono float32 samples at 16 kHz
+
+        Returns:
+            Transcribed text ("" if the clip has no speech) or None if transcription fails
+        """
+        return self.transcribe_with_vad(audio)["text"]
+
+    def transcribe_with_vad(self, audio: np.ndarray) -> Dict:
         """
-        A simple streaming helper that appends incoming audio chunks to a temporary file
-        and runs Whisper on the accumulated buffer. This is not real-time incremental
-        streaming transcription, but provides a straightforward way to transcribe
-        streaming input in this codebase.
+        Trim silence, split long recordings on pauses and transcribe only the speech.
+        Clips without any speech never reach the model.
 
         Args:
-            audio_chunk: Chunk of audio bytes to append
-            finalize: If True, run transcription and close the stream buffer
+            audio: Mono float32 samples at 16 kHz
 
         Returns:
-            Transcribed text when `finalize` is True, otherwise None
+            Dictionary with "text" (None on failure), the VAD stats
+            (duration, speech_duration, speech_ratio, speech_detected, segments)
+            and "cached" (whether the result came from the transcription cache)
         """
+        cache_key = None
+        if self.cache is not None:
+            cache_key = TranscriptionCache.make_key(audio, self._cache_options())
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                print(f"Transcription cache hit: '{cached['text']}'")
+                return {**cached, "cached": True}
+
+        result = self._transcribe_with_vad(audio)
+        if cache_key is not None and result["text"] is not None:
+            self.cache.put(cache_key, result)
+        return {**result, "cached": False}
+
+    def _transcribe_with_vad(self, audio: np.ndarray) -> Dict:
+        """Uncached body of transcribe_with_vad"""
+        if self.vad is None:
+            segments = [audio]
+            stats = {
+                "duration": round(len(audio) / WHISPER_SAMPLE_RATE, 3),
+                "speech_duration": round(len(audio) / WHISPER_SAMPLE_RATE, 3),
+                "speech_ratio": 1.0,
+                "speech_detected": bool(len(audio)),
+                "segments": 1,
+            }
+        else:
+            segments, stats = self.vad.split(audio)
+            print(f"VAD: {stats['speech_duration']}s speech of {stats['duration']}s in {stats['segments']} segment(s)")
+
+        if not stats["speech_detected"]:
+            return {"text": "", **stats}
+
         try:
-            if self._stream_temp_file is None:
-                self._stream_temp_file = tempfile.NamedTemporaryFile(suffix='.wav', delete=False)
+            if self.scheduler is not None and all(len(seg) <= MAX_BATCH_SAMPLES for seg in segments):
+                # Submit every segment at once so they share batches
+                futures = [self.scheduler.submit(seg) for seg in segments]
+                texts = [future.result() for future in futures]
+            else:
+                # Longer clips need transcribe()'s sliding 30 s windows
+                texts = [self.backend.transcribe(seg).get("text", "").strip() for seg in segments]
+            transcribed_text = " ".join(text for text in texts if text)
+            print(f"Transcription result: '{transcribed_text}'")
+            return {"text": transcribed_text, **stats}
+        except Exception as e:
+            import traceback
+            print(f"Error transcribing audio with {self.backend.name}: {e}")
+            print(f"Full traceback: {traceback.format_exc()}")
+            return {"text": None, **stats}
 
-            # Append chunk to temp file
-            with open(self._stream_temp_file.name, 'ab') as f:
-                f.write(audio_chunk)
+    def _cache_options(self) -> Dict:
+        """Everything besides the audio that changes what a transcription returns"""
+        return {
+            "backend": self.backend.name,
+            "model": self.backend.model_name,
+            "compute_type": self.backend.compute_type,
+            "vad_enabled": self.vad is not None,
+            "vad_max_segment_seconds": settings.vad_max_segment_seconds,
+        }
+
+    def get_stats(self) -> Dict:
+        """
+        Get inference statistics
+
+        Returns:
+            Dictionary with backend configuration, batching scheduler and cache metrics
+        """
+        return {
+            **self.backend.describe(),
+            "scheduler": self.scheduler.get_stats() if self.scheduler else None,
+            "cache": self.cache.get_stats() if self.cache else None,
+        }
+
+    def create_stream(self, **kwargs) -> "StreamingTranscriber":
+        """
+        Create an incremental transcriber for one live audio stream
+
+        Args:
+            **kwargs: Options forwarded to StreamingTranscriber
+
+        Returns:
+            A new StreamingTranscriber bound to this backend
+        """
+        return StreamingTranscriber(self.backend, **kwargs)
+
+    def stream_transcribe(
+        self,
+        stream: "StreamingTranscriber",
+        audio_chunk: bytes,
+        finalize: bool = False
+    ) -> Optional[str]:
+        """
+        Feed a chunk of raw PCM audio (16-bit little-endian mono at
+        settings.audio_sample_rate) to a caller-owned incremental transcriber.
+
+        The bot is shared by every request, so each live stream keeps its own
+        transcriber from create_stream() rather than state on this object.
+
+        Args:
+            stream: The caller's transcriber from create_stream()
+            audio_chunk: Chunk of PCM bytes to append
+            finalize: If True, flush the stream and return the final transcript
+
+        Returns:
+            The current hypothesis (committed + tentative text) after this chunk, or the
+            final transcript when `finalize` is True
+        """
+        try:
+            if audio_chunk:
+                stream.insert_audio(pcm16_to_float32(audio_chunk, settings.audio_sample_rate))
 
             if finalize:
-                result = self.transcribe_audio_file(self._stream_temp_file.name)
-                try:
-                    os.unlink(self._stream_temp_file.name)
-                except Exception:
-                    pass
-                self._stream_temp_file = None
-                return result
+                return stream.finish()["text"]
 
-            return None
+            return stream.hypothesis()["text"]
         except Exception as e:
-            print(f"Error in stream transcription with Whisper: {e}")
+            print(f"Error in stream transcription with {self.backend.name}: {e}")
             return None
+
+
+def pcm16_to_float32(
+    pcm: bytes,
+    sample_rate: int = WHISPER_SAMPLE_RATE,
+    resampler: Optional[Resampler] = None
+) -> np.ndarray:
+    """
+    Convert 16-bit little-endian mono PCM bytes to float32 samples at 16 kHz
+
+    Args:
+        pcm: Raw PCM bytes
+        sample_rate: Sample rate of the input
+        resampler: The stream's Resampler, so consecutive frames are filtered as one
+            signal; the frame is resampled on its own if None
+
+    Returns:
+        Float32 array in [-1, 1] sampled at 16 kHz
+    """
+    audio = np.frombuffer(pcm[:len(pcm) - len(pcm) % 2], dtype="<i2").astype(np.float32) / 32768.0
+    if resampler is not None:
+        return resampler.process(audio)
+    return resample(audio, sample_rate)
+
+
+class StreamingTranscriber:
+    """
+    Incremental Whisper transcription over a rolling in-memory buffer.
+
+    Each decode pass covers only the uncommitted tail of the audio (bounded by
+    max_window_seconds). Words that two consecutive passes agree on are committed
+    and the audio behind them is dropped from the buffer, so the cost per pass
+    stays constant instead of growing with the length of the stream.
+    """
+
+    def __init__(
+        self,
+        backend: STTBackend,
+        min_chunk_seconds: float = 1.0,
+        max_window_seconds: float = 15.0,
+        language: Optional[str] = None,
+        on_hypothesis: Optional[Callable[[Dict], None]] = None
+    ):
+        """
+        Initialize the streaming transcriber
+
+        Args:
+            backend: Loaded STT backend
+            min_chunk_seconds: New audio required before another decode pass runs
+            max_window_seconds: Maximum uncommitted audio kept in the decode window
+            language: Optional language code; auto-detected when None
+            on_hypothesis: Optional callback invoked with every partial/final hypothesis
+        """
+        self.backend = backend
+        self.min_chunk_samples = int(min_chunk_seconds * WHISPER_SAMPLE_RATE)
+        self.max_window_samples = int(max_window_seconds * WHISPER_SAMPLE_RATE)
+        self.language = language
+        self.on_hypothesis = on_hypothesis
+
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._buffer_offset = 0.0  # seconds of audio already trimmed from the front
+        self._pending_samples = 0  # samples received since the last decode pass
+        self._committed: List[Dict] = []  # words agreed on by consecutive passes
+        self._tentative: List[Dict] = []  # latest words not yet confirmed
+
+    def insert_audio(self, audio: np.ndarray) -> Optional[Dict]:
+        """
+        Append 16 kHz float32 audio and decode if enough new audio has arrived
+
+        Args:
+            audio: Mono float32 samples at 16 kHz
+
+        Returns:
+            A partial hypothesis if a decode pass ran, otherwise None
+        """
+        self._buffer = np.concatenate([self._buffer, audio.astype(np.float32, copy=False)])
+        self._pending_samples += len(audio)
+
+        if self._pending_samples < self.min_chunk_samples:
+            return None
+        return self.process()
+
+    def process(self) -> Dict:
+        """
+        Run one decode pass over the current window and commit the stable prefix
+
+        Returns:
+            The partial hypothesis after this pass
+        """
+        self._pending_samples = 0
+        words = self._decode()
+
+        # Local agreement: commit the longest prefix this pass shares with the previous one
+        agreed = 0
+        for previous, current in zip(self._tentative, words):
+            if _normalize_word(previous["word"]) != _normalize_word(current["word"]):
+                break
+            agreed += 1
+        self._committed.extend(words[:agreed])
+        self._tentative = words[agreed:]
+
+        self._trim_buffer()
+        return self._emit("partial")
+
+    def finish(self) -> Dict:
+        """
+        Decode whatever is left and commit everything
+
+        Returns:
+            The final hypothesis
+        """
+        if len(self._buffer):
+            self._committed.extend(self._decode())
+        self._tentative = []
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._pending_samples = 0
+        return self._emit("final")
+
+    def hypothesis(self) -> Dict:
+        """
+        Get the current hypothesis without decoding
+
+        Returns:
+            Dictionary with committed, tentative and combined text
+        """
+        committed = "".join(w["word"] for w in self._committed).strip()
+        tentative = "".join(w["word"] for w in self._tentative).strip()
+        return {
+            "committed": committed,
+            "tentative": tentative,
+            "text": f"{committed} {tentative}".strip(),
+            "committed_until": self._committed[-1]["end"] if self._committed else 0.0,
+        }
+
+    def _decode(self) -> List[Dict]:
+        """Transcribe the buffer and return words past the committed point, in absolute time"""
+        if not len(self._buffer):
+            return []
+
+        # Committed text conditions the decoder so the window boundary doesn't break sentences
+        prompt = "".join(w["word"] for w in self._committed[-50:]).strip() or None
+        result = self.backend.transcribe(
+            self._buffer,
+            language=self.language,
+            initial_prompt=prompt,
+            word_timestamps=True,
+            condition_on_previous_text=False
+        )
+
+        committed_until = self._committed[-1]["end"] if self._committed else 0.0
+        words = []
+        for segment in result.get("segments", []):
+            for word in segment.get("words", []):
+                start = word["start"] + self._buffer_offset
+                end = word["end"] + self._buffer_offset
+                # Audio behind the committed point can still be in the buffer; skip re-emitted words
+                if end <= committed_until + 0.05:
+                    continue
+                words.append({"word": word["word"], "start": start, "end": end})
+        return words
+
+    def _trim_buffer(self):
+        """Drop audio covered by committed words, so the next pass decodes only the uncommitted tail"""
+        buffer_end = self._buffer_offset + len(self._buffer) / WHISPER_SAMPLE_RATE
+        cut_time = self._committed[-1]["end"] - TRIM_MARGIN_SECONDS if self._committed else self._buffer_offset
+        if buffer_end - cut_time > self.max_window_samples / WHISPER_SAMPLE_RATE:
+            # Passes haven't agreed for a whole window: force-commit what we have to bound the buffer
+            self._committed.extend(self._tentative)
+            self._tentative = []
+            cut_time = buffer_end - self.max_window_samples / WHISPER_SAMPLE_RATE
+            if self._committed:
+                cut_time = max(cut_time, self._committed[-1]["end"] - TRIM_MARGIN_SECONDS)
+
+        cut = int((cut_time - self._buffer_offset) * WHISPER_SAMPLE_RATE)
+        if cut <= 0:
+            return
+        self._buffer = self._buffer[cut:]
+        self._buffer_offset += cut / WHISPER_SAMPLE_RATE
+
+    def _emit(self, kind: str) -> Dict:
+        """Build a hypothesis event and hand it to the callback"""
+        event = {"type": kind, **self.hypothesis()}
+        if self.on_hypothesis:
+            self.on_hypothesis(event)
+        return event
+
+
+def _normalize_word(word: str) -> str:
+    """Compare words case- and punctuation-insensitively"""
+    return "".join(ch for ch in word.lower() if ch.isalnum())
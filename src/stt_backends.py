@@ -0,0 +1,237 @@
+"""
+Speech-to-Text inference backends selectable from config.Settings
+"""
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+try:
+    import whisper
+    import torch
+except Exception:
+    whisper = None
+    torch = None
+
+try:
+    from faster_whisper import WhisperModel
+except Exception:
+    WhisperModel = None
+
+
+class STTBackend:
+    """
+    Common interface for speech recognition engines. Every backend takes 16 kHz mono
+    float32 audio and returns a dictionary shaped like openai-whisper's result:
+    {"text": str, "segments": [{"text", "start", "end", "words": [{"word", "start", "end"}]}]}
+    """
+
+    name = "base"
+    supports_batching = False
+
+    def __init__(self, model_name: str, device: str, compute_type: str):
+        self.model_name = model_name
+        self.device = device
+        self.compute_type = compute_type
+
+    def transcribe(
+        self,
+        audio: np.ndarray,
+        language: Optional[str] = None,
+        initial_prompt: Optional[str] = None,
+        word_timestamps: bool = False,
+        condition_on_previous_text: bool = True
+    ) -> Dict:
+        """
+        Transcribe audio of any length
+
+        Args:
+            audio: Mono float32 samples at 16 kHz
+            language: Optional language code; auto-detected when None
+            initial_prompt: Optional text to condition the decoder on
+            word_timestamps: Whether to include per-word timings in the segments
+            condition_on_previous_text: Whether each window is conditioned on the previous one's text
+
+        Returns:
+            Result dictionary with text and segments
+        """
+        raise NotImplementedError
+
+    def transcribe_batch(self, audios: List[np.ndarray]) -> List[str]:
+        """
+        Transcribe several clips of at most 30 s in one pass (only if supports_batching)
+
+        Args:
+            audios: List of mono float32 arrays at 16 kHz
+
+        Returns:
+            Transcribed text for each clip, in order
+        """
+        raise NotImplementedError
+
+    def describe(self) -> Dict:
+        """
+        Describe the loaded configuration
+
+        Returns:
+            Dictionary with backend, model, device and compute type
+        """
+        return {
+            "backend": self.name,
+            "model": self.model_name,
+            "device": self.device,
+            "compute_type": self.compute_type,
+        }
+
+
+class WhisperBackend(STTBackend):
+    """
+    openai-whisper on PyTorch; compute_type int8 applies dynamic quantization on CPU.
+
+    Decoding installs kv-cache hooks on the shared model's modules, so concurrent
+    decodes would corrupt each other: every call into the model takes one lock.
+    """
+
+    name = "whisper"
+    supports_batching = True
+
+    def __init__(self, model_name: str = "small", device: str = "cpu", compute_type: str = "float32"):
+        if whisper is None:
+            raise RuntimeError("Whisper package not installed. Please install 'openai-whisper' and ensure ffmpeg is available.")
+        if compute_type not in ("float32", "float16", "int8"):
+            raise ValueError(f"Unsupported compute type for whisper backend: {compute_type}")
+        if compute_type == "int8" and device != "cpu":
+            raise ValueError("int8 dynamic quantization is only supported on cpu")
+        super().__init__(model_name, device, compute_type)
+
+        self.model = whisper.load_model(model_name, device=device)
+        if compute_type == "int8":
+            self._quantize()
+        self._lock = threading.Lock()
+
+    def _quantize(self):
+        """Replace Linear layers with int8 dynamically quantized equivalents"""
+        # Whisper's Linear subclass only adds a dtype cast (a no-op in fp32), but
+        # quantize_dynamic matches on exact type, so present them as plain nn.Linear
+        for module in self.model.modules():
+            if isinstance(module, whisper.model.Linear):
+                module.__class__ = torch.nn.Linear
+        self.model = torch.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+    @property
+    def fp16(self) -> bool:
+        return self.compute_type == "float16" and self.device == "cuda"
+
+    def transcribe(
+        self,
+        audio: np.ndarray,
+        language: Optional[str] = None,
+        initial_prompt: Optional[str] = None,
+        word_timestamps: bool = False,
+        condition_on_previous_text: bool = True
+    ) -> Dict:
+        with self._lock:
+            return self.model.transcribe(
+                audio,
+                language=language,
+                initial_prompt=initial_prompt,
+                word_timestamps=word_timestamps,
+                condition_on_previous_text=condition_on_previous_text,
+                fp16=self.fp16
+            )
+
+    def transcribe_batch(self, audios: List[np.ndarray]) -> List[str]:
+        mel = torch.stack([
+            whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), n_mels=self.model.dims.n_mels)
+            for audio in audios
+        ]).to(self.device)
+        options = whisper.DecodingOptions(fp16=self.fp16, without_timestamps=True)
+        with self._lock:
+            results = whisper.decode(self.model, mel, options)
+        return [result.text.strip() for result in results]
+
+
+class FasterWhisperBackend(STTBackend):
+    """CTranslate2 (faster-whisper) engine; int8 on CPU is its fastest configuration"""
+
+    name = "faster-whisper"
+
+    def __init__(self, model_name: str = "small", device: str = "cpu", compute_type: str = "int8"):
+        if WhisperModel is None:
+            raise RuntimeError("faster-whisper package not installed. Please install 'faster-whisper'.")
+        super().__init__(model_name, device, compute_type)
+
+        self.model = WhisperModel(model_name, device=device, compute_type=compute_type)
+
+    def transcribe(
+        self,
+        audio: np.ndarray,
+        language: Optional[str] = None,
+        initial_prompt: Optional[str] = None,
+        word_timestamps: bool = False,
+        condition_on_previous_text: bool = True
+    ) -> Dict:
+        segments, _ = self.model.transcribe(
+            audio,
+            language=language,
+            initial_prompt=initial_prompt,
+            word_timestamps=word_timestamps,
+            condition_on_previous_text=condition_on_previous_text,
+            beam_size=5
+        )
+
+        result_segments = []
+        for segment in segments:
+            result_segments.append({
+                "text": segment.text,
+                "start": segment.start,
+                "end": segment.end,
+                "words": [
+                    {"word": word.word, "start": word.start, "end": word.end}
+                    for word in (segment.words or [])
+                ],
+            })
+        return {
+            "text": "".join(segment["text"] for segment in result_segments).strip(),
+            "segments": result_segments,
+        }
+
+
+BACKENDS = {
+    WhisperBackend.name: WhisperBackend,
+    FasterWhisperBackend.name: FasterWhisperBackend,
+}
+
+
+def default_device() -> str:
+    """Pick cuda when torch sees a GPU, otherwise cpu"""
+    if torch is not None and torch.cuda.is_available():
+        return "cuda"
+    return "cpu"
+
+
+def create_backend(
+    backend: str = "whisper",
+    model_name: str = "small",
+    device: Optional[str] = None,
+    compute_type: Optional[str] = None
+) -> STTBackend:
+    """
+    Instantiate an STT backend by name
+
+    Args:
+        backend: Backend name ("whisper" or "faster-whisper")
+        model_name: Model size/name to load (e.g., tiny, base, small)
+        device: Device string; auto-detected when None
+        compute_type: Numeric precision (e.g., float32, float16, int8); backend default when None
+
+    Returns:
+        The loaded backend
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown STT backend '{backend}'. Choose one of: {', '.join(BACKENDS)}")
+
+    kwargs = {"model_name": model_name, "device": device or default_device()}
+    if compute_type:
+        kwargs["compute_type"] = compute_type
+    return BACKENDS[backend](**kwargs)
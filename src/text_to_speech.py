@@ -1,84 +1,401 @@
 """
-Text-to-Speech module using Amazon Polly
+Text-to-Speech module using Amazon Polly, with local backends to fail over to
 """
-import os
-from typing import Optional
-import boto3
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, List, Optional
 from botocore.exceptions import BotoCoreError, ClientError
 from config import settings
+from src.speech_streamer import SentenceChunker
+from src.tts_backends import SSML_PATTERN, BackendRouter, PollyBackend, TTSBackend, create_backend
+from src.tts_cache import AudioCache
+
+# Split SSML after sentence/paragraph ends and at explicit breaks (kept with the preceding text)
+SSML_BOUNDARY_PATTERN = re.compile(r"(?<=</s>)|(?<=</p>)|(?<=/>)(?=\s)")
 
 
 class TextToSpeech:
     """Handles text-to-speech conversion using Amazon Polly"""
     
-    def __init__(self, voice_id: str = "Joanna", region_name: str = "us-east-1"):
+    def __init__(
+        self,
+        voice_id: str = "Joanna",
+        region_name: str = "us-east-1",
+        on_cache_lookup: Optional[Callable[[bool, int], None]] = None,
+        backends: Optional[List[TTSBackend]] = None
+    ):
         """
-        Initialize the Amazon Polly client
+        Initialize the synthesis backends (settings.tts_backends, in order of preference)
         
         Args:
             voice_id: Amazon Polly voice ID (e.g., "Joanna", "Matthew", "Amy")
             region_name: AWS region name
+            on_cache_lookup: Called with (hit, bytes served) after every audio cache lookup
+            backends: Backends to use instead of the configured ones (e.g., local stand-ins for benchmarks)
         """
-        try:
-            # Initialize AWS credentials from environment or config
-            aws_access_key_id = os.getenv("AWS_ACCESS_KEY_ID") or settings.aws_access_key_id
-            aws_secret_access_key = os.getenv("AWS_SECRET_ACCESS_KEY") or settings.aws_secret_access_key
-            
-            if not aws_access_key_id or not aws_secret_access_key:
-                print("Warning: AWS credentials not found. Please set AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY")
-            
-            self.polly_client = boto3.client(
-                'polly',
-                region_name=region_name,
-                aws_access_key_id=aws_access_key_id,
-                aws_secret_access_key=aws_secret_access_key
+        self.voice_id = voice_id
+        self.region_name = region_name
+        # Chunks of long texts are synthesized concurrently (boto3 clients are thread-safe)
+        self._executor = ThreadPoolExecutor(max_workers=settings.tts_max_parallel, thread_name_prefix="tts-chunk")
+        
+        # Synthesized audio is reused for repeated texts (fallbacks, templates, cached answers)
+        self.cache: Optional[AudioCache] = None
+        if settings.tts_cache_enabled:
+            self.cache = AudioCache(
+                disk_dir=settings.tts_cache_dir,
+                max_disk_bytes=settings.tts_cache_max_disk_mb * 1024 * 1024,
+                max_memory_bytes=settings.tts_cache_max_memory_mb * 1024 * 1024,
+                on_lookup=on_cache_lookup
             )
-            
-            self.voice_id = voice_id
-            self.region_name = region_name
-        except Exception as e:
-            print(f"Error initializing Amazon Polly client: {str(e)}")
-            self.polly_client = None
+        
+        if backends is None:
+            backends = self._create_backends()
+        self.router = BackendRouter(
+            backends,
+            selection=settings.tts_backend_selection,
+            cooldown_seconds=settings.tts_backend_cooldown_seconds
+        )
+    
+    def _create_backends(self) -> List[TTSBackend]:
+        """Instantiate the configured backends, skipping any that are unavailable"""
+        options = {
+            "polly": {"voice_id": self.voice_id, "region_name": self.region_name},
+            "espeak": {"voice_id": settings.espeak_voice, "words_per_minute": settings.espeak_words_per_minute},
+        }
+        backends = []
+        for name in settings.tts_backends.split(","):
+            name = name.strip()
+            if not name:
+                continue
+            try:
+                backends.append(create_backend(name, **options.get(name, {})))
+            except Exception as e:
+                print(f"Error initializing {name} TTS backend: {str(e)}")
+        return backends
     
-    def synthesize(self, text: str, output_file: Optional[str] = None, output_format: str = "mp3") -> Optional[bytes]:
+    @property
+    def polly_client(self):
+        """boto3 Polly client of the Polly backend, if one is configured"""
+        for backend in self.router.backends:
+            if isinstance(backend, PollyBackend):
+                return backend.client
+        return None
+    
+    def synthesize(
+        self,
+        text: str,
+        output_file: Optional[str] = None,
+        output_format: str = "mp3",
+        sample_rate: Optional[int] = None
+    ) -> Optional[bytes]:
         """
-        Convert text to speech
+        Convert text to speech. Long texts are split into sentence-aligned chunks that
+        are synthesized concurrently and joined in order. Every chunk comes from the same
+        backend; if one fails, the whole text is synthesized again on the next backend.
         
         Args:
-            text: Text to convert to speech
+            text: Text (or SSML wrapped in <speak>) to convert to speech
             output_file: Optional path to save the audio file
             output_format: Output format (mp3, ogg_vorbis, pcm)
+            sample_rate: Output sample rate in Hz (provider default if None)
             
         Returns:
             Audio data as bytes, or None if synthesis fails
         """
-        if not self.polly_client:
-            print("Polly client not initialized")
-            return None
+        chunks = self.split_text(text)
+        audio_data = None
+        for backend in self.router.candidates():
+            if len(chunks) == 1:
+                audio_data = self._synthesize_chunk(backend, chunks[0], output_format, sample_rate)
+            else:
+                parts = list(self._executor.map(
+                    lambda chunk: self._synthesize_chunk(backend, chunk, output_format, sample_rate), chunks
+                ))
+                # MP3 frames, Ogg pages and raw PCM can all be concatenated as is
+                audio_data = None if any(part is None for part in parts) else b"".join(parts)
+            if audio_data is not None:
+                break
         
-        try:
-            response = self.polly_client.synthesize_speech(
-                Text=text,
-                OutputFormat=output_format,
-                VoiceId=self.voice_id,
-                Engine='neural'  # Use neural engine for better quality
-            )
+        if audio_data:
+            self._save(audio_data, output_file)
+        return audio_data
+    
+    def synthesize_chunks(
+        self,
+        text: str,
+        output_format: str = "mp3",
+        sample_rate: Optional[int] = None
+    ) -> Iterator[bytes]:
+        """
+        Synthesize a text chunk by chunk, all chunks in parallel, yielding each in order
+        as soon as it and every chunk before it are ready. Every chunk comes from the same
+        backend; the next backend takes over the whole text only if nothing was yielded yet.
+        
+        Args:
+            text: Text (or SSML wrapped in <speak>) to convert to speech
+            output_format: Output format (mp3, ogg_vorbis, pcm)
+            sample_rate: Output sample rate in Hz (provider default if None)
             
-            audio_data = response['AudioStream'].read()
+        Yields:
+            Audio bytes per chunk; stops at the first chunk that fails
+        """
+        chunks = self.split_text(text)
+        yielded = False
+        for backend in self.router.candidates():
+            futures = [
+                self._executor.submit(self._synthesize_chunk, backend, chunk, output_format, sample_rate)
+                for chunk in chunks
+            ]
+            try:
+                for future in futures:
+                    audio_data = future.result()
+                    if audio_data is None:
+                        break
+                    yield audio_data
+                    yielded = True
+                else:
+                    return
+            finally:
+                for future in futures:
+                    future.cancel()
+            if yielded:
+                # Audio from another backend would change voice mid-response
+                return
+    
+    def synthesize_stream(
+        self,
+        text: str,
+        output_format: str = "mp3",
+        sample_rate: Optional[int] = None
+    ) -> Iterator[bytes]:
+        """
+        Stream speech as the backend produces it. The first chunk of text is relayed
+        piece by piece straight from the backend (e.g., Polly's AudioStream) and saved to
+        the audio cache once complete; later chunks are synthesized in parallel meanwhile and follow in order.
+        Every chunk comes from the same backend; the next backend takes over the whole text
+        only if nothing was yielded yet.
+        
+        Args:
+            text: Text (or SSML wrapped in <speak>) to convert to speech
+            output_format: Output format (mp3, ogg_vorbis, pcm)
+            sample_rate: Output sample rate in Hz (provider default if None)
             
-            # Save to file if output path is provided
-            if output_file:
-                with open(output_file, "wb") as out:
-                    out.write(audio_data)
-                print(f"Audio saved to {output_file}")
+        Yields:
+            Audio bytes as they arrive; stops early if synthesis fails
+        """
+        chunks = self.split_text(text)
+        for backend in self.router.candidates():
+            futures = [
+                self._executor.submit(self._synthesize_chunk, backend, chunk, output_format, sample_rate)
+                for chunk in chunks[1:]
+            ]
+            try:
+                completed = yield from self._stream_chunk(backend, chunks[0], output_format, sample_rate)
+                if completed is None:
+                    continue
+                if not completed:
+                    return
+                for future in futures:
+                    audio_data = future.result()
+                    if audio_data is None:
+                        return
+                    yield audio_data
+                return
+            finally:
+                for future in futures:
+                    future.cancel()
+    
+    def warm_up(self):
+        """Let every backend open its connections and load its voice data"""
+        for backend in self.router.backends:
+            try:
+                backend.warm_up()
+            except Exception as e:
+                print(f"Error warming up {backend.name} TTS backend: {str(e)}")
+    
+    def precache(self, texts: List[str], output_format: str = "mp3") -> int:
+        """
+        Synthesize texts into the audio cache ahead of time, in parallel (texts already
+        cached are only looked up)
+        
+        Args:
+            texts: Texts to prepare
+            output_format: Output format they will be requested in
             
-            return audio_data
+        Returns:
+            Number of texts whose audio is now cached
+        """
+        if self.cache is None:
+            return 0
+        pending = [self.split_text(text) for text in texts]
+        cached = 0
+        for backend in self.router.candidates():
+            # One chunk per request, so the pool never waits on itself
+            flat = [chunk for text_chunks in pending for chunk in text_chunks]
+            results = iter(self._executor.map(
+                lambda chunk: self._synthesize_chunk(backend, chunk, output_format), flat
+            ))
+            failed = []
+            for text_chunks in pending:
+                if all([next(results) is not None for _ in text_chunks]):
+                    cached += 1
+                else:
+                    failed.append(text_chunks)
+            pending = failed
+            if not pending:
+                break
+        return cached
+    
+    def split_text(self, text: str) -> List[str]:
+        """
+        Split text into chunks of at most settings.tts_chunk_max_chars, on sentence
+        boundaries (or <s>/<p>/<break> boundaries for SSML)
+        
+        Args:
+            text: Plain text or SSML wrapped in <speak>
+            
+        Returns:
+            Chunks in order; SSML chunks are each wrapped in <speak>
+        """
+        max_chars = settings.tts_chunk_max_chars
+        if not settings.tts_chunking_enabled or len(text) <= max_chars:
+            return [text]
+        
+        ssml = SSML_PATTERN.match(text)
+        if ssml:
+            pieces = [piece for piece in SSML_BOUNDARY_PATTERN.split(ssml.group(1)) if piece.strip()]
+        else:
+            chunker = SentenceChunker(min_chars=1, max_chars=max_chars)
+            pieces = chunker.feed(text) + chunker.flush()
+        
+        # Pack consecutive sentences into chunks close to max_chars: fewer requests, same parallelism
+        chunks = []
+        for piece in pieces:
+            if chunks and len(chunks[-1]) + 1 + len(piece) <= max_chars:
+                chunks[-1] += " " + piece
+            else:
+                chunks.append(piece)
+        if ssml:
+            chunks = [f"<speak>{chunk}</speak>" for chunk in chunks]
+        return chunks or [text]
+    
+    def _synthesize_chunk(
+        self,
+        backend: TTSBackend,
+        text: str,
+        output_format: str,
+        sample_rate: Optional[int] = None
+    ) -> Optional[bytes]:
+        """
+        Synthesize one request-sized piece of text with a backend, through the audio cache
+        
+        Args:
+            backend: Backend chosen for the whole text
+            text: Text or SSML
+            output_format: Output format
+            sample_rate: Output sample rate in Hz (provider default if None)
+            
+        Returns:
+            Audio data as bytes, or None if the backend fails
+        """
+        cache_key = self._cache_key(backend, text, output_format, sample_rate)
+        if cache_key is not None:
+            audio_data = self.cache.get(cache_key)
+            if audio_data is not None:
+                return audio_data
+        
+        start = time.perf_counter()
+        try:
+            audio_data = backend.synthesize(text, output_format, sample_rate)
         except (BotoCoreError, ClientError) as e:
-            print(f"Error synthesizing speech: {str(e)}")
+            print(f"Error synthesizing speech with {backend.name}: {str(e)}")
+            self.router.record_failure(backend)
+            return None
+        except Exception as e:
+            print(f"Unexpected error synthesizing speech with {backend.name}: {str(e)}")
+            self.router.record_failure(backend)
             return None
+        # Without streaming, the first byte is available when the whole chunk is
+        self.router.record_success(backend, (time.perf_counter() - start) * 1000)
+        
+        if cache_key is not None:
+            self.cache.put(cache_key, audio_data)
+        return audio_data
+    
+    def _stream_chunk(
+        self,
+        backend: TTSBackend,
+        text: str,
+        output_format: str,
+        sample_rate: Optional[int] = None
+    ) -> Iterator[bytes]:
+        """
+        Relay one request-sized piece of text from a backend as it is produced,
+        tee-ing it into the audio cache (only if the stream completes)
+        
+        Args:
+            backend: Backend chosen for the whole text
+            text: Text or SSML
+            output_format: Output format
+            sample_rate: Output sample rate in Hz (provider default if None)
+            
+        Yields:
+            Audio bytes as they arrive
+            
+        Returns:
+            True once the chunk is complete, False if the backend failed partway, or
+            None if it failed before sending anything
+        """
+        cache_key = self._cache_key(backend, text, output_format, sample_rate)
+        if cache_key is not None:
+            audio_data = self.cache.get(cache_key)
+            if audio_data is not None:
+                yield audio_data
+                return True
+        
+        received = []
+        start = time.perf_counter()
+        try:
+            for piece in backend.stream(text, output_format, sample_rate, settings.tts_stream_chunk_bytes):
+                if not received:
+                    self.router.record_success(backend, (time.perf_counter() - start) * 1000)
+                received.append(piece)
+                yield piece
+        except (BotoCoreError, ClientError) as e:
+            print(f"Error streaming speech with {backend.name}: {str(e)}")
+            self.router.record_failure(backend)
+            return False if received else None
         except Exception as e:
-            print(f"Unexpected error: {str(e)}")
+            print(f"Unexpected error streaming speech with {backend.name}: {str(e)}")
+            self.router.record_failure(backend)
+            return False if received else None
+        
+        if cache_key is not None and received:
+            self.cache.put(cache_key, b"".join(received))
+        return True
+    
+    def _cache_key(self, backend: TTSBackend, text: str, output_format: str, sample_rate: Optional[int]) -> Optional[str]:
+        if self.cache is None:
             return None
+        options = {"sample_rate": sample_rate} if sample_rate else {}
+        return AudioCache.make_key(
+            text, backend.voice_id, backend.engine, output_format, backend.region,
+            **backend.voice_options, **options
+        )
+    
+    def _save(self, audio_data: bytes, output_file: Optional[str]):
+        """
+        Save audio to a file if an output path is provided
+        
+        Args:
+            audio_data: Audio bytes
+            output_file: Destination path or None
+        """
+        if output_file:
+            with open(output_file, "wb") as out:
+                out.write(audio_data)
+            print(f"Audio saved to {output_file}")
     
     def list_voices(self, language_code: str = "en-US") -> list:
         """
@@ -108,6 +425,9 @@ class TextToSpeech:
             voice_id: Name of the voice to use (e.g., "Joanna", "Matthew")
         """
         self.voice_id = voice_id
+        for backend in self.router.backends:
+            if isinstance(backend, PollyBackend):
+                backend.voice_id = voice_id
     
     def get_voice_info(self, voice_id: Optional[str] = None) -> Optional[dict]:
         """
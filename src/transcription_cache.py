@@ -0,0 +1,167 @@
+"""
+Content-hash cache for transcription results
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class TranscriptionCache:
+    """
+    Two-tier cache of transcription results keyed by a hash of the decoded PCM plus
+    the model and decode options. A bounded in-memory LRU sits in front of an
+    optional on-disk tier whose entries expire after a TTL.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        disk_dir: Optional[Path] = None,
+        ttl_seconds: int = 86400
+    ):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries: Maximum number of results kept in memory
+            disk_dir: Directory for the on-disk tier (disabled when None)
+            ttl_seconds: Age after which on-disk entries are ignored and removed
+        """
+        self.max_entries = max(1, max_entries)
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.ttl_seconds = ttl_seconds
+
+        self._memory: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_key(audio: np.ndarray, options: Dict) -> str:
+        """
+        Build a cache key
+
+        Args:
+            audio: Decoded mono float32 samples
+            options: Model name and decode options that affect the result
+
+        Returns:
+            Hex digest identifying this audio under these options
+        """
+        digest = hashlib.sha256()
+        digest.update(np.ascontiguousarray(audio, dtype=np.float32).tobytes())
+        digest.update(json.dumps(options, sort_keys=True).encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Look up a cached result
+
+        Args:
+            key: Cache key from make_key
+
+        Returns:
+            The cached result dictionary, or None on a miss
+        """
+        with self._lock:
+            result = self._memory.get(key)
+            if result is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return dict(result)
+
+        result = self._read_disk(key)
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, result)
+        return dict(result)
+
+    def put(self, key: str, result: Dict):
+        """
+        Store a result
+
+        Args:
+            key: Cache key from make_key
+            result: Result dictionary (must be JSON serializable)
+        """
+        with self._lock:
+            self._remember(key, result)
+        self._write_disk(key, result)
+
+    def get_stats(self) -> Dict:
+        """
+        Get cache statistics for this process
+
+        Returns:
+            Dictionary with hits, misses, hit ratio and size
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+                "memory_entries": len(self._memory),
+                "max_entries": self.max_entries,
+                "disk_enabled": self.disk_dir is not None,
+            }
+
+    def _remember(self, key: str, result: Dict):
+        """Insert into the memory tier, evicting the least recently used. Caller must hold the lock."""
+        self._memory[key] = dict(result)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _disk_path(self, key: str) -> Path:
+        # Shard by prefix so no single directory grows huge
+        return self.disk_dir / key[:2] / f"{key}.json"
+
+    def _read_disk(self, key: str) -> Optional[Dict]:
+        """Read a non-expired entry from disk"""
+        if not self.disk_dir:
+            return None
+
+        path = self._disk_path(key)
+        try:
+            if time.time() - path.stat().st_mtime > self.ttl_seconds:
+                path.unlink()
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.error(f"Error reading transcription cache entry: {str(e)}")
+            return None
+
+    def _write_disk(self, key: str, result: Dict):
+        """Atomically write an entry to disk"""
+        if not self.disk_dir:
+            return
+
+        path = self._disk_path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(result, f)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.error(f"Error writing transcription cache entry: {str(e)}")
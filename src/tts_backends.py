@@ -0,0 +1,380 @@
+"""
+Text-to-Speech synthesis backends selectable from config.Settings
+"""
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+import logging
+
+try:
+    import boto3
+except Exception:
+    boto3 = None
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+SSML_PATTERN = re.compile(r"^\s*<speak>(.*)</speak>\s*$", re.DOTALL)
+
+
+class TTSBackendError(Exception):
+    """Raised when a backend cannot synthesize a text"""
+
+
+class TTSBackend:
+    """
+    Common interface for speech synthesis engines. Every backend takes plain text or
+    SSML wrapped in <speak> and produces mp3, ogg_vorbis or pcm (raw 16-bit
+    little-endian mono) audio. voice_id, engine, region and voice_options identify
+    the voice, so audio from different backends is never mixed up in the cache.
+    """
+
+    name = "base"
+
+    def __init__(self, voice_id: str, engine: str, region: str):
+        self.voice_id = voice_id
+        self.engine = engine
+        self.region = region
+        self.voice_options: Dict = {}
+
+    def synthesize(self, text: str, output_format: str = "mp3", sample_rate: Optional[int] = None) -> bytes:
+        """
+        Synthesize a text in one piece
+
+        Args:
+            text: Plain text or SSML wrapped in <speak>
+            output_format: Output format (mp3, ogg_vorbis, pcm)
+            sample_rate: Output sample rate in Hz (backend default if None)
+
+        Returns:
+            Audio bytes
+        """
+        return b"".join(self.stream(text, output_format, sample_rate))
+
+    def stream(
+        self,
+        text: str,
+        output_format: str = "mp3",
+        sample_rate: Optional[int] = None,
+        chunk_bytes: int = 4096
+    ) -> Iterator[bytes]:
+        """
+        Synthesize a text, yielding audio as the engine produces it
+
+        Args:
+            text: Plain text or SSML wrapped in <speak>
+            output_format: Output format (mp3, ogg_vorbis, pcm)
+            sample_rate: Output sample rate in Hz (backend default if None)
+            chunk_bytes: Read size of the audio stream
+
+        Yields:
+            Audio bytes as they arrive
+        """
+        raise NotImplementedError
+
+    def warm_up(self):
+        """Pay one-off costs (connections, voice data) before the first real request"""
+
+    def describe(self) -> Dict:
+        """
+        Describe the configured voice
+
+        Returns:
+            Dictionary with backend, voice, engine and region
+        """
+        return {
+            "backend": self.name,
+            "voice_id": self.voice_id,
+            "engine": self.engine,
+            "region": self.region,
+            **self.voice_options,
+        }
+
+
+class PollyBackend(TTSBackend):
+    """Amazon Polly's neural engine over boto3 (one network round trip per request)"""
+
+    name = "polly"
+
+    def __init__(self, voice_id: str = "Joanna", region_name: str = "us-east-1", engine: str = "neural", client=None):
+        super().__init__(voice_id, engine, region_name)
+        if client is not None:
+            self.client = client
+            return
+        if boto3 is None:
+            raise RuntimeError("boto3 package not installed. Please install 'boto3'.")
+
+        # Initialize AWS credentials from environment or config
+        aws_access_key_id = os.getenv("AWS_ACCESS_KEY_ID") or settings.aws_access_key_id
+        aws_secret_access_key = os.getenv("AWS_SECRET_ACCESS_KEY") or settings.aws_secret_access_key
+
+        if not aws_access_key_id or not aws_secret_access_key:
+            logger.warning("AWS credentials not found. Please set AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY")
+
+        self.client = boto3.client(
+            'polly',
+            region_name=region_name,
+            aws_access_key_id=aws_access_key_id,
+            aws_secret_access_key=aws_secret_access_key
+        )
+
+    def synthesize(self, text: str, output_format: str = "mp3", sample_rate: Optional[int] = None) -> bytes:
+        return self._request(text, output_format, sample_rate)['AudioStream'].read()
+
+    def stream(
+        self,
+        text: str,
+        output_format: str = "mp3",
+        sample_rate: Optional[int] = None,
+        chunk_bytes: int = 4096
+    ) -> Iterator[bytes]:
+        audio_stream = self._request(text, output_format, sample_rate)['AudioStream']
+        try:
+            yield from audio_stream.iter_chunks(chunk_size=chunk_bytes)
+        finally:
+            audio_stream.close()
+
+    def warm_up(self):
+        # A metadata call opens the pooled TLS connection that synthesis requests reuse
+        self.client.describe_voices(LanguageCode="en-US")
+
+    def _request(self, text: str, output_format: str, sample_rate: Optional[int]):
+        """Call Polly's SynthesizeSpeech"""
+        params = {
+            "Text": text,
+            "TextType": "ssml" if SSML_PATTERN.match(text) else "text",
+            "OutputFormat": output_format,
+            "VoiceId": self.voice_id,
+            "Engine": self.engine,
+        }
+        if sample_rate:
+            params["SampleRate"] = str(sample_rate)
+        return self.client.synthesize_speech(**params)
+
+
+class EspeakBackend(TTSBackend):
+    """
+    espeak-ng on the local CPU: a formant synthesizer that sounds robotic but needs no
+    network or credentials and starts producing audio within milliseconds. Its WAV
+    output is piped through ffmpeg (already required by Whisper) into the requested
+    format and sample rate.
+    """
+
+    name = "espeak"
+
+    # ffmpeg output options per format
+    FFMPEG_FORMATS = {
+        "mp3": ["-f", "mp3"],
+        "ogg_vorbis": ["-c:a", "libvorbis", "-f", "ogg"],
+        "pcm": ["-acodec", "pcm_s16le", "-f", "s16le"],
+    }
+
+    def __init__(
+        self,
+        voice_id: str = "en-us",
+        words_per_minute: int = 175,
+        timeout: float = 30.0,
+        executable: str = "espeak-ng",
+        ffmpeg_binary: str = "ffmpeg"
+    ):
+        self.executable = shutil.which(executable) or shutil.which("espeak")
+        if not self.executable:
+            raise RuntimeError(f"{executable} not found; install espeak-ng and ensure it is on PATH")
+        self.ffmpeg_binary = shutil.which(ffmpeg_binary)
+        if not self.ffmpeg_binary:
+            raise RuntimeError(f"{ffmpeg_binary} not found; install ffmpeg and ensure it is on PATH")
+        super().__init__(voice_id, "espeak-ng", "local")
+
+        self.words_per_minute = words_per_minute
+        self.timeout = timeout
+        self.voice_options = {"words_per_minute": words_per_minute}
+
+    def stream(
+        self,
+        text: str,
+        output_format: str = "mp3",
+        sample_rate: Optional[int] = None,
+        chunk_bytes: int = 4096
+    ) -> Iterator[bytes]:
+        if output_format not in self.FFMPEG_FORMATS:
+            raise TTSBackendError(f"Unsupported output format for espeak backend: {output_format}")
+        sample_rate = sample_rate or (16000 if output_format == "pcm" else 22050)
+
+        espeak_cmd = [self.executable, "--stdout", "--stdin", "-v", self.voice_id, "-s", str(self.words_per_minute)]
+        if SSML_PATTERN.match(text):
+            espeak_cmd.append("-m")
+        ffmpeg_cmd = [
+            self.ffmpeg_binary,
+            "-hide_banner",
+            "-loglevel", "error",
+            "-f", "wav",
+            "-i", "pipe:0",
+            "-ac", "1",
+            "-ar", str(sample_rate),
+            *self.FFMPEG_FORMATS[output_format],
+            "pipe:1",
+        ]
+
+        espeak = subprocess.Popen(espeak_cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        ffmpeg = subprocess.Popen(ffmpeg_cmd, stdin=espeak.stdout, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        # ffmpeg owns the pipe between the two now
+        espeak.stdout.close()
+        watchdog = threading.Timer(self.timeout, self._kill, (espeak, ffmpeg))
+        watchdog.start()
+        try:
+            # Responses are a few KB at most, well within the pipe buffer
+            espeak.stdin.write(text.encode("utf-8"))
+            espeak.stdin.close()
+            while True:
+                piece = ffmpeg.stdout.read1(chunk_bytes)
+                if not piece:
+                    break
+                yield piece
+
+            ffmpeg.wait()
+            espeak.wait()
+            if not watchdog.is_alive():
+                raise TTSBackendError(f"espeak-ng timed out after {self.timeout}s")
+            if espeak.returncode != 0:
+                raise TTSBackendError(f"espeak-ng exited with status {espeak.returncode}")
+            if ffmpeg.returncode != 0:
+                raise TTSBackendError(f"ffmpeg failed to encode speech: {ffmpeg.stderr.read().decode(errors='ignore').strip()}")
+        finally:
+            watchdog.cancel()
+            self._kill(espeak, ffmpeg)
+            ffmpeg.stdout.close()
+            ffmpeg.stderr.close()
+
+    def warm_up(self):
+        # Pulls the executables and voice data into the page cache
+        self.synthesize("Ready.", "pcm")
+
+    @staticmethod
+    def _kill(*processes: subprocess.Popen):
+        for process in processes:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+
+
+BACKENDS = {
+    PollyBackend.name: PollyBackend,
+    EspeakBackend.name: EspeakBackend,
+}
+
+
+def create_backend(backend: str = "polly", **options) -> TTSBackend:
+    """
+    Instantiate a TTS backend by name
+
+    Args:
+        backend: Backend name ("polly" or "espeak")
+        **options: Constructor arguments of that backend (e.g., voice_id)
+
+    Returns:
+        The backend
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown TTS backend '{backend}'. Choose one of: {', '.join(BACKENDS)}")
+    return BACKENDS[backend](**options)
+
+
+class BackendRouter:
+    """
+    Orders backends for each request (TextToSpeech resolves the order once per text
+    and uses one backend for all of its chunks). "priority" keeps the configured order;
+    "latency" puts the backend with the lowest recent time to first byte first
+    (backends not measured yet are tried first, in configured order). A backend that
+    fails moves to the back for cooldown_seconds, so requests fail over straight to
+    the next one instead of waiting on a broken provider again.
+    """
+
+    def __init__(
+        self,
+        backends: List[TTSBackend],
+        selection: str = "priority",
+        cooldown_seconds: float = 30.0,
+        smoothing: float = 0.2
+    ):
+        """
+        Initialize the router
+
+        Args:
+            backends: Backends in order of preference
+            selection: "priority" or "latency"
+            cooldown_seconds: How long a failed backend is only used as a last resort
+            smoothing: Weight of the newest sample in the moving average of time to first byte
+        """
+        if not backends:
+            raise ValueError("At least one TTS backend is required")
+        if selection not in ("priority", "latency"):
+            raise ValueError(f"Unknown TTS backend selection '{selection}'. Choose priority or latency")
+        self.backends = backends
+        self.selection = selection
+        self.cooldown_seconds = cooldown_seconds
+        self.smoothing = smoothing
+
+        self._lock = threading.Lock()
+        self._state = {
+            backend.name: {"requests": 0, "failures": 0, "ttfb_ms": None, "down_until": 0.0}
+            for backend in backends
+        }
+
+    def candidates(self) -> List[TTSBackend]:
+        """
+        Backends to try for the next request, in order
+
+        Returns:
+            Healthy backends in selection order, then those cooling down after a failure
+        """
+        now = time.monotonic()
+        with self._lock:
+            healthy = [b for b in self.backends if self._state[b.name]["down_until"] <= now]
+            cooling = [b for b in self.backends if self._state[b.name]["down_until"] > now]
+            if self.selection == "latency":
+                healthy.sort(key=lambda b: (self._state[b.name]["ttfb_ms"] is not None, self._state[b.name]["ttfb_ms"] or 0))
+        return healthy + cooling
+
+    def record_success(self, backend: TTSBackend, ttfb_ms: float):
+        """Record a request that produced audio, and how long the first bytes took"""
+        with self._lock:
+            state = self._state[backend.name]
+            state["requests"] += 1
+            state["down_until"] = 0.0
+            previous = state["ttfb_ms"]
+            state["ttfb_ms"] = ttfb_ms if previous is None else previous + self.smoothing * (ttfb_ms - previous)
+
+    def record_failure(self, backend: TTSBackend):
+        """Record a failed request and start the backend's cooldown"""
+        with self._lock:
+            state = self._state[backend.name]
+            state["requests"] += 1
+            state["failures"] += 1
+            state["down_until"] = time.monotonic() + self.cooldown_seconds
+
+    def get_stats(self) -> Dict:
+        """
+        Get per-backend statistics for this process
+
+        Returns:
+            Dictionary with the selection mode and, per backend, requests, failures,
+            average time to first byte and whether it is healthy
+        """
+        now = time.monotonic()
+        with self._lock:
+            backends = {
+                name: {
+                    "requests": state["requests"],
+                    "failures": state["failures"],
+                    "ttfb_ms": round(state["ttfb_ms"], 1) if state["ttfb_ms"] is not None else None,
+                    "healthy": state["down_until"] <= now,
+                }
+                for name, state in self._state.items()
+            }
+        return {"selection": self.selection, "backends": backends}
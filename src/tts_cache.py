@@ -0,0 +1,317 @@
+"""
+Content-addressed cache for synthesized speech
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+import logging
+
+try:
+    import fcntl
+except ImportError:  # Windows: a single process owns the directory
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Share of the disk cap one process may write before it re-measures the directory;
+# bounds how far the other workers' writes can take it past the cap in between
+SWEEP_FRACTION = 16
+
+
+class AudioCache:
+    """
+    Two-tier cache of synthesized audio keyed by a hash of the text and every voice
+    setting that changes the output. Hot entries stay in a memory LRU bounded by
+    bytes; all entries are written to sharded content-addressed files on disk, and
+    the least recently used files are evicted once the directory exceeds its size cap.
+    File mtimes record use, so the disk LRU order survives restarts and is shared by
+    every worker process using the directory; the cap applies to the directory as a whole.
+    """
+
+    def __init__(
+        self,
+        disk_dir: Optional[Path] = None,
+        max_disk_bytes: int = 512 * 1024 * 1024,
+        max_memory_bytes: int = 32 * 1024 * 1024,
+        on_lookup: Optional[Callable[[bool, int], None]] = None
+    ):
+        """
+        Initialize the cache
+
+        Args:
+            disk_dir: Directory for the on-disk tier (memory only when None)
+            max_disk_bytes: Total size of cached files before LRU eviction
+            max_memory_bytes: Total size of entries kept in memory
+            on_lookup: Called with (hit, audio bytes served from the cache) after every lookup
+        """
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_bytes = max_memory_bytes
+        self.on_lookup = on_lookup
+
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        # key -> file size, least recently used first
+        self._disk: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_bytes = 0
+        self._written_since_sweep = 0
+        self._lock = threading.Lock()
+        self._sweep_lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "bytes_saved": 0, "evictions": 0}
+
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            self.lock_file = self.disk_dir / ".sweep.lock"
+            self._sweep_disk()
+
+    @staticmethod
+    def make_key(text: str, voice_id: str, engine: str, output_format: str, region: str, **options) -> str:
+        """
+        Build a cache key
+
+        Args:
+            text: Text (or SSML) that was synthesized
+            voice_id: Voice ID
+            engine: Synthesis engine (e.g., "neural")
+            output_format: Audio format (e.g., "mp3")
+            region: Provider region (voices can differ between regions)
+            **options: Any other setting that changes the audio (e.g., sample_rate)
+
+        Returns:
+            Hex digest identifying this audio
+        """
+        identity = {
+            "text": text,
+            "voice_id": voice_id,
+            "engine": engine,
+            "output_format": output_format,
+            "region": region,
+            **options,
+        }
+        return hashlib.sha256(json.dumps(identity, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Look up cached audio
+
+        Args:
+            key: Cache key from make_key
+
+        Returns:
+            Audio bytes, or None on a miss
+        """
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                self.stats["bytes_saved"] += len(audio)
+        if audio is not None:
+            self._report(True, len(audio))
+            return audio
+
+        audio = self._read_disk(key)
+        with self._lock:
+            if audio is None:
+                self.stats["misses"] += 1
+            else:
+                self.stats["disk_hits"] += 1
+                self.stats["bytes_saved"] += len(audio)
+                self._remember(key, audio)
+        self._report(audio is not None, len(audio) if audio else 0)
+        return audio
+
+    def put(self, key: str, audio: bytes):
+        """
+        Store synthesized audio
+
+        Args:
+            key: Cache key from make_key
+            audio: Audio bytes
+        """
+        if not audio:
+            return
+        with self._lock:
+            self._remember(key, audio)
+        self._write_disk(key, audio)
+
+    def path_for(self, key: str) -> Optional[Path]:
+        """
+        Path of a cached entry's file, if it is on disk
+
+        Args:
+            key: Cache key from make_key
+
+        Returns:
+            File path or None
+        """
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        return path if path.exists() else None
+
+    def get_stats(self) -> Dict:
+        """
+        Get cache statistics for this process
+
+        Returns:
+            Dictionary with memory/disk hits, misses, hit ratio, bytes saved and tier sizes
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["memory_entries"] = len(self._memory)
+            stats["memory_bytes"] = self._memory_bytes
+            stats["disk_entries"] = len(self._disk)
+            stats["disk_bytes"] = self._disk_bytes
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_ratio"] = round(hits / lookups, 3) if lookups else 0.0
+        stats["disk_enabled"] = self.disk_dir is not None
+        return stats
+
+    def _remember(self, key: str, audio: bytes):
+        """Insert into the memory tier, evicting the least recently used. Caller must hold the lock."""
+        if len(audio) > self.max_memory_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self._memory[key] = audio
+        self._memory_bytes += len(audio)
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _disk_path(self, key: str) -> Path:
+        # Two levels of sharding keep directories small even with millions of entries
+        return self.disk_dir / key[:2] / key[2:4] / f"{key}.audio"
+
+    @contextmanager
+    def _file_lock(self):
+        """Hold an exclusive lock on the directory across processes"""
+        with open(self.lock_file, "a") as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _sweep_disk(self):
+        """
+        Measure the directory, delete the least recently used files beyond the size cap
+        and rebuild the disk LRU index from what is left. Other worker processes write
+        to the same directory, so usage is taken from the files rather than this
+        process's index.
+        """
+        try:
+            with self._sweep_lock, self._file_lock():
+                entries = []
+                for shard in os.scandir(self.disk_dir):
+                    if not shard.is_dir():
+                        continue
+                    for subshard in os.scandir(shard.path):
+                        if not subshard.is_dir():
+                            continue
+                        for entry in os.scandir(subshard.path):
+                            if not entry.name.endswith(".audio"):
+                                continue
+                            try:
+                                stat = entry.stat()
+                            except FileNotFoundError:
+                                continue
+                            entries.append((stat.st_mtime, entry.name[:-len(".audio")], stat.st_size))
+                entries.sort()
+
+                total = sum(size for _, _, size in entries)
+                evicted = 0
+                while total > self.max_disk_bytes and len(entries) - evicted > 1:
+                    _, key, size = entries[evicted]
+                    try:
+                        self._disk_path(key).unlink()
+                    except FileNotFoundError:
+                        pass
+                    total -= size
+                    evicted += 1
+        except Exception as e:
+            logger.error(f"Error evicting TTS cache entries: {str(e)}")
+            return
+
+        with self._lock:
+            self._disk = OrderedDict((key, size) for _, key, size in entries[evicted:])
+            self._disk_bytes = total
+            self._written_since_sweep = 0
+            self.stats["evictions"] += evicted
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        if not self.disk_dir:
+            return None
+
+        path = self._disk_path(key)
+        try:
+            with open(path, "rb") as f:
+                audio = f.read()
+            # Record the use so the LRU order survives restarts
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                size = self._disk.pop(key, None)
+                if size is not None:
+                    self._disk_bytes -= size
+            return None
+        except Exception as e:
+            logger.error(f"Error reading TTS cache entry: {str(e)}")
+            return None
+
+        with self._lock:
+            if key in self._disk:
+                self._disk.move_to_end(key)
+            else:
+                # Written by another worker process
+                self._disk[key] = len(audio)
+                self._disk_bytes += len(audio)
+        return audio
+
+    def _write_disk(self, key: str, audio: bytes):
+        """Atomically write an entry to disk, then sweep the directory if it may be over the size cap"""
+        if not self.disk_dir:
+            return
+
+        path = self._disk_path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.error(f"Error writing TTS cache entry: {str(e)}")
+            return
+
+        with self._lock:
+            previous = self._disk.pop(key, None)
+            if previous is not None:
+                self._disk_bytes -= previous
+            self._disk[key] = len(audio)
+            self._disk_bytes += len(audio)
+            self._written_since_sweep += len(audio)
+            sweep = (
+                self._disk_bytes > self.max_disk_bytes
+                or self._written_since_sweep >= self.max_disk_bytes // SWEEP_FRACTION
+            )
+        if sweep:
+            self._sweep_disk()
+
+    def _report(self, hit: bool, size: int):
+        if self.on_lookup:
+            try:
+                self.on_lookup(hit, size)
+            except Exception as e:
+                logger.error(f"Error reporting TTS cache lookup: {str(e)}")
@@ -0,0 +1,217 @@
+"""
+Voice activity detection: silence trimming, pause splitting and live endpointing
+"""
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# Speech audio is 16 kHz mono float32 (see audio_decoder)
+SAMPLE_RATE = 16000
+
+
+def frame_energies(audio: np.ndarray, frame_samples: int) -> np.ndarray:
+    """
+    Compute per-frame energy in dBFS
+
+    Args:
+        audio: Mono float32 samples
+        frame_samples: Samples per (non-overlapping) frame
+
+    Returns:
+        Array of frame energies in dB (a trailing partial frame is ignored)
+    """
+    n_frames = len(audio) // frame_samples
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = audio[:n_frames * frame_samples].reshape(n_frames, frame_samples)
+    rms = np.sqrt(np.mean(frames.astype(np.float32) ** 2, axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-10))
+
+
+class VoiceActivityDetector:
+    """
+    Energy-based VAD for whole clips. The speech threshold adapts to each clip's
+    noise floor, short gaps inside speech are bridged (hangover) and very short
+    bursts are discarded as clicks.
+    """
+
+    def __init__(
+        self,
+        frame_ms: int = 30,
+        min_energy_db: float = -50.0,
+        margin_db: float = 12.0,
+        dynamic_range_db: float = 25.0,
+        min_contrast_db: float = 6.0,
+        min_speech_ms: int = 150,
+        min_silence_ms: int = 300,
+        padding_ms: int = 200,
+        max_segment_seconds: float = 30.0
+    ):
+        """
+        Initialize the detector
+
+        Args:
+            frame_ms: Analysis frame length
+            min_energy_db: Frames quieter than this are never speech
+            margin_db: How far above the clip's noise floor a frame must be to count as speech
+            dynamic_range_db: Upper bound on how far below the clip's peak the threshold may sit
+            min_contrast_db: Minimum loud-to-quiet spread for a clip to contain any speech
+            min_speech_ms: Speech runs shorter than this are dropped
+            min_silence_ms: Pauses shorter than this are treated as part of the speech
+            padding_ms: Audio kept around each speech region so word edges aren't clipped
+            max_segment_seconds: Longest segment produced by split()
+        """
+        self.frame_samples = int(SAMPLE_RATE * frame_ms / 1000)
+        self.frame_ms = frame_ms
+        self.min_energy_db = min_energy_db
+        self.margin_db = margin_db
+        self.dynamic_range_db = dynamic_range_db
+        self.min_contrast_db = min_contrast_db
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.min_silence_frames = max(1, min_silence_ms // frame_ms)
+        self.padding_samples = int(SAMPLE_RATE * padding_ms / 1000)
+        self.max_segment_samples = int(SAMPLE_RATE * max_segment_seconds)
+
+    def detect(self, audio: np.ndarray) -> List[Tuple[int, int]]:
+        """
+        Find speech regions
+
+        Args:
+            audio: Mono float32 samples at 16 kHz
+
+        Returns:
+            List of (start_sample, end_sample) speech regions, padded and non-overlapping
+        """
+        energies = frame_energies(audio, self.frame_samples)
+        if not len(energies):
+            return []
+
+        noise_floor = np.percentile(energies, 10)
+        peak = np.percentile(energies, 95)
+        if peak - noise_floor < self.min_contrast_db:
+            # Steady hum/hiss (or digital silence): speech always varies in level
+            return []
+        # Clips that are nearly all speech have a high "noise floor"; never demand more
+        # than dynamic_range_db below the peak or quiet syllables would be cut
+        threshold = max(self.min_energy_db, min(noise_floor + self.margin_db, peak - self.dynamic_range_db))
+        is_speech = energies > threshold
+
+        regions = []
+        start = None
+        silence = 0
+        for i, speech in enumerate(is_speech):
+            if speech:
+                if start is None:
+                    start = i
+                silence = 0
+            elif start is not None:
+                silence += 1
+                if silence >= self.min_silence_frames:
+                    regions.append((start, i - silence + 1))
+                    start = None
+                    silence = 0
+        if start is not None:
+            regions.append((start, len(is_speech) - silence))
+
+        samples = []
+        for start, end in regions:
+            if end - start < self.min_speech_frames:
+                continue
+            begin = max(0, start * self.frame_samples - self.padding_samples)
+            finish = min(len(audio), end * self.frame_samples + self.padding_samples)
+            if samples and begin <= samples[-1][1]:
+                samples[-1] = (samples[-1][0], finish)
+            else:
+                samples.append((begin, finish))
+        return samples
+
+    def split(self, audio: np.ndarray) -> Tuple[List[np.ndarray], Dict]:
+        """
+        Trim leading/trailing silence and split long recordings on pauses
+
+        Args:
+            audio: Mono float32 samples at 16 kHz
+
+        Returns:
+            Tuple of (speech segments no longer than max_segment_seconds, stats dictionary)
+        """
+        regions = self.detect(audio)
+
+        # Merge neighbouring regions while the combined span fits in one segment,
+        # so cuts only happen in pauses
+        spans: List[Tuple[int, int]] = []
+        for start, end in regions:
+            if spans and end - spans[-1][0] <= self.max_segment_samples:
+                spans[-1] = (spans[-1][0], end)
+                continue
+            # A single region longer than a segment has no pause to cut at; split it evenly
+            while end - start > self.max_segment_samples:
+                spans.append((start, start + self.max_segment_samples))
+                start += self.max_segment_samples
+            spans.append((start, end))
+
+        speech_samples = sum(end - start for start, end in regions)
+        duration = len(audio) / SAMPLE_RATE
+        stats = {
+            "duration": round(duration, 3),
+            "speech_duration": round(speech_samples / SAMPLE_RATE, 3),
+            "speech_ratio": round(speech_samples / len(audio), 3) if len(audio) else 0.0,
+            "speech_detected": bool(regions),
+            "segments": len(spans),
+        }
+        return [audio[start:end] for start, end in spans], stats
+
+
+class EndpointDetector:
+    """Detects end-of-utterance in a live stream from trailing silence after speech"""
+
+    def __init__(
+        self,
+        silence_ms: int = 700,
+        frame_ms: int = 30,
+        energy_threshold_db: float = -40.0
+    ):
+        """
+        Initialize the endpoint detector
+
+        Args:
+            silence_ms: Trailing silence after speech that ends the utterance
+            frame_ms: Analysis frame length
+            energy_threshold_db: Frame energy above which a frame counts as speech
+        """
+        self.frame_samples = int(SAMPLE_RATE * frame_ms / 1000)
+        self.silence_frames_needed = max(1, silence_ms // frame_ms)
+        self.energy_threshold_db = energy_threshold_db
+
+        self._remainder = np.zeros(0, dtype=np.float32)
+        self._heard_speech = False
+        self._silent_frames = 0
+
+    def feed(self, audio: np.ndarray) -> bool:
+        """
+        Feed 16 kHz float32 audio
+
+        Args:
+            audio: Mono float32 samples
+
+        Returns:
+            True once speech has been heard and followed by enough silence
+        """
+        audio = np.concatenate([self._remainder, audio])
+        energies = frame_energies(audio, self.frame_samples)
+        self._remainder = audio[len(energies) * self.frame_samples:]
+
+        for is_speech in energies >= self.energy_threshold_db:
+            if is_speech:
+                self._heard_speech = True
+                self._silent_frames = 0
+            elif self._heard_speech:
+                self._silent_frames += 1
+
+        return self._heard_speech and self._silent_frames >= self.silence_frames_needed
+
+    def reset(self):
+        """Start listening for the next utterance"""
+        self._remainder = np.zeros(0, dtype=np.float32)
+        self._heard_speech = False
+        self._silent_frames = 0
@@ -2,10 +2,17 @@
 Main Voice Bot class that orchestrates all components
 """
 import time
-from typing import Optional
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional
+import numpy as np
+from src.conversation import SessionStore
+from src.speech_streamer import SentenceChunker, SpeechStreamer
 from src.speech_to_text import SpeechToText
 from src.nlp_processor import NLPProcessor
-from src.response_generator import ResponseGenerator
+from src.prompt_builder import PromptBuilder
+from src.response_cache import ResponseCache
+from src.response_generator import DEFAULT_FALLBACK_RESPONSE, FALLBACK_RESPONSES, ResponseGenerator
+from src.response_router import ResponseRouter
 from src.text_to_speech import TextToSpeech
 from src.database import DatabaseManager
 from src.analytics import Analytics
@@ -15,12 +22,21 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Exercises intent detection and entity extraction during warm-up
+WARMUP_QUERY = "What is the balance of account 12345?"
+
 
 class VoiceBot:
     """Main Voice Bot class"""
     
-    def __init__(self):
-        """Initialize the Voice Bot with all components"""
+    def __init__(self, warm_up_connections: bool = True):
+        """
+        Initialize the Voice Bot with all components, then warm them up
+        
+        Args:
+            warm_up_connections: Also open connections and pre-synthesize canned audio
+                (pass False in a process that will fork; see warm_up)
+        """
         logger.info("Initializing Voice Bot...")
         
         # Initialize components
@@ -39,62 +55,320 @@ class VoiceBot:
             self.nlp_processor = None
         
         try:
-            self.response_generator = ResponseGenerator()
+            self.response_generator = ResponseGenerator(
+                response_cache=self._build_response_cache(),
+                prompt_builder=self._build_prompt_builder(),
+                on_llm_attempt=lambda outcome, latency_ms: self.analytics.track_latency(f"llm_attempt_{outcome}", latency_ms)
+            )
             logger.info("Response Generator initialized")
         except Exception as e:
             logger.error(f"Error initializing Response Generator: {str(e)}")
             self.response_generator = None
         
         try:
-            self.text_to_speech = TextToSpeech()
+            self.text_to_speech = TextToSpeech(
+                on_cache_lookup=lambda hit, size: self.analytics.track_cache("tts", hit, saved_bytes=size)
+            )
             logger.info("Text-to-Speech initialized")
         except Exception as e:
             logger.error(f"Error initializing Text-to-Speech: {str(e)}")
             self.text_to_speech = None
         
+        self.response_router = ResponseRouter(
+            self.response_generator,
+            thresholds=settings.router_template_thresholds,
+            max_template_words=settings.router_template_max_words,
+            on_route=lambda tier, latency_ms: self.analytics.track_route(tier, latency_ms)
+        )
+        
         self.database = DatabaseManager()
         self.analytics = Analytics()
         
+        self.sessions = self._build_session_store()
+        
+        self.warmup_ms: Dict[str, int] = {}
+        if settings.warmup_enabled:
+            self.warm_up(connections=warm_up_connections)
+        
         logger.info("Voice Bot initialization complete")
     
-    def process_audio_file(self, audio_file_path: str) -> Optional[str]:
+    def warm_up(self, models: bool = True, connections: bool = True) -> Dict[str, int]:
+        """
+        Pay one-off costs before the first real request: a dummy inference through each
+        model (first-call JIT and allocator warm-up), pooled connections to the database,
+        Gemini and the TTS backends, and pre-synthesized audio for canned responses
+        
+        Args:
+            models: Run the dummy inferences
+            connections: Open connections and pre-synthesize audio. Skip this in a process
+                that will fork (e.g., the gunicorn master), since sockets must not be
+                shared between workers; each worker then runs it itself.
+            
+        Returns:
+            Milliseconds spent per component
+        """
+        steps = []
+        if models:
+            steps += [
+                ("speech_to_text", self._warm_up_speech_to_text),
+                ("nlp", self._warm_up_nlp),
+            ]
+        if connections:
+            steps += [
+                ("database", self.database.ping),
+                ("llm", self._warm_up_llm),
+                ("text_to_speech", self._warm_up_text_to_speech),
+                ("canned_audio", self._precache_canned_audio),
+            ]
+        
+        for name, step in steps:
+            start_time = time.time()
+            try:
+                step()
+            except Exception as e:
+                logger.error(f"Error warming up {name}: {str(e)}")
+            self.warmup_ms[name] = int((time.time() - start_time) * 1000)
+            logger.info(f"Warmed up {name} in {self.warmup_ms[name]}ms")
+        return dict(self.warmup_ms)
+    
+    def _warm_up_speech_to_text(self):
+        if not self.speech_to_text:
+            return
+        # Straight to the model: VAD would drop silence before it got there
+        silence = np.zeros(16000, dtype=np.float32)
+        self.speech_to_text.backend.transcribe(silence)
+        if self.speech_to_text.scheduler:
+            self.speech_to_text.backend.transcribe_batch([silence])
+    
+    def _warm_up_nlp(self):
+        if not self.nlp_processor:
+            return
+        self.nlp_processor.detect_intent(WARMUP_QUERY)
+        self.nlp_processor.extract_entities(WARMUP_QUERY)
+    
+    def _warm_up_llm(self):
+        if self.response_generator:
+            self.response_generator.llm_client.warm_up()
+    
+    def _warm_up_text_to_speech(self):
+        if self.text_to_speech:
+            self.text_to_speech.warm_up()
+    
+    def _precache_canned_audio(self):
+        """Synthesize fallback and template responses into the audio cache"""
+        if not self.text_to_speech or not self.text_to_speech.cache:
+            return
+        
+        texts = list(FALLBACK_RESPONSES.values()) + [DEFAULT_FALLBACK_RESPONSE]
+        for variants in self.response_router.templates.values():
+            texts.extend(variants)
+        # The streaming path synthesizes each response sentence by sentence
+        sentences = []
+        for text in texts:
+            chunker = SentenceChunker()
+            sentences.extend(chunker.feed(text) + chunker.flush())
+        texts = list(dict.fromkeys(texts + sentences))
+        
+        cached = self.text_to_speech.precache(texts)
+        logger.info(f"Pre-synthesized {cached}/{len(texts)} canned responses")
+    
+    def _build_response_cache(self) -> Optional[ResponseCache]:
+        """
+        Create the response cache, reusing the intent encoder for near-duplicate matching
+        
+        Returns:
+            ResponseCache, or None if disabled
+        """
+        if not settings.response_cache_enabled:
+            return None
+        
+        encoder = None
+        if settings.response_cache_similarity > 0 and self.nlp_processor and self.nlp_processor.intent_classifier:
+            encoder = self.nlp_processor.intent_classifier.encoder
+        
+        def track(status: str, saved_ms: float):
+            if status != "bypass":
+                self.analytics.track_cache("response", status != "miss", saved_ms)
+        
+        return ResponseCache(
+            max_entries=settings.response_cache_max_entries,
+            ttl_seconds=settings.response_cache_ttl_seconds,
+            encoder=encoder,
+            similarity_threshold=settings.response_cache_similarity,
+            on_lookup=track
+        )
+    
+    def _build_prompt_builder(self) -> PromptBuilder:
+        """
+        Create the prompt builder, ranking FAQs with the intent encoder's embeddings
+        
+        Returns:
+            PromptBuilder
+        """
+        encoder = None
+        if self.nlp_processor and self.nlp_processor.intent_classifier:
+            encoder = self.nlp_processor.intent_classifier.encoder
+        return PromptBuilder(
+            settings.prompt_context_token_budget,
+            conversation_token_budget=settings.prompt_conversation_token_budget,
+            encoder=encoder
+        )
+    
+    def _build_session_store(self) -> Optional[SessionStore]:
+        """
+        Create the conversation session store
+        
+        Returns:
+            SessionStore, or None if disabled
+        """
+        if not settings.conversation_enabled:
+            return None
+        
+        summarize = None
+        if settings.conversation_llm_summary and self.response_generator:
+            summarize = self.response_generator.summarize_conversation
+        
+        return SessionStore(
+            max_sessions=settings.conversation_max_sessions,
+            ttl_seconds=settings.conversation_ttl_seconds,
+            window_turns=settings.conversation_window_turns,
+            max_summary_tokens=settings.conversation_summary_max_tokens,
+            summarize=summarize,
+            # Gunicorn workers don't route a conversation to the same process twice
+            store=self.database if self.database.Session else None
+        )
+    
+    def _record_turn(self, session_id: Optional[str], text: str, response_text: str, intent: str):
+        """Append a completed exchange to the caller's conversation session"""
+        if self.sessions and session_id:
+            try:
+                self.sessions.record(session_id, text, response_text, intent)
+            except Exception as e:
+                logger.error(f"Error recording conversation turn: {str(e)}")
+    
+    def _build_context(self, text: str, intent: str, session_id: Optional[str] = None) -> dict:
+        """
+        Gather account or FAQ context from the database/backend for an intent,
+        plus the conversation so far
+        
+        Args:
+            text: User query text
+            intent: Detected intent
+            session_id: Conversation session key, or None for a stateless query
+            
+        Returns:
+            Context dictionary for response generation
+        """
+        context = {}
+        if self.sessions and session_id:
+            conversation = self.sessions.context_for(session_id)
+            if conversation:
+                context["conversation"] = conversation
+        
+        if intent in ["account_inquiry", "transaction"]:
+            # Extract account ID if present, preferring an explicit account number
+            # over the first bare number in the query
+            entities = self.nlp_processor.extract_entities(text)
+            candidates = (
+                [e for e in entities if e["type"] == "account_number"]
+                or [e for e in entities if e["type"] == "number"]
+            )
+            if candidates:
+                account_info = self.database.get_account_info(candidates[0]["value"])
+                if account_info:
+                    context["account_info"] = account_info
+        
+        if intent == "faq":
+            faqs = self.database.get_faqs(text)
+            if faqs:
+                context["faqs"] = faqs
+        
+        return context
+    
+    def process_audio_file(
+        self,
+        audio_file_path: str,
+        progress_callback: Optional[Callable[[str], None]] = None,
+        session_id: Optional[str] = None
+    ) -> Optional[str]:
         """
         Process an audio file through the complete pipeline
         
         Args:
             audio_file_path: Path to the audio file
+            progress_callback: Optional callable invoked with the name of each stage as it starts
+            session_id: Conversation session key (e.g., the JWT identity); None for a stateless query
+            
+        Returns:
+            Tuple of (output_path, error_message). output_path is None if failed.
+        """
+        logger.info(f"Processing audio file: {audio_file_path}")
+        
+        # Check if file exists
+        audio_path = Path(audio_file_path)
+        if not audio_path.exists():
+            logger.error(f"Audio file does not exist: {audio_file_path}")
+            return None, f"Audio file not found: {audio_file_path}"
+        
+        return self.process_audio_bytes(
+            audio_path.read_bytes(), progress_callback, source=audio_file_path, session_id=session_id
+        )
+    
+    def process_audio_bytes(
+        self,
+        audio_bytes: bytes,
+        progress_callback: Optional[Callable[[str], None]] = None,
+        source: str = "<audio upload>",
+        session_id: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Process encoded audio held in memory through the complete pipeline
+        
+        Args:
+            audio_bytes: Encoded audio bytes (webm/wav/mp3/etc.)
+            progress_callback: Optional callable invoked with the name of each stage as it starts
+            source: Label for the audio used in error logs
+            session_id: Conversation session key (e.g., the JWT identity); None for a stateless query
             
         Returns:
             Tuple of (output_path, error_message). output_path is None if failed.
         """
         start_time = time.time()
+        report = progress_callback or (lambda stage: None)
         
         try:
             # Step 1: Speech-to-Text
-            logger.info(f"Processing audio file: {audio_file_path}")
-            
             if not self.speech_to_text:
                 logger.error("Speech-to-Text not available")
                 return None, "Speech-to-Text not available"
             
-            # Check if file exists and has content
-            from pathlib import Path
-            audio_path = Path(audio_file_path)
-            if not audio_path.exists():
-                logger.error(f"Audio file does not exist: {audio_file_path}")
-                return None, f"Audio file not found: {audio_file_path}"
-            
-            file_size = audio_path.stat().st_size
-            if file_size == 0:
-                logger.error(f"Audio file is empty: {audio_file_path}")
+            # Check the audio has content
+            audio_size = len(audio_bytes)
+            if audio_size == 0:
+                logger.error(f"Audio is empty: {source}")
                 return None, "Audio file is empty (0 bytes)"
             
-            if file_size < 100:  # Very small file, likely invalid
-                logger.warning(f"Audio file is very small ({file_size} bytes), may be invalid")
+            if audio_size < 100:  # Very small file, likely invalid
+                logger.warning(f"Audio is very small ({audio_size} bytes), may be invalid")
+            
+            logger.info(f"Audio size: {audio_size} bytes")
+            
+            report("transcribing")
+            audio = self.speech_to_text.decode_audio(audio_bytes)
+            if audio is None:
+                logger.error("Failed to decode audio")
+                return None, "Failed to decode audio"
             
-            logger.info(f"Audio file size: {file_size} bytes")
+            stt_result = self.speech_to_text.transcribe_with_vad(audio)
+            if self.speech_to_text.cache is not None:
+                self.analytics.track_cache("transcription", stt_result["cached"])
+            self.analytics.track_speech(stt_result["duration"], stt_result["speech_duration"])
+            if not stt_result["speech_detected"]:
+                # Nothing to answer: skip STT, LLM and TTS entirely
+                logger.info(f"No speech detected in {stt_result['duration']}s of audio")
+                return None, "No speech detected"
             
-            transcribed_text = self.speech_to_text.transcribe_audio_file(audio_file_path)
+            transcribed_text = stt_result["text"]
             if not transcribed_text:
                 logger.error("Failed to transcribe audio")
                 return None, "Failed to transcribe audio"
@@ -106,45 +380,32 @@ class VoiceBot:
                 logger.error("NLP Processor not available")
                 return None, "NLP Processor not available"
             
+            report("understanding")
             intent_data = self.nlp_processor.detect_intent(transcribed_text)
             intent = intent_data.get("intent", "general")
             logger.info(f"Detected intent: {intent}")
             
-            # Step 3: Get context from database/backend if needed
-            context = {}
-            if intent in ["account_inquiry", "transaction"]:
-                # Extract account ID if present
-                entities = self.nlp_processor.extract_entities(transcribed_text)
-                for entity in entities:
-                    if entity.get("type") == "number":
-                        account_info = self.database.get_account_info(entity["value"])
-                        if account_info:
-                            context["account_info"] = account_info
-                        break
-            
-            if intent == "faq":
-                faqs = self.database.get_faqs(transcribed_text)
-                if faqs:
-                    context["faqs"] = faqs
-            
-            # Step 4: Generate Response
-            if not self.response_generator:
+            # Step 3: Route: trivial intents are answered from templates, the rest by the LLM
+            tier = self.response_router.select_tier(transcribed_text, intent_data)
+            if tier == "llm" and not self.response_generator:
                 logger.error("Response Generator not available")
                 return None, "Response Generator not available"
             
-            response_text = self.response_generator.generate_response(
-                transcribed_text,
-                intent,
-                context
-            )
-            logger.info(f"Generated response: {response_text}")
+            # Step 4: Get context from database/backend if needed
+            context = self._build_context(transcribed_text, intent, session_id) if tier == "llm" else {}
             
-            # Step 5: Text-to-Speech
+            # Step 5: Generate Response
+            report("generating")
+            response_text = self.response_router.respond(tier, transcribed_text, intent, context)
+            logger.info(f"Generated response ({tier}): {response_text}")
+            
+            # Step 6: Text-to-Speech
             if not self.text_to_speech:
                 logger.error("Text-to-Speech not available")
                 return None, "Text-to-Speech not available"
             
-            output_file = settings.audio_dir / f"response_{int(time.time())}.mp3"
+            report("synthesizing")
+            output_file = settings.audio_dir / f"response_{int(time.time() * 1000)}.mp3"
             audio_data = self.text_to_speech.synthesize(response_text, str(output_file))
             
             if not audio_data:
@@ -153,8 +414,9 @@ class VoiceBot:
             
             # Calculate response time
             response_time = int((time.time() - start_time) * 1000)
+            self.analytics.track_latency("time_to_first_audio_upload", response_time)
             
-            # Step 6: Log to database
+            # Step 7: Log to database
             self.database.log_query(
                 transcribed_text,
                 intent,
@@ -162,25 +424,25 @@ class VoiceBot:
                 response_time
             )
             
-            # Step 7: Track analytics
+            # Step 8: Track analytics
             self.analytics.track_query(
                 transcribed_text,
                 intent,
                 response_time,
                 success=True
             )
+            self._record_turn(session_id, transcribed_text, response_text, intent)
             
-            logger.info(f"Processing complete in {response_time}ms")
             logger.info(f"Processing complete in {response_time}ms")
             return str(output_file), None
         
         except Exception as e:
-            logger.error(f"Error processing audio file: {str(e)}")
+            logger.error(f"Error processing audio: {str(e)}")
             response_time = int((time.time() - start_time) * 1000)
             
             # Log error
             self.database.log_query(
-                audio_file_path,
+                source,
                 "error",
                 "",
                 response_time,
@@ -188,7 +450,7 @@ class VoiceBot:
             )
             
             self.analytics.track_query(
-                audio_file_path,
+                source,
                 "error",
                 response_time,
                 success=False,
@@ -197,12 +459,13 @@ class VoiceBot:
             
             return None, str(e)
     
-    def process_text_query(self, text: str) -> tuple[str, Optional[str]]:
+    def process_text_query(self, text: str, session_id: Optional[str] = None) -> tuple[str, Optional[str]]:
         """
         Process a text query (useful for testing without audio)
         
         Args:
             text: Input text query
+            session_id: Conversation session key (e.g., the JWT identity); None for a stateless query
             
         Returns:
             Tuple of (response_text, audio_file_path)
@@ -219,26 +482,18 @@ class VoiceBot:
             intent = intent_data.get("intent", "general")
             logger.info(f"Detected intent: {intent}")
             
-            # Get context
-            context = {}
-            if intent in ["account_inquiry", "transaction"]:
-                entities = self.nlp_processor.extract_entities(text)
-                for entity in entities:
-                    if entity.get("type") == "number":
-                        account_info = self.database.get_account_info(entity["value"])
-                        if account_info:
-                            context["account_info"] = account_info
-                        break
-            
-            # Generate Response
-            if not self.response_generator:
+            # Route, then get context for the LLM tier
+            tier = self.response_router.select_tier(text, intent_data)
+            if tier == "llm" and not self.response_generator:
                 logger.error("Response Generator not available")
                 return "Error: Response Generator not initialized. Please check your OpenAI API key in .env file.", None
+            context = self._build_context(text, intent, session_id) if tier == "llm" else {}
             
-            response_text = self.response_generator.generate_response(text, intent, context)
+            # Generate Response
+            response_text = self.response_router.respond(tier, text, intent, context)
             
             # Text-to-Speech
-            output_file = settings.audio_dir / f"response_{int(time.time())}.mp3"
+            output_file = settings.audio_dir / f"response_{int(time.time() * 1000)}.mp3"
             audio_file_path = None
             if self.text_to_speech:
                 self.text_to_speech.synthesize(response_text, str(output_file))
@@ -246,8 +501,11 @@ class VoiceBot:
             
             # Log and track
             response_time = int((time.time() - start_time) * 1000)
+            if audio_file_path:
+                self.analytics.track_latency("time_to_first_audio_full", response_time)
             self.database.log_query(text, intent, response_text, response_time)
             self.analytics.track_query(text, intent, response_time, success=True)
+            self._record_turn(session_id, text, response_text, intent)
             
             return response_text, audio_file_path
         
@@ -256,4 +514,84 @@ class VoiceBot:
             response_time = int((time.time() - start_time) * 1000)
             self.analytics.track_query(text, "error", response_time, success=False, error=str(e))
             return f"Error: {str(e)}", None
-
+    
+    def process_text_query_stream(self, text: str, session_id: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Process a text query, streaming the spoken response sentence by sentence.
+        The LLM output is cut at sentence boundaries and each sentence is synthesized
+        while the rest is still being generated.
+        
+        Args:
+            text: Input text query
+            session_id: Conversation session key (e.g., the JWT identity); None for a stateless query
+            
+        Yields:
+            {"type": "segment", "index", "text", "audio_file"} for each sentence in order,
+            then {"type": "done", "text", "intent", "time_to_first_audio_ms", "response_time_ms"}
+            or {"type": "error", "error"}
+        """
+        start_time = time.time()
+        
+        if not self.nlp_processor:
+            yield {"type": "error", "error": "NLP Processor not available"}
+            return
+        
+        try:
+            intent_data = self.nlp_processor.detect_intent(text)
+            intent = intent_data.get("intent", "general")
+            logger.info(f"Detected intent: {intent}")
+            
+            tier = self.response_router.select_tier(text, intent_data)
+            if tier == "llm" and not self.response_generator:
+                yield {"type": "error", "error": "Response Generator not available"}
+                return
+            context = self._build_context(text, intent, session_id) if tier == "llm" else {}
+            
+            stamp = int(time.time() * 1000)
+            
+            def synthesize(sentence: str, index: int) -> Optional[str]:
+                if not self.text_to_speech:
+                    return None
+                output_file = settings.audio_dir / f"response_{stamp}_{index}.mp3"
+                if not self.text_to_speech.synthesize(sentence, str(output_file)):
+                    return None
+                return output_file.name
+            
+            streamer = SpeechStreamer(synthesize)
+            deltas = self.response_router.respond_stream(tier, text, intent, context)
+            
+            sentences = []
+            first_audio_ms = None
+            for segment in streamer.stream(deltas):
+                sentences.append(segment["text"])
+                if segment["audio"] and first_audio_ms is None:
+                    first_audio_ms = int((time.time() - start_time) * 1000)
+                    self.analytics.track_latency("time_to_first_audio_streaming", first_audio_ms)
+                yield {
+                    "type": "segment",
+                    "index": segment["index"],
+                    "text": segment["text"],
+                    "audio_file": segment["audio"],
+                }
+            
+            response_text = " ".join(sentences)
+            response_time = int((time.time() - start_time) * 1000)
+            self.database.log_query(text, intent, response_text, response_time)
+            self.analytics.track_query(text, intent, response_time, success=True)
+            logger.info(f"Streamed {len(sentences)} segments, first audio after {first_audio_ms}ms")
+            
+            yield {
+                "type": "done",
+                "text": response_text,
+                "intent": intent,
+                "time_to_first_audio_ms": first_audio_ms,
+                "response_time_ms": response_time,
+            }
+            # After "done", so summarizing older turns never delays the response
+            self._record_turn(session_id, text, response_text, intent)
+        
+        except Exception as e:
+            logger.error(f"Error streaming text query: {str(e)}")
+            response_time = int((time.time() - start_time) * 1000)
+            self.analytics.track_query(text, "error", response_time, success=False, error=str(e))
+            yield {"type": "error", "error": str(e)}
@@ -0,0 +1,60 @@
+"""
+Tests for resampling audio to Whisper's 16 kHz
+"""
+import numpy as np
+import pytest
+
+from src.audio_decoder import RESAMPLE_MAX_FACTOR, SAMPLE_RATE, Resampler, resample
+
+
+def tone(frequency, sample_rate, seconds=1.0):
+    t = np.arange(int(sample_rate * seconds)) / sample_rate
+    return np.sin(2 * np.pi * frequency * t).astype(np.float32)
+
+
+def amplitude(audio, edge=200):
+    """Peak amplitude of a sine, ignoring the filter's edge effects"""
+    return float(np.sqrt(2 * np.mean(audio[edge:-edge] ** 2)))
+
+
+@pytest.mark.parametrize("sample_rate", [8000, 22050, 44100, 48000])
+def test_speech_band_tone_is_preserved(sample_rate):
+    audio = resample(tone(1000, sample_rate), sample_rate)
+    assert len(audio) == SAMPLE_RATE
+    expected = tone(1000, SAMPLE_RATE)
+    assert np.max(np.abs(audio[200:-200] - expected[200:-200])) < 0.01
+
+
+@pytest.mark.parametrize("sample_rate", [44100, 48000])
+def test_content_above_8khz_does_not_alias(sample_rate):
+    # Without a low-pass filter a 10 kHz tone folds down to 6 kHz at full amplitude
+    audio = resample(tone(10000, sample_rate), sample_rate)
+    assert amplitude(audio) < 0.01
+
+
+def test_16khz_input_is_returned_unchanged():
+    audio = tone(1000, SAMPLE_RATE)
+    assert np.array_equal(resample(audio, SAMPLE_RATE), audio)
+
+
+def test_streamed_frames_match_the_whole_clip():
+    audio = tone(440, 48000, seconds=0.5) * 0.5 + tone(3000, 48000, seconds=0.5) * 0.5
+    resampler = Resampler(48000)
+    frames = [resampler.process(audio[i:i + 1234]) for i in range(0, len(audio), 1234)]
+    frames.append(resampler.process(np.zeros(0, dtype=np.float32), final=True))
+    assert np.allclose(np.concatenate(frames), resample(audio, 48000), atol=1e-6)
+
+
+@pytest.mark.parametrize("sample_rate", [44101, 4410007])
+def test_awkward_rates_use_a_bounded_filter(sample_rate):
+    resampler = Resampler(sample_rate)
+    assert max(resampler.up, resampler.down) <= RESAMPLE_MAX_FACTOR
+    if sample_rate <= 48000:
+        audio = resample(tone(1000, sample_rate), sample_rate)
+        assert abs(len(audio) - SAMPLE_RATE) <= 1
+        assert amplitude(audio) == pytest.approx(1.0, abs=0.01)
+
+
+def test_invalid_rate_is_rejected():
+    with pytest.raises(ValueError):
+        Resampler(0)
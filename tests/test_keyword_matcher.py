@@ -0,0 +1,41 @@
+"""
+Tests for reloading the keyword catalog when its file changes
+"""
+import json
+import os
+
+from src.keyword_matcher import KeywordMatcher
+
+CATALOG = {
+    "balance_inquiry": {"keywords": ["balance", {"phrase": "how much money", "weight": 2.0}]},
+    "card_lost": {"keywords": ["lost card", "stolen"]},
+}
+
+
+def write_catalog(path, catalog, mtime):
+    path.write_text(json.dumps(catalog), encoding="utf-8")
+    # Distinct modification times, however coarse the filesystem's clock
+    os.utime(path, (mtime, mtime))
+
+
+def test_changed_catalog_is_picked_up(tmp_path):
+    path = tmp_path / "intents.json"
+    write_catalog(path, CATALOG, 1000)
+    matcher = KeywordMatcher(path, check_interval=0)
+    assert matcher.match("my card was stolen") == "card_lost"
+
+    write_catalog(path, {**CATALOG, "card_lost": {"keywords": ["lost card"]}}, 2000)
+    assert matcher.match("my card was stolen") == "general"
+
+
+def test_invalid_catalog_keeps_the_previous_one(tmp_path):
+    path = tmp_path / "intents.json"
+    write_catalog(path, CATALOG, 1000)
+    matcher = KeywordMatcher(path, check_interval=0)
+
+    invalid = {**CATALOG, "card_lost": {"keywords": [{"phrase": "stolen", "weight": "heavy"}]}}
+    write_catalog(path, invalid, 2000)
+    assert matcher.reload() is False
+    # Scoring triggers the reload check; it must neither raise nor lose the old catalog
+    assert matcher.score("how much money is stolen") == {"balance_inquiry": 2.0, "card_lost": 1.0}
+    assert matcher.intents == list(CATALOG)
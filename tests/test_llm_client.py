@@ -0,0 +1,178 @@
+"""
+Tests for LLMClient deadlines, retries and hedged requests, against a scripted transport
+"""
+import asyncio
+import time
+
+import pytest
+
+from src.llm_client import LLMClient, LLMDeadlineExceeded
+
+
+class TransportError(Exception):
+    """Stands in for an API error with an HTTP status code"""
+
+    def __init__(self, code):
+        super().__init__(f"HTTP {code}")
+        self.code = code
+
+
+class ScriptedTransport:
+    """
+    Each call takes the next (delay seconds, result) step; a result that is an
+    exception is raised after the delay. Streams yield the words of the result.
+    """
+
+    def __init__(self, *steps):
+        self.steps = list(steps)
+        self.calls = 0
+        self.cancelled = 0
+
+    def _next(self):
+        step = self.steps[min(self.calls, len(self.steps) - 1)]
+        self.calls += 1
+        return step
+
+    async def generate(self, prompt):
+        delay, result = self._next()
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    async def stream(self, prompt):
+        delay, result = self._next()
+        await asyncio.sleep(delay)
+        if isinstance(result, Exception):
+            raise result
+        for word in result.split():
+            yield word
+            if word == "FAIL":
+                raise TransportError(503)
+
+
+def make_client(transport, **options):
+    defaults = {
+        "deadline_ms": 2000,
+        "attempt_timeout_ms": 1000,
+        "max_retries": 2,
+        "backoff_ms": 10,
+        "hedge_enabled": False,
+    }
+    defaults.update(options)
+    return LLMClient(transport, **defaults)
+
+
+def test_returns_the_first_successful_attempt():
+    client = make_client(ScriptedTransport((0, "hello")))
+    assert client.generate("prompt") == "hello"
+    stats = client.get_stats()
+    assert stats["requests"] == 1
+    assert stats["attempts"] == 1
+    assert stats["retries"] == 0
+
+
+def test_retries_retryable_errors():
+    transport = ScriptedTransport((0, TransportError(503)), (0, TransportError(429)), (0, "recovered"))
+    client = make_client(transport)
+    assert client.generate("prompt") == "recovered"
+    assert transport.calls == 3
+    assert client.get_stats()["retries"] == 2
+
+
+def test_client_errors_are_not_retried():
+    transport = ScriptedTransport((0, TransportError(400)), (0, "never"))
+    client = make_client(transport)
+    with pytest.raises(TransportError):
+        client.generate("prompt")
+    assert transport.calls == 1
+    assert client.get_stats()["failures"] == 1
+
+
+def test_retries_stop_after_max_retries():
+    transport = ScriptedTransport((0, TransportError(503)))
+    client = make_client(transport, max_retries=1)
+    with pytest.raises(TransportError):
+        client.generate("prompt")
+    assert transport.calls == 2
+
+
+def test_slow_attempt_times_out_and_is_retried():
+    transport = ScriptedTransport((1.0, "too late"), (0, "fast"))
+    client = make_client(transport, attempt_timeout_ms=100)
+    assert client.generate("prompt") == "fast"
+    assert transport.cancelled == 1
+    assert client.get_stats()["attempts_latency"]["timeout"]["count"] == 1
+
+
+def test_deadline_bounds_the_whole_request():
+    client = make_client(ScriptedTransport((1.0, "too late")), deadline_ms=200, attempt_timeout_ms=150)
+    start = time.monotonic()
+    with pytest.raises(LLMDeadlineExceeded):
+        client.generate("prompt")
+    assert time.monotonic() - start < 0.5
+    assert client.get_stats()["deadline_exceeded"] == 1
+
+
+def test_per_request_deadline_overrides_the_default():
+    client = make_client(ScriptedTransport((0.3, "slow")), deadline_ms=5000)
+    with pytest.raises(LLMDeadlineExceeded):
+        client.generate("prompt", deadline_ms=100)
+
+
+def test_hedge_wins_and_the_slow_primary_is_cancelled():
+    outcomes = []
+    transport = ScriptedTransport((1.0, "primary"), (0.01, "hedge"))
+    client = make_client(
+        transport,
+        hedge_enabled=True,
+        hedge_delay_ms=50,
+        on_attempt=lambda outcome, latency_ms: outcomes.append(outcome)
+    )
+    start = time.monotonic()
+    assert client.generate("prompt") == "hedge"
+    assert time.monotonic() - start < 0.5
+    assert transport.calls == 2
+    assert transport.cancelled == 1
+    assert sorted(outcomes) == ["cancelled", "success"]
+    stats = client.get_stats()
+    assert stats["hedges"] == 1
+    assert stats["hedge_wins"] == 1
+
+
+def test_fast_primary_fires_no_hedge():
+    transport = ScriptedTransport((0, "primary"))
+    client = make_client(transport, hedge_enabled=True, hedge_delay_ms=200)
+    assert client.generate("prompt") == "primary"
+    assert transport.calls == 1
+    assert client.get_stats()["hedges"] == 0
+
+
+def test_hedge_delay_waits_for_enough_samples():
+    client = make_client(ScriptedTransport((0, "ok")), hedge_enabled=True, hedge_min_samples=3)
+    assert client._hedge_delay() is None
+    for _ in range(3):
+        client.generate("prompt")
+    assert client._hedge_delay() is not None
+
+
+def test_stream_retries_before_the_first_piece():
+    transport = ScriptedTransport((0, TransportError(503)), (0, "hello there"))
+    client = make_client(transport)
+    assert list(client.stream("prompt")) == ["hello", "there"]
+    assert transport.calls == 2
+
+
+def test_stream_is_not_retried_after_pieces_were_yielded():
+    transport = ScriptedTransport((0, "partial FAIL"), (0, "never"))
+    client = make_client(transport)
+    pieces = []
+    with pytest.raises(TransportError):
+        for piece in client.stream("prompt"):
+            pieces.append(piece)
+    assert pieces == ["partial", "FAIL"]
+    assert transport.calls == 1
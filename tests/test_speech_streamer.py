@@ -0,0 +1,104 @@
+"""
+Tests for sentence segmentation of streamed LLM text and ordered segment synthesis
+"""
+import time
+
+import pytest
+
+from src.speech_streamer import SentenceChunker, SpeechStreamer
+
+
+def chunk_stream(text, size=3, **options):
+    """Feed text to a SentenceChunker in fixed-size pieces, like an LLM token stream"""
+    chunker = SentenceChunker(**options)
+    sentences = []
+    for i in range(0, len(text), size):
+        sentences.extend(chunker.feed(text[i:i + size]))
+    return sentences + chunker.flush()
+
+
+def test_splits_streamed_tokens_into_sentences():
+    text = "Your balance is available now. Is there anything else I can help with? Have a great day!"
+    assert chunk_stream(text) == [
+        "Your balance is available now.",
+        "Is there anything else I can help with?",
+        "Have a great day!",
+    ]
+
+
+def test_sentence_is_emitted_once_the_following_whitespace_arrives():
+    chunker = SentenceChunker()
+    assert chunker.feed("Your payment was received.") == []
+    assert chunker.feed(" It") == ["Your payment was received."]
+
+
+def test_decimal_point_split_across_tokens_is_not_a_boundary():
+    sentences = chunk_stream("Your current balance is $3.50 after the fee. Anything else today?", size=1)
+    assert sentences == ["Your current balance is $3.50 after the fee.", "Anything else today?"]
+
+
+def test_abbreviations_do_not_end_a_sentence():
+    sentences = chunk_stream("Please call Dr. Smith at the branch tomorrow. She can help with that.")
+    assert sentences == ["Please call Dr. Smith at the branch tomorrow.", "She can help with that."]
+
+
+def test_short_sentences_are_merged_with_the_next():
+    sentences = chunk_stream("Sure. Your card has been locked for your safety.", min_chars=20)
+    assert sentences == ["Sure. Your card has been locked for your safety."]
+
+
+def test_line_breaks_are_boundaries():
+    sentences = chunk_stream("Here are your options:\n1) Reset your PIN online\n2) Visit a branch")
+    assert sentences == ["Here are your options:", "1) Reset your PIN online", "2) Visit a branch"]
+
+
+def test_long_text_without_punctuation_is_cut_at_a_comma():
+    text = "first " * 10 + "part, " + "second " * 10
+    sentences = chunk_stream(text, max_chars=80)
+    assert sentences[0].endswith("part,")
+    assert all(len(sentence) <= 80 for sentence in sentences)
+    assert " ".join(sentences).split() == text.split()
+
+
+def test_flush_returns_the_unterminated_remainder():
+    chunker = SentenceChunker()
+    assert chunker.feed("Thanks for calling") == []
+    assert chunker.flush() == ["Thanks for calling"]
+    assert chunker.flush() == []
+
+
+def test_segments_are_yielded_in_order_when_later_ones_finish_first():
+    def synthesize(sentence, index):
+        # Earlier sentences take longer, so they finish last
+        time.sleep(0.05 * (3 - index))
+        return f"audio-{index}"
+
+    deltas = ["The first sentence is here. ", "The second sentence is here. ", "The third sentence is here."]
+    segments = list(SpeechStreamer(synthesize, max_parallel=3).stream(deltas))
+    assert [segment["index"] for segment in segments] == [0, 1, 2]
+    assert [segment["audio"] for segment in segments] == ["audio-0", "audio-1", "audio-2"]
+    assert segments[2]["text"] == "The third sentence is here."
+
+
+def test_synthesis_failure_is_raised_to_the_consumer():
+    def synthesize(sentence, index):
+        if index == 1:
+            raise RuntimeError("synthesis failed")
+        return b"audio"
+
+    deltas = ["The first sentence is here. ", "The second sentence is here. ", "The third one."]
+    stream = SpeechStreamer(synthesize).stream(deltas)
+    assert next(stream)["index"] == 0
+    with pytest.raises(RuntimeError, match="synthesis failed"):
+        next(stream)
+
+
+def test_text_stream_failure_is_raised_after_completed_sentences():
+    def deltas():
+        yield "The first sentence is complete. "
+        raise ConnectionError("stream dropped")
+
+    stream = SpeechStreamer(lambda sentence, index: b"audio").stream(deltas())
+    assert next(stream)["text"] == "The first sentence is complete."
+    with pytest.raises(ConnectionError):
+        next(stream)
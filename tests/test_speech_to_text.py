@@ -0,0 +1,58 @@
+"""
+Tests for StreamingTranscriber's local-agreement commits and buffer trimming
+"""
+import numpy as np
+
+from src.speech_to_text import WHISPER_SAMPLE_RATE, StreamingTranscriber
+
+
+class TimelineBackend:
+    """
+    Stands in for Whisper. Each sample holds its absolute time in seconds, and the
+    stream says one word per second ("w0" spoken from 0.0 to 0.8 s, "w1" from 1.0 s...),
+    so every pass returns the words fully inside the audio it was given.
+    """
+
+    def __init__(self):
+        self.window_seconds = []
+
+    def transcribe(self, audio, **options):
+        start = float(audio[0])
+        duration = len(audio) / WHISPER_SAMPLE_RATE
+        self.window_seconds.append(duration)
+        words = []
+        second = int(np.ceil(start))
+        while second + 0.8 <= start + duration:
+            words.append({"word": f" w{second}", "start": second - start, "end": second + 0.8 - start})
+            second += 1
+        return {"segments": [{"words": words}]}
+
+
+def stream(transcriber, seconds, chunk_seconds=0.5):
+    chunk = int(chunk_seconds * WHISPER_SAMPLE_RATE)
+    for i in range(int(seconds / chunk_seconds)):
+        transcriber.insert_audio((np.arange(chunk) / WHISPER_SAMPLE_RATE + i * chunk_seconds).astype(np.float32))
+
+
+def test_committed_audio_is_trimmed_so_decode_windows_stay_short():
+    backend = TimelineBackend()
+    transcriber = StreamingTranscriber(backend, min_chunk_seconds=0.5, max_window_seconds=15.0)
+    stream(transcriber, 30)
+    # Without trimming, windows would grow towards max_window_seconds
+    assert max(backend.window_seconds) < 3.0
+
+
+def test_trimming_neither_drops_nor_repeats_words():
+    transcriber = StreamingTranscriber(TimelineBackend(), min_chunk_seconds=0.5)
+    stream(transcriber, 20)
+    final = transcriber.finish()
+    assert final["type"] == "final"
+    assert final["text"].split() == [f"w{second}" for second in range(20)]
+
+
+def test_partial_hypotheses_commit_words_two_passes_agree_on():
+    transcriber = StreamingTranscriber(TimelineBackend(), min_chunk_seconds=0.5)
+    stream(transcriber, 3)
+    hypothesis = transcriber.hypothesis()
+    assert hypothesis["committed"].split() == ["w0", "w1"]
+    assert hypothesis["text"].startswith("w0 w1")
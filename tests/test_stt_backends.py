@@ -0,0 +1,71 @@
+"""
+Tests that concurrent callers take turns on the shared Whisper model
+"""
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src import stt_backends
+from src.stt_backends import WhisperBackend
+
+
+class OverlapDetector:
+    """Counts how many calls are inside the model at once"""
+
+    def __init__(self):
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def run(self, result):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.02)
+        with self._lock:
+            self.active -= 1
+        return result
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    detector = OverlapDetector()
+    model = SimpleNamespace(
+        dims=SimpleNamespace(n_mels=80),
+        transcribe=lambda audio, **options: detector.run({"text": "hello"})
+    )
+    fake_whisper = SimpleNamespace(
+        load_model=lambda name, device: model,
+        pad_or_trim=lambda audio: audio,
+        log_mel_spectrogram=lambda audio, n_mels: audio,
+        DecodingOptions=lambda **options: options,
+        decode=lambda model, mel, options: detector.run([SimpleNamespace(text=" hi ") for _ in mel]),
+    )
+    fake_torch = SimpleNamespace(stack=lambda arrays: SimpleNamespace(to=lambda device: arrays))
+    monkeypatch.setattr(stt_backends, "whisper", fake_whisper)
+    monkeypatch.setattr(stt_backends, "torch", fake_torch)
+    return WhisperBackend("tiny"), detector
+
+
+def test_concurrent_transcribes_and_batch_decodes_do_not_overlap(backend):
+    whisper_backend, detector = backend
+    audio = np.zeros(16000, dtype=np.float32)
+    results = []
+
+    def call(i):
+        if i % 2:
+            results.append(whisper_backend.transcribe(audio)["text"])
+        else:
+            results.append(whisper_backend.transcribe_batch([audio, audio])[0])
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert detector.max_active == 1
+    assert sorted(results) == ["hello"] * 4 + ["hi"] * 4
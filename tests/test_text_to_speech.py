@@ -0,0 +1,179 @@
+"""
+Tests for parallel, ordered chunk synthesis with a Polly stand-in
+"""
+import threading
+import time
+
+import pytest
+from botocore.exceptions import ClientError
+
+from config import settings
+from src.text_to_speech import TextToSpeech
+from src.tts_backends import PollyBackend, TTSBackend
+
+SENTENCES = [
+    "Your checking account balance is two thousand dollars.",
+    "Your savings account balance is five hundred dollars.",
+    "Your last payment was received yesterday afternoon.",
+    "Is there anything else I can help you with today?",
+]
+
+
+class FakeAudioStream:
+    """Stands in for botocore's StreamingBody"""
+
+    def __init__(self, audio: bytes):
+        self.audio = audio
+
+    def read(self) -> bytes:
+        return self.audio
+
+    def iter_chunks(self, chunk_size: int = 4096):
+        for i in range(0, len(self.audio), chunk_size):
+            yield self.audio[i:i + chunk_size]
+
+    def close(self):
+        pass
+
+
+class FakePolly:
+    """Stands in for the boto3 Polly client: the audio is the text itself"""
+
+    def __init__(self, delays=None, fail_on=None):
+        self.delays = delays or {}
+        self.fail_on = fail_on
+        self.texts = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def synthesize_speech(self, Text: str, **options):
+        with self._lock:
+            self.texts.append(Text)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.delays.get(Text, 0.0))
+            if self.fail_on and self.fail_on in Text:
+                raise ClientError({"Error": {"Code": "ServiceUnavailable", "Message": "503"}}, "SynthesizeSpeech")
+            return {"AudioStream": FakeAudioStream(Text.encode("utf-8"))}
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+class FakeEspeak(TTSBackend):
+    """Local fallback whose audio is the text, tagged with the backend's name"""
+
+    name = "espeak"
+
+    def __init__(self):
+        super().__init__("en-us", "espeak-ng", "local")
+        self.texts = []
+
+    def stream(self, text, output_format="mp3", sample_rate=None, chunk_bytes=4096):
+        self.texts.append(text)
+        yield b"espeak:" + text.encode("utf-8")
+
+
+@pytest.fixture(autouse=True)
+def chunked_settings(monkeypatch):
+    # One sentence per chunk, no cache, so every chunk is a request
+    monkeypatch.setattr(settings, "tts_cache_enabled", False)
+    monkeypatch.setattr(settings, "tts_chunking_enabled", True)
+    monkeypatch.setattr(settings, "tts_chunk_max_chars", 60)
+    monkeypatch.setattr(settings, "tts_max_parallel", 4)
+    monkeypatch.setattr(settings, "tts_backend_selection", "priority")
+
+
+def make_tts(polly: FakePolly) -> TextToSpeech:
+    return TextToSpeech(backends=[PollyBackend(client=polly)])
+
+
+def slow_first(step: float = 0.1):
+    """Earlier sentences take longer, so chunks finish in reverse order"""
+    return {sentence: step * (len(SENTENCES) - i) for i, sentence in enumerate(SENTENCES)}
+
+
+def test_long_text_is_split_into_sentence_chunks():
+    tts = make_tts(FakePolly())
+    assert tts.split_text(" ".join(SENTENCES)) == SENTENCES
+
+
+def test_short_text_is_one_request():
+    polly = FakePolly()
+    assert make_tts(polly).synthesize(SENTENCES[0]) == SENTENCES[0].encode("utf-8")
+    assert polly.texts == [SENTENCES[0]]
+
+
+def test_chunks_are_synthesized_in_parallel_and_joined_in_order():
+    polly = FakePolly(delays=slow_first())
+    start = time.monotonic()
+    audio = make_tts(polly).synthesize(" ".join(SENTENCES))
+    elapsed = time.monotonic() - start
+
+    assert audio == "".join(SENTENCES).encode("utf-8")
+    assert polly.max_active > 1
+    # Sequential requests would take the sum of the delays (1.0 s)
+    assert elapsed < 0.7
+
+
+def test_synthesize_chunks_yields_in_text_order():
+    polly = FakePolly(delays=slow_first(0.05))
+    chunks = list(make_tts(polly).synthesize_chunks(" ".join(SENTENCES)))
+    assert chunks == [sentence.encode("utf-8") for sentence in SENTENCES]
+
+
+def test_failed_chunk_fails_the_whole_synthesis():
+    polly = FakePolly(fail_on="savings")
+    assert make_tts(polly).synthesize(" ".join(SENTENCES)) is None
+
+
+def test_synthesize_chunks_stops_at_the_first_failed_chunk():
+    polly = FakePolly(fail_on="savings")
+    chunks = list(make_tts(polly).synthesize_chunks(" ".join(SENTENCES)))
+    assert chunks == [SENTENCES[0].encode("utf-8")]
+
+
+def test_synthesize_stream_relays_the_first_chunk_then_the_rest_in_order():
+    polly = FakePolly(delays=slow_first(0.05))
+    audio = b"".join(make_tts(polly).synthesize_stream(" ".join(SENTENCES)))
+    assert audio == "".join(SENTENCES).encode("utf-8")
+
+
+def espeak_audio(sentences):
+    return b"".join(b"espeak:" + sentence.encode("utf-8") for sentence in sentences)
+
+
+def test_failed_chunk_moves_the_whole_text_to_the_fallback():
+    polly, espeak = FakePolly(fail_on="savings"), FakeEspeak()
+    tts = TextToSpeech(backends=[PollyBackend(client=polly), espeak])
+    # Polly managed every chunk but one; none of its audio may end up in the response
+    assert tts.synthesize(" ".join(SENTENCES)) == espeak_audio(SENTENCES)
+    assert espeak.texts == SENTENCES
+
+
+def test_streamed_response_never_mixes_backends():
+    polly = FakePolly(fail_on="checking")
+    tts = TextToSpeech(backends=[PollyBackend(client=polly), FakeEspeak()])
+    assert b"".join(tts.synthesize_stream(" ".join(SENTENCES))) == espeak_audio(SENTENCES)
+
+    # Once Polly's audio has been sent, a later failure ends the response instead
+    polly.fail_on = "savings"
+    tts = TextToSpeech(backends=[PollyBackend(client=polly), FakeEspeak()])
+    assert list(tts.synthesize_chunks(" ".join(SENTENCES))) == [SENTENCES[0].encode("utf-8")]
+
+
+def test_backend_is_resolved_once_per_request(monkeypatch):
+    monkeypatch.setattr(settings, "tts_backend_selection", "latency")
+    polly, espeak = FakePolly(delays=slow_first(0.02)), FakeEspeak()
+    tts = TextToSpeech(backends=[PollyBackend(client=polly), espeak])
+    lookups = []
+    candidates = tts.router.candidates
+    monkeypatch.setattr(tts.router, "candidates", lambda: lookups.append(1) or candidates())
+
+    # The first chunk's timing would reorder "latency" selection if chunks each asked the router
+    audio = tts.synthesize(" ".join(SENTENCES))
+    assert lookups == [1]
+    assert audio == "".join(SENTENCES).encode("utf-8")
+    assert espeak.texts == []
@@ -0,0 +1,35 @@
+"""
+Tests for the disk tier's size cap when several workers share the directory
+"""
+import os
+
+from src.tts_cache import AudioCache
+
+ENTRY = 1000
+
+
+def directory_bytes(path):
+    return sum(f.stat().st_size for f in path.glob("*/*/*.audio"))
+
+
+def test_size_cap_covers_every_worker_sharing_the_directory(tmp_path):
+    # Two instances stand in for two gunicorn workers
+    workers = [AudioCache(disk_dir=tmp_path, max_disk_bytes=10 * ENTRY, max_memory_bytes=0) for _ in range(2)]
+    for i in range(40):
+        workers[i % 2].put(AudioCache.make_key(f"text {i}", "Joanna", "neural", "mp3", "us-east-1"), b"x" * ENTRY)
+
+    assert directory_bytes(tmp_path) <= 10 * ENTRY
+
+
+def test_least_recently_used_files_are_evicted_first(tmp_path):
+    cache = AudioCache(disk_dir=tmp_path, max_disk_bytes=3 * ENTRY, max_memory_bytes=0)
+    keys = [AudioCache.make_key(f"text {i}", "Joanna", "neural", "mp3", "us-east-1") for i in range(4)]
+    for i, key in enumerate(keys[:3]):
+        cache.put(key, b"x" * ENTRY)
+        os.utime(cache.path_for(key), (1000 + i, 1000 + i))
+    # Reading the oldest entry makes it the most recently used
+    assert cache.get(keys[0]) is not None
+
+    cache.put(keys[3], b"x" * ENTRY)
+    assert cache.path_for(keys[1]) is None
+    assert all(cache.path_for(key) for key in (keys[0], keys[2], keys[3]))